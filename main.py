@@ -1,5 +1,53 @@
+import subprocess
+import sys
+from importlib import import_module
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+# command -> (module, description); each module exposes main()
+COMMANDS = {
+    "ingest": ("rag.ingestion", "ingest PDFs into LanceDB"),
+    "index": ("rag.indexing", "build or refresh the vector / full-text indexes"),
+    "maintain": ("rag.maintenance", "compact, re-index and prune the table when needed"),
+    "compress": ("rag.compression", "add short vectors for two-stage search"),
+    "search": ("rag.search", "run a sample query"),
+    "serve": ("rag.service", "serve retrieval and streaming chat over HTTP/SSE"),
+    "harvest": ("ETL.crossref", "harvest Wiley DOIs from Crossref"),
+    "download": ("blob_utils.downloader", "download Wiley PDFs into Azure"),
+    "blobs": ("ETL.blob_load", "sync local PDFs with Azure Blob Storage"),
+    "articles": ("rag.articles", "fill and index the doi / year / journal columns"),
+    "eval": ("rag.evaluation", "recall@k / MRR / latency on labeled questions"),
+    "bench": ("rag.bench.suite", "offline end-to-end benchmarks (JSON output)"),
+    "bench-service": ("rag.bench.service_load", "load-test the chat service with a mock LLM"),
+    "bench-import": ("rag.bench.import_time", "check the `import rag` time budget"),
+}
+
+
+def usage() -> str:
+    lines = ["usage: python main.py <command> [args...]", "", "commands:"]
+    lines.append(f"  {'chat':<14}start the Streamlit chat app")
+    lines += [f"  {name:<14}{description}" for name, (_, description) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
 def main():
-    print("Hello from rag!")
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(usage())
+        return
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == "chat":
+        app = SRC_DIR / "rag" / "chat.py"
+        sys.exit(subprocess.call([sys.executable, "-m", "streamlit", "run", str(app), *args]))
+    if command not in COMMANDS:
+        print(usage())
+        sys.exit(2)
+
+    module, _ = COMMANDS[command]
+    sys.argv = [f"main.py {command}", *args]
+    import_module(module).main()
 
 
 if __name__ == "__main__":
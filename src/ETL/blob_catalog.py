@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import ContainerClient, ContentSettings
+
+CATALOG_PATH = Path(
+    os.getenv("BLOB_CATALOG_PATH", Path(__file__).parent / ".blob_catalog.sqlite")
+)
+
+
+def file_md5(path: Path, block_size: int = 1 << 20) -> str:
+    """Hex MD5 of a file, the digest Azure keeps as Content-MD5."""
+    digest = hashlib.md5()
+    with open(path, "rb") as fl:
+        while block := fl.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class BlobEntry:
+    name: str
+    size: int
+    md5: str | None
+    etag: str | None
+    last_modified: str | None
+
+
+class BlobCatalog:
+    """Local SQLite catalog of the blobs in one container.
+
+    The catalog is filled by one full listing (`rescan`) and then kept up to
+    date as this process uploads, so routine syncs never list the container.
+    """
+
+    def __init__(self, path: Path = CATALOG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (name TEXT PRIMARY KEY, size INTEGER, "
+            "md5 TEXT, etag TEXT, last_modified TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_md5 ON blobs (md5)")
+        # MD5s of local files, reused while their size and mtime are unchanged
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS local_files (path TEXT PRIMARY KEY, "
+            "size INTEGER, mtime_ns INTEGER, md5 TEXT)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def upsert(self, entry: BlobEntry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                (entry.name, entry.size, entry.md5, entry.etag, entry.last_modified),
+            )
+            self._conn.commit()
+
+    def get(self, name: str) -> BlobEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM blobs WHERE name = ?", (name,)
+            ).fetchone()
+        return BlobEntry(*row) if row else None
+
+    def find_content(self, md5: str, size: int) -> BlobEntry | None:
+        """Any blob with exactly this content, whatever its name."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM blobs WHERE md5 = ? AND size = ? LIMIT 1", (md5, size)
+            ).fetchone()
+        return BlobEntry(*row) if row else None
+
+    def local_md5(self, path: Path) -> tuple[str, int]:
+        """MD5 and size of a local file, hashed only when it is new or changed."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT md5 FROM local_files WHERE path = ? AND size = ? "
+                "AND mtime_ns = ?",
+                (str(path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0], stat.st_size
+        md5 = file_md5(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO local_files VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, md5),
+            )
+            self._conn.commit()
+        return md5, stat.st_size
+
+    def entries(self) -> list[BlobEntry]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM blobs ORDER BY name").fetchall()
+        return [BlobEntry(*row) for row in rows]
+
+    def rescan(self, container_client: ContainerClient) -> int:
+        """Replace the catalog with a full listing of the container."""
+        entries = []
+        for blob in container_client.list_blobs():
+            md5 = blob.content_settings.content_md5
+            entries.append(
+                (
+                    blob.name,
+                    blob.size,
+                    bytes(md5).hex() if md5 else None,
+                    blob.etag,
+                    blob.last_modified.isoformat() if blob.last_modified else None,
+                )
+            )
+        with self._lock:
+            self._conn.execute("DELETE FROM blobs")
+            self._conn.executemany("INSERT INTO blobs VALUES (?, ?, ?, ?, ?)", entries)
+            self._conn.commit()
+        return len(entries)
+
+
+def upload_file(
+    container_client: ContainerClient,
+    path: Path,
+    md5: str,
+    overwrite: bool = False,
+    max_concurrency: int = 4,
+) -> BlobEntry:
+    """Upload one file in parallel blocks and return its catalog entry."""
+    blob_client = container_client.get_blob_client(path.name)
+    with open(path, "rb") as fl:
+        result = blob_client.upload_blob(
+            fl,
+            overwrite=overwrite,
+            max_concurrency=max_concurrency,
+            content_settings=ContentSettings(
+                content_type="application/pdf",
+                content_md5=bytearray(bytes.fromhex(md5)),
+            ),
+        )
+    return BlobEntry(
+        name=path.name,
+        size=path.stat().st_size,
+        md5=md5,
+        etag=result.get("etag"),
+        last_modified=result["last_modified"].isoformat()
+        if result.get("last_modified")
+        else None,
+    )
+
+
+def sync_directory(
+    pdfs_dir: Path,
+    container_client: ContainerClient,
+    catalog: BlobCatalog,
+    workers: int = 4,
+    max_concurrency: int = 4,
+) -> dict:
+    """Upload the PDFs whose content is not in the container yet.
+
+    A file is skipped when a blob with the same MD5 and size exists under any
+    name, or when another file of the same run has the same content. A file
+    whose name exists with different content is uploaded over it. Hashes of
+    unchanged files are taken from the catalog.
+
+    Args:
+        pdfs_dir: Folder with PDFs
+        container_client: Target container
+        catalog: Catalog of the container
+        workers: Files hashed or uploaded at the same time
+        max_concurrency: Parallel block uploads per file
+
+    Returns:
+        dict: Counts of uploaded, skipped and failed files
+    """
+    counts = {"uploaded": 0, "skipped": 0, "failed": 0}
+
+    def sync_one(path: Path, md5: str, size: int) -> str:
+        if existing := catalog.find_content(md5, size):
+            print(f"Already exists in blob storage: {path.name} (as {existing.name})")
+            return "skipped"
+        overwrite = catalog.get(path.name) is not None
+        try:
+            entry = upload_file(container_client, path, md5, overwrite, max_concurrency)
+        except ResourceExistsError:
+            # Uploaded by someone else since the last rescan
+            print(f"Already exists in blob storage (catalog is stale): {path.name}")
+            return "skipped"
+        catalog.upsert(entry)
+        print(f"Uploaded: {path.name}")
+        return "uploaded"
+
+    def collect(futures: dict) -> dict:
+        results = {}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Failed: {futures[future].name}: {type(e).__name__}: {e}")
+                counts["failed"] += 1
+        return results
+
+    paths = sorted(
+        p for p in Path(pdfs_dir).iterdir() if p.is_file() and p.suffix.lower() == ".pdf"
+    )
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = collect({pool.submit(catalog.local_md5, path): path for path in paths})
+
+        # Upload each content once, however many local copies it has
+        unique: dict[tuple[str, int], Path] = {}
+        for path in sorted(hashes):
+            if first := unique.get(hashes[path]):
+                print(f"Same content as {first.name}, not uploaded: {path.name}")
+                counts["skipped"] += 1
+            else:
+                unique[hashes[path]] = path
+
+        outcomes = collect(
+            {
+                pool.submit(sync_one, path, md5, size): path
+                for (md5, size), path in unique.items()
+            }
+        )
+    for outcome in outcomes.values():
+        counts[outcome] += 1
+    return counts
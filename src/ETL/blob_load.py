@@ -1,45 +1,42 @@
+import argparse
 import os
 
 from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
+from ETL.blob_catalog import BlobCatalog, sync_directory
+
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 
 load_dotenv(env_path)
 
-conn_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-
-blob_service_client = BlobServiceClient.from_connection_string(conn_str)
-container_client = blob_service_client.get_container_client("articles")
-
+CONTAINER_NAME = "articles"
 
-def list_blob():
-    container_name = "articles"
 
+def get_container_client(container_name: str = CONTAINER_NAME):
     # get connection string from env
     connection_string = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
 
-    # connect to blob service
+    # connect to blob service and get container client
     blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+    return blob_service_client.get_container_client(container_name)
 
-    # get container client
-    container_client = blob_service_client.get_container_client(container_name)
 
-    # list blobs
-    for blob in container_client.list_blobs():
-        print(blob.name)
+def list_blob(catalog: BlobCatalog | None = None, rescan: bool = False):
+    # list blobs from the local catalog; only scan the container when asked to
+    # or when the catalog is still empty
+    catalog = catalog or BlobCatalog()
+    if rescan or len(catalog) == 0:
+        print(f"Scanned {catalog.rescan(get_container_client())} blobs")
+    for entry in catalog.entries():
+        print(entry.name)
 
 
-# Call the function
-list_blob()
-
-
-def upload_blob():
-    connection_string = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    container_client = blob_service_client.get_container_client(
-        "articles"
-    )  # Use the correct container name
+def upload_blob(catalog: BlobCatalog | None = None, workers: int = 4):
+    catalog = catalog or BlobCatalog()
+    container_client = get_container_client()
+    if len(catalog) == 0:
+        catalog.rescan(container_client)
 
     # Path to the pdfs folder (one level up from Azure)
     pdfs_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "pdfs"))
@@ -47,24 +44,27 @@ def upload_blob():
         print(f"PDFs folder not found: {pdfs_dir}")
         return
 
-    # Get list of existing blobs in the container
-    existing_blobs = set(blob.name for blob in container_client.list_blobs())
-
-    # Upload all PDF files in the pdfs folder if not already in blob storage
-    for filename in os.listdir(pdfs_dir):
-        if filename.lower().endswith(".pdf"):
-            if filename in existing_blobs:
-                print(f"Already exists in blob storage: {filename}")
-                continue
-            full_file_path = os.path.join(pdfs_dir, filename)
-            if os.path.isfile(full_file_path):
-                with open(full_file_path, "rb") as fl:
-                    container_client.upload_blob(
-                        name=filename, data=fl, overwrite=False
-                    )
-                    print(f"Uploaded: {filename}")
-            else:
-                print(f"File not found: {filename}")
-
-
-upload_blob()
+    # Upload all PDF files whose content is not already in blob storage
+    counts = sync_directory(pdfs_dir, container_client, catalog, workers=workers)
+    print(
+        f"{counts['uploaded']} uploaded, {counts['skipped']} already present, "
+        f"{counts['failed']} failed"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync local PDFs to Azure Blob Storage.")
+    parser.add_argument("command", choices=["list", "upload", "rescan"])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        list_blob()
+    elif args.command == "rescan":
+        list_blob(rescan=True)
+    else:
+        upload_blob(workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
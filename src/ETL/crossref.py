@@ -1,29 +1,271 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE = "https://api.crossref.org/works"
+WILEY_MEMBER = 311
+CACHE_DIR = Path(os.getenv("CROSSREF_CACHE_DIR", Path(__file__).parent / ".crossref_cache"))
 
 
-def wiley_dois_2025_by_keyword(query, limit=5):
-    """
-    Fetch up to `limit` DOIs from Wiley-Blackwell (member:311), year 2025,
-    filtered by a keyword query. Keeps it to a single, small request.
+def make_session(pool_size: int = 8) -> requests.Session:
+    """Pooled session with retries on Crossref's transient errors."""
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    # generic UA; no personal info, add CROSSREF_MAILTO to join the polite pool
+    user_agent = "wiley-doi-fetcher/0.2"
+    if mailto := os.getenv("CROSSREF_MAILTO"):
+        user_agent += f" (mailto:{mailto})"
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
+class ResponseCache:
+    """On-disk cache of Crossref result pages.
+
+    Pages are keyed by the query parameters and the page number rather than
+    by the cursor, since cursors change between runs. Entries older than
+    `ttl` seconds are ignored.
     """
-    params = {
+
+    def __init__(self, directory: Path = CACHE_DIR, ttl: float = 24 * 3600):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, params: dict, page: int) -> Path:
+        key = json.dumps({"params": params, "page": page}, sort_keys=True)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, params: dict, page: int) -> dict | None:
+        path = self._path(params, page)
+        if not path.exists() or time.time() - path.stat().st_mtime > self.ttl:
+            return None
+        return json.loads(path.read_text())
+
+    def put(self, params: dict, page: int, message: dict):
+        path = self._path(params, page)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(message))
+        os.replace(tmp_path, path)
+
+
+def wiley_query_params(query: str, year: int = 2025, rows: int = 1000) -> dict:
+    return {
         "query": query,  # try 'high-entropy alloy', 'lithium ion battery', etc.
-        "filter": "member:311,type:journal-article,from-pub-date:2025-01-01,until-pub-date:2025-12-31",
-        "rows": limit,  # only get what we need
-        "select": "DOI",  # DOIs only
+        "filter": (
+            f"member:{WILEY_MEMBER},type:journal-article,"
+            f"from-pub-date:{year}-01-01,until-pub-date:{year}-12-31"
+        ),
+        "rows": rows,
+        "select": "DOI,issued,container-title",  # DOI, year and journal only
         "sort": "published",
         "order": "desc",
     }
-    headers = {"User-Agent": "wiley-doi-fetcher/0.1"}  # generic UA; no personal info
-    r = requests.get(BASE, params=params, headers=headers, timeout=30)
-    r.raise_for_status()
-    items = r.json().get("message", {}).get("items", [])
-    return [it["DOI"] for it in items if "DOI" in it]
 
 
-# Example:
+def work_metadata(item: dict) -> dict:
+    """DOI, publication year and journal of a Crossref work item."""
+    date_parts = item.get("issued", {}).get("date-parts") or [[None]]
+    journals = item.get("container-title") or [None]
+    return {"doi": item["DOI"], "year": date_parts[0][0], "journal": journals[0]}
+
+
+def iter_wiley_works(
+    query: str,
+    year: int = 2025,
+    rows: int = 1000,
+    session: requests.Session | None = None,
+    cache: ResponseCache | None = None,
+):
+    """Yield every Wiley work for a keyword query, using Crossref deep paging.
+
+    Pages are walked with `cursor=*` and served from `cache` when possible.
+    If a cached page hands over a cursor that has since expired, the walk
+    restarts from the first page without the cache.
+
+    Args:
+        query: Keyword query
+        year: Publication year
+        rows: Results per page (Crossref allows up to 1000)
+        session: Pooled session, a new one is created if omitted
+        cache: Response cache, or None to always hit Crossref
+
+    Yields:
+        dict: `work_metadata` of each work, in the order Crossref returns them
+    """
+    session = session or make_session()
+    params = wiley_query_params(query, year, rows)
+    cursor, page, use_cache = "*", 0, cache is not None
+    yielded = 0  # pages already yielded, skipped again after a restart
+    while True:
+        message = cache.get(params, page) if use_cache else None
+        if message is None:
+            r = session.get(BASE, params={**params, "cursor": cursor}, timeout=30)
+            if r.status_code == 400 and page > 0 and use_cache:
+                # Stale cursor from a cached page: start over from fresh pages
+                cursor, page, use_cache = "*", 0, False
+                continue
+            r.raise_for_status()
+            message = r.json().get("message", {})
+            if cache is not None:
+                cache.put(params, page, message)
+
+        items = message.get("items", [])
+        if page >= yielded:
+            for it in items:
+                if "DOI" in it:
+                    yield work_metadata(it)
+            yielded = page + 1
+        if not items or len(items) < rows or not message.get("next-cursor"):
+            return
+        cursor, page = message["next-cursor"], page + 1
+
+
+def iter_wiley_dois(query: str, **kwargs):
+    """Yield every Wiley DOI for a keyword query, see `iter_wiley_works`."""
+    for work in iter_wiley_works(query, **kwargs):
+        yield work["doi"]
+
+
+def harvest(
+    queries: list[str],
+    year: int = 2025,
+    max_workers: int = 4,
+    cache: ResponseCache | None = None,
+):
+    """Run keyword queries concurrently and yield each work once.
+
+    Args:
+        queries: Keyword queries
+        year: Publication year
+        max_workers: Queries run at the same time
+        cache: Response cache shared by all queries
+
+    Yields:
+        dict: De-duplicated `work_metadata`, as soon as any query produces it
+
+    Raises:
+        Exception: The first error of any query, as soon as it happens; the
+            other queries are then stopped
+    """
+    session = make_session(pool_size=max_workers)
+    results: queue.Queue = queue.Queue(maxsize=10_000)
+    cancel = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # Give up once the consumer has stopped, rather than block on a full queue
+        while not cancel.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(query: str):
+        try:
+            for work in iter_wiley_works(query, year, session=session, cache=cache):
+                if not put(work):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for query in queries:
+                pool.submit(run, query)
+            remaining = len(queries)
+            while remaining:
+                work = results.get()
+                if work is done:
+                    remaining -= 1
+                    continue
+                if isinstance(work, Exception):
+                    raise work  # a failed query ends the harvest straight away
+                key = work["doi"].lower()  # DOIs are case-insensitive
+                if key not in seen:
+                    seen.add(key)
+                    yield work
+        finally:
+            # Also reached when the consumer stops early and the generator closes
+            cancel.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def write_dois(works, path: Path, metadata_path: Path | None = None) -> int:
+    """Write DOIs one per line, the format read by `blob_utils.downloader`.
+
+    Args:
+        works: `work_metadata` dicts
+        path: DOI list
+        metadata_path: Optional JSON-lines file of DOI, year and journal,
+            read at ingestion into the table's scalar columns (rag.articles)
+
+    Returns:
+        int: Number of DOIs written
+    """
+    count = 0
+    with open(path, "w") as fl, open(metadata_path or os.devnull, "w") as meta:
+        for work in works:
+            fl.write(f"{work['doi']}\n")
+            meta.write(json.dumps(work) + "\n")
+            count += 1
+    return count
+
+
+def wiley_dois_2025_by_keyword(query, limit=5):
+    """
+    Fetch up to `limit` DOIs from Wiley-Blackwell (member:311), year 2025,
+    filtered by a keyword query. Keeps it to a single, small request.
+    """
+    return list(islice(iter_wiley_dois(query, rows=min(limit, 1000)), limit))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest 2025 Wiley DOIs from Crossref.")
+    parser.add_argument("queries", nargs="+")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", type=Path, default=None, help="write DOIs to this file")
+    parser.add_argument(
+        "--metadata",
+        type=Path,
+        default=None,
+        help="write DOI, year and journal as JSON lines (with --out)",
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ResponseCache()
+    works = harvest(args.queries, args.year, args.workers, cache)
+    if args.out:
+        print(f"Wrote {write_dois(works, args.out, args.metadata)} DOIs to {args.out}")
+    else:
+        for work in works:
+            print(work["doi"])
+
+
 if __name__ == "__main__":
-    for doi in wiley_dois_2025_by_keyword("graphene", limit=20):
-        print(doi)
+    main()
@@ -17,21 +17,26 @@ except KeyError:
 # Uses TDM_API_TOKEN from environment
 # tdm = TDMClient()
 # WILEY_TDM_TOKEN = load_dotenv(WILEY_PATH)
-# DOI of article to download
-doi = "doi/10.1002/smll.202505866"
-# DOI of article to download
-url = f"https://api.wiley.com/onlinelibrary/tdm/v1/articles/{doi}"
-headers = {"Wiley-TDM-Client-Token": WILEY_TOKEN}
-response = requests.get(url, headers=headers)
-
-# Download PDF if status code indicates success
-if response.status_code == 200:
-    filename = f"{doi.replace('/', '_')}.pdf"
-    with open(filename, "wb") as file:
-        file.write(response.content)
-    print(f"{filename} downloaded successfully")
-else:
-    print(f"Failed to download PDF. Status code: {response.status_code}")
+
+
+def download_pdf(doi: str = "doi/10.1002/smll.202505866"):
+    # DOI of article to download
+    url = f"https://api.wiley.com/onlinelibrary/tdm/v1/articles/{doi}"
+    headers = {"Wiley-TDM-Client-Token": WILEY_TOKEN}
+    response = requests.get(url, headers=headers)
+
+    # Download PDF if status code indicates success
+    if response.status_code == 200:
+        filename = f"{doi.replace('/', '_')}.pdf"
+        with open(filename, "wb") as file:
+            file.write(response.content)
+        print(f"{filename} downloaded successfully")
+    else:
+        print(f"Failed to download PDF. Status code: {response.status_code}")
+
+
+if __name__ == "__main__":
+    download_pdf()
 
 """TDM Client Example 1 - Single PDF Download
 
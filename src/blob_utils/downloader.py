@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from azure.storage.blob import ContainerClient
+
+from blob_utils.from_blob import (
+    AZURE_CONN_STR,
+    CONTAINER,
+    TDM_DELAY_SEC,
+    WILEY_TDM_TOKEN,
+    doi_to_blob_name,
+)
+
+TDM_URL = os.getenv("WILEY_TDM_URL", "https://api.wiley.com/onlinelibrary/tdm/v1/articles")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    With `rate=0.1` and `capacity=1` this allows exactly one call per ten
+    seconds, measured from the previous call rather than from when it finished.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """Create a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """Records finished DOIs so an interrupted harvest can resume."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: set[str] = set()
+        self.failed: dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.done = set(data.get("done", []))
+            self.failed = data.get("failed", {})
+
+    def mark_done(self, doi: str):
+        with self._lock:
+            self.done.add(doi)
+            self.failed.pop(doi, None)
+            self._save()
+
+    def mark_failed(self, doi: str, reason: str):
+        with self._lock:
+            self.failed[doi] = reason
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"done": sorted(self.done), "failed": self.failed}, indent=2)
+        )
+        os.replace(tmp_path, self.path)
+
+
+class PermanentError(Exception):
+    """Download failed in a way that retrying will not fix."""
+
+
+class WileyBatchDownloader:
+    """Download Wiley TDM PDFs for many DOIs and upload them to Azure.
+
+    Downloads go through one shared rate limiter. Each PDF is handed to a
+    small upload pool that reuses one container client, so the upload
+    overlaps the wait for the next download slot.
+    """
+
+    def __init__(
+        self,
+        container_client: ContainerClient,
+        checkpoint: Checkpoint,
+        limiter: TokenBucket | None = None,
+        token: str | None = WILEY_TDM_TOKEN,
+        base_url: str = TDM_URL,
+        max_retries: int = 5,
+        backoff: float = 2.0,
+        upload_workers: int = 2,
+    ):
+        self.container_client = container_client
+        self.checkpoint = checkpoint
+        self.limiter = limiter or TokenBucket(rate=1 / TDM_DELAY_SEC)
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.upload_workers = upload_workers
+        self.session = requests.Session()
+        self.session.headers.update(
+            {"Wiley-TDM-Client-Token": token or "", "Accept": "application/pdf"}
+        )
+
+    def download(self, doi: str) -> bytes:
+        """Fetch one PDF, retrying transient failures with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                r = self.session.get(f"{self.base_url}/{doi}", timeout=120)
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+                delay = None
+            else:
+                if r.status_code == 200:
+                    return r.content
+                if r.status_code not in RETRY_STATUSES:
+                    raise PermanentError(f"HTTP {r.status_code}")
+                error = f"HTTP {r.status_code}"
+                retry_after = r.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else None
+            if attempt == self.max_retries:
+                break
+            time.sleep(delay or self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+        raise PermanentError(f"gave up after {self.max_retries + 1} attempts: {error}")
+
+    def upload(self, doi: str, content: bytes):
+        self.container_client.upload_blob(
+            name=doi_to_blob_name(doi),
+            data=content,
+            overwrite=True,
+            content_type="application/pdf",
+            metadata={"doi": doi},
+        )
+        self.checkpoint.mark_done(doi)
+        print(f"✅ Uploaded {doi}")
+
+    def run(self, dois) -> Checkpoint:
+        """Harvest all DOIs that are not yet in the checkpoint.
+
+        Args:
+            dois: DOIs to download
+
+        Returns:
+            Checkpoint: Final state, with any permanent failures
+        """
+        todo = [doi for doi in dict.fromkeys(dois) if doi not in self.checkpoint.done]
+        print(f"{len(todo)} DOIs to download, {len(self.checkpoint.done)} already done")
+
+        # Bound the number of PDFs held in memory while waiting to be uploaded
+        slots = threading.Semaphore(2 * self.upload_workers)
+
+        def upload(doi: str, content: bytes):
+            try:
+                self.upload(doi, content)
+            except Exception as e:
+                self.checkpoint.mark_failed(doi, f"upload: {type(e).__name__}: {e}")
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as pool:
+            for doi in todo:
+                try:
+                    content = self.download(doi)
+                except PermanentError as e:
+                    print(f"❌ {doi}: {e}")
+                    self.checkpoint.mark_failed(doi, str(e))
+                    continue
+                slots.acquire()
+                pool.submit(upload, doi, content)
+        return self.checkpoint
+
+
+def read_dois(path: Path) -> list[str]:
+    """Read one DOI per line, ignoring blank lines and comments."""
+    lines = Path(path).read_text().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Download Wiley TDM PDFs for a DOI list into Azure Blob Storage."
+    )
+    parser.add_argument("dois", type=Path, help="file with one DOI per line")
+    parser.add_argument("--checkpoint", type=Path, default=Path("wiley_checkpoint.json"))
+    parser.add_argument("--container", default=CONTAINER)
+    parser.add_argument(
+        "--connection-string",
+        default=AZURE_CONN_STR,
+        help="Azure Storage connection string (e.g. Azurite's for local runs)",
+    )
+    parser.add_argument("--base-url", default=TDM_URL, help="Wiley TDM articles endpoint")
+    parser.add_argument("--delay", type=float, default=TDM_DELAY_SEC)
+    parser.add_argument("--upload-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    container_client = ContainerClient.from_connection_string(
+        args.connection_string, container_name=args.container
+    )
+    downloader = WileyBatchDownloader(
+        container_client,
+        Checkpoint(args.checkpoint),
+        limiter=TokenBucket(rate=1 / args.delay),
+        base_url=args.base_url,
+        upload_workers=args.upload_workers,
+    )
+    checkpoint = downloader.run(read_dois(args.dois))
+    print(f"Done: {len(checkpoint.done)} uploaded, {len(checkpoint.failed)} failed")
+
+
+if __name__ == "__main__":
+    main()
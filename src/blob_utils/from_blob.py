@@ -18,6 +18,7 @@ load_dotenv()
 
 def doi_to_blob_name(doi: str) -> str:
     # filesystem-safe name, e.g. 10.1002/advs.202508912 -> 10.1002_advs.202508912.pdf
+    # (rag.articles.doi_from_filename reverses this for the table's doi column)
     return re.sub(r"[^A-Za-z0-9._-]+", "_", doi) + ".pdf"
 
 
@@ -37,11 +38,14 @@ def save_wiley_pdf_to_blob(doi: str, container: str = CONTAINER):
     # Stream download from Wiley and stream-upload to Azure (no disk)
     with requests.get(url, headers=headers, stream=True, timeout=120) as r:
         r.raise_for_status()
-        blob_client.upload_blob(r.raw, overwrite=True, content_type="application/pdf")
+        blob_client.upload_blob(
+            r.raw, overwrite=True, content_type="application/pdf", metadata={"doi": doi}
+        )
 
     print(f"✅ Uploaded {doi} -> {blob_client.url}")
     time.sleep(TDM_DELAY_SEC)  # be nice to Wiley’s rate limits
 
 
-# Example:
-save_wiley_pdf_to_blob("10.1002/smll.202505866")
+# Example (for many DOIs use blob_utils.downloader):
+if __name__ == "__main__":
+    save_wiley_pdf_to_blob("10.1002/smll.202505866")
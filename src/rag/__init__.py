@@ -0,0 +1,32 @@
+from importlib import import_module
+
+# Public API, imported on first attribute access so `import rag` stays cheap
+_EXPORTS = {
+    "SearchOptions": "rag.retrieval",
+    "RetrievedChunk": "rag.retrieval",
+    "retrieve": "rag.retrieval",
+    "retrieve_many": "rag.retrieval",
+    "search": "rag.retrieval",
+    "format_context": "rag.prompting",
+    "ingest": "rag.ingestion",
+    "sync": "rag.ingestion",
+    "open_table": "rag.ingestion",
+    "get_openai_client": "rag.resources",
+    "get_table": "rag.resources",
+    "get_converter": "rag.resources",
+    "get_chunker": "rag.resources",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'rag' has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
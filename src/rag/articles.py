@@ -0,0 +1,125 @@
+import argparse
+import json
+import re
+from collections.abc import Iterable
+from pathlib import Path
+
+from rag.config import ARTICLE_METADATA_PATH
+from rag.schema import sql_quote
+
+# SQL types of the article columns, for adding them to an existing table
+ARTICLE_COLUMN_TYPES = {"doi": "STRING", "year": "BIGINT", "journal": "STRING"}
+# Names written by blob_utils.from_blob.doi_to_blob_name: "10.1002_advs.202508912.pdf"
+_DOI_NAME = re.compile(r"^(10\.\d{4,9})_(.+)\.pdf$", re.IGNORECASE)
+
+
+def doi_from_filename(filename: str | None) -> str | None:
+    """DOI of a PDF named after it, or None for other names.
+
+    The first "_" stands for the DOI's "/"; other characters replaced by
+    `doi_to_blob_name` are rare in Wiley DOIs and are not recovered.
+    """
+    match = _DOI_NAME.match(Path(filename).name) if filename else None
+    return f"{match[1]}/{match[2]}" if match else None
+
+
+class ArticleCatalog:
+    """Year and journal of harvested articles, keyed by lowercase DOI.
+
+    Filled from the JSON lines written by `ETL.crossref --metadata`. Without
+    an entry only the DOI, taken from the filename, is known.
+    """
+
+    def __init__(self, works: Iterable[dict] = ()):
+        self._works = {work["doi"].lower(): work for work in works}
+
+    @classmethod
+    def load(cls, path: Path = ARTICLE_METADATA_PATH) -> "ArticleCatalog":
+        """Read a metadata file; a missing file gives an empty catalog."""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path) as fl:
+            return cls(json.loads(line) for line in fl if line.strip())
+
+    def __len__(self) -> int:
+        return len(self._works)
+
+    def lookup(self, filename: str | None) -> dict:
+        """Article columns for the chunks of one PDF.
+
+        Returns:
+            dict: "doi", "year" and "journal", each possibly None
+        """
+        doi = doi_from_filename(filename)
+        work = self._works.get(doi.lower(), {}) if doi else {}
+        return {"doi": doi, "year": work.get("year"), "journal": work.get("journal")}
+
+    def annotate(self, records: list[dict], filename: str | None) -> list[dict]:
+        """Set the article columns on the rows of one PDF in place."""
+        columns = self.lookup(filename)
+        for record in records:
+            record.update(columns)
+        return records
+
+
+# --------------------------------------------------------------
+# Existing tables
+# --------------------------------------------------------------
+
+
+def add_article_columns(table) -> list[str]:
+    """Add the article columns, as nulls, to a table created without them.
+
+    Returns:
+        list[str]: Columns that were added
+    """
+    missing = [name for name in ARTICLE_COLUMN_TYPES if name not in table.schema.names]
+    if missing:
+        table.add_columns(
+            {name: f"CAST(NULL AS {ARTICLE_COLUMN_TYPES[name]})" for name in missing}
+        )
+    return missing
+
+
+def backfill_article_columns(table, catalog: ArticleCatalog) -> int:
+    """Fill the article columns of rows ingested before they existed.
+
+    Runs one update per PDF with anything to set, so it is meant as a
+    one-off after adding the columns or harvesting new metadata.
+
+    Returns:
+        int: Number of PDFs updated
+    """
+    rows = table.search().select(["metadata"]).limit(None).to_arrow()
+    filenames = set(rows["metadata"].combine_chunks().field("filename").to_pylist())
+    updated = 0
+    for filename in sorted(name for name in filenames if name):
+        values = {k: v for k, v in catalog.lookup(filename).items() if v is not None}
+        if values:
+            table.update(where=f"metadata.filename = {sql_quote(filename)}", values=values)
+            updated += 1
+    return updated
+
+
+def main():
+    from rag.indexing import build_scalar_indexes
+    from rag.ingestion import open_table
+
+    parser = argparse.ArgumentParser(
+        description="Fill the doi, year and journal columns and index them."
+    )
+    parser.add_argument("--metadata", type=Path, default=ARTICLE_METADATA_PATH)
+    parser.add_argument("--no-index", action="store_true")
+    args = parser.parse_args()
+
+    table = open_table()
+    catalog = ArticleCatalog.load(args.metadata)
+    print(f"{len(catalog)} articles in {args.metadata}")
+    print(f"Updated {backfill_article_columns(table, catalog)} PDFs.")
+    if not args.no_index:
+        print(f"Built scalar indexes on: {', '.join(build_scalar_indexes(table))}")
+
+
+if __name__ == "__main__":
+    main()
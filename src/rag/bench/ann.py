@@ -0,0 +1,120 @@
+import argparse
+import itertools
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from rag.bench.common import exact_top_k, recall_at_k, synthetic_vectors, write_json
+from rag.indexing import INDEX_TYPES, IndexParams, apply_search_params, build_vector_index
+from rag.timing import latency_summary, timed
+
+
+def make_table(db, vectors: np.ndarray):
+    data = pa.table(
+        {
+            "id": pa.array(np.arange(len(vectors))),
+            "vector": pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.ravel()), vectors.shape[1]
+            ),
+        }
+    )
+    return db.create_table("bench", data=data, mode="overwrite")
+
+
+def run_queries(table, queries: np.ndarray, k: int, params: IndexParams | None):
+    """Run each query once and return (ids per query, latencies)."""
+    found, latencies = [], []
+    for q in queries:
+        query = table.search(q, vector_column_name="vector").distance_type("cosine")
+        if params is None:
+            query = query.bypass_vector_index()
+        else:
+            query = apply_search_params(query, params)
+        with timed(latencies):
+            rows = query.select(["id"]).limit(k).to_arrow()
+        found.append(rows["id"].to_pylist())
+    return found, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall/latency benchmark of ANN index settings on a synthetic corpus."
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-types", nargs="+", choices=INDEX_TYPES, default=["IVF_PQ"])
+    parser.add_argument("--num-partitions", nargs="+", type=int, default=[None])
+    parser.add_argument("--nprobes", nargs="+", type=int, default=[10, 20, 50])
+    parser.add_argument("--refine-factors", nargs="+", type=int, default=[0, 5])
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    corpus = synthetic_vectors(args.rows, args.dim)
+    # Queries are perturbed corpus points, so true neighbours exist
+    rng = np.random.default_rng(1)
+    picks = rng.choice(args.rows, args.queries, replace=False)
+    queries = corpus[picks] + 0.1 * rng.standard_normal(
+        (args.queries, args.dim)
+    ).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        table = make_table(lancedb.connect(tmp), corpus)
+
+        found, latencies = run_queries(table, queries, args.k, None)
+        results.append(
+            {"index": "exact", "recall": recall_at_k(found, truth), **latency_summary(latencies)}
+        )
+        print(f"exact: {results[-1]}")
+
+        for index_type, num_partitions in itertools.product(
+            args.index_types, args.num_partitions
+        ):
+            start = time.perf_counter()
+            built = build_vector_index(
+                table, IndexParams(index_type=index_type, num_partitions=num_partitions)
+            )
+            build_seconds = time.perf_counter() - start
+            for nprobes, refine in itertools.product(args.nprobes, args.refine_factors):
+                params = IndexParams(
+                    index_type=index_type,
+                    num_partitions=built.num_partitions,
+                    num_sub_vectors=built.num_sub_vectors,
+                    nprobes=nprobes,
+                    refine_factor=refine or None,
+                )
+                found, latencies = run_queries(table, queries, args.k, params)
+                results.append(
+                    {
+                        "index": index_type,
+                        "num_partitions": built.num_partitions,
+                        "num_sub_vectors": built.num_sub_vectors,
+                        "nprobes": nprobes,
+                        "refine_factor": refine or None,
+                        "build_s": build_seconds,
+                        "recall": recall_at_k(found, truth),
+                        **latency_summary(latencies),
+                    }
+                )
+                r = results[-1]
+                print(
+                    f"{index_type} partitions={built.num_partitions} nprobes={nprobes} "
+                    f"refine={refine}: recall@{args.k}={r['recall']:.3f} "
+                    f"p50={r['p50_ms']:.2f}ms p99={r['p99_ms']:.2f}ms"
+                )
+
+    write_json(
+        {"rows": args.rows, "dim": args.dim, "k": args.k, "results": results}, args.json
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import time
+from pathlib import Path
+
+from rag.bench.common import write_json
+from rag.config import PDF_DIR, TOKENIZER_NAME
+from rag.ingestion import iter_documents
+
+
+def sweep(
+    pdf_paths: list[Path],
+    max_tokens: list[int],
+    tokenizer_name: str = TOKENIZER_NAME,
+    workers: int | None = None,
+    cache_only: bool = True,
+) -> list[dict]:
+    """Chunk a corpus once per chunk size, reading documents from the conversion cache.
+
+    Args:
+        pdf_paths: PDFs to chunk
+        max_tokens: Chunk sizes to try
+        tokenizer_name: Tokenizer used by HybridChunker
+        workers: Number of worker processes
+        cache_only: Fail on PDFs without a cached conversion instead of converting
+
+    Returns:
+        list[dict]: Chunk counts and timings per chunk size
+    """
+    results = []
+    for size in max_tokens:
+        start = time.perf_counter()
+        documents = list(
+            iter_documents(
+                pdf_paths,
+                workers=workers,
+                tokenizer_name=tokenizer_name,
+                max_tokens=size,
+                cache_only=cache_only,
+            )
+        )
+        wall = time.perf_counter() - start
+        ok = [doc for doc in documents if not doc.error]
+        num_chunks = sum(doc.num_chunks for doc in ok)
+        results.append(
+            {
+                "max_tokens": size,
+                "documents": len(ok),
+                "failed": len(documents) - len(ok),
+                "cached": sum(doc.cached for doc in ok),
+                "chunks": num_chunks,
+                "chunks_per_document": num_chunks / len(ok) if ok else 0.0,
+                "wall_s": wall,
+                "convert_cpu_s": sum(doc.convert_seconds for doc in ok),
+                "chunk_cpu_s": sum(doc.chunk_seconds for doc in ok),
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-chunk a corpus at several chunk sizes from cached conversions."
+    )
+    parser.add_argument("paths", nargs="*", type=Path, help="PDFs or directories")
+    parser.add_argument("--max-tokens", nargs="+", type=int, default=[512, 1000, 2000, 4000])
+    parser.add_argument("--tokenizer", default=TOKENIZER_NAME)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--convert-missing",
+        action="store_true",
+        help="convert (and cache) PDFs that are not cached yet",
+    )
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    pdf_paths = []
+    for path in args.paths or [PDF_DIR]:
+        pdf_paths.extend(sorted(path.glob("*.pdf")) if path.is_dir() else [path])
+
+    results = sweep(
+        pdf_paths,
+        args.max_tokens,
+        tokenizer_name=args.tokenizer,
+        workers=args.workers,
+        cache_only=not args.convert_missing,
+    )
+    for row in results:
+        print(
+            f"max_tokens={row['max_tokens']}: {row['chunks']} chunks from "
+            f"{row['documents']} documents ({row['failed']} failed) "
+            f"in {row['wall_s']:.1f}s"
+        )
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+def synthetic_vectors(
+    n: int, dim: int, num_clusters: int = 64, seed: int = 0
+) -> np.ndarray:
+    """Unit vectors drawn around random centers, a rough stand-in for text embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, num_clusters, n)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Row indices of the k nearest corpus vectors by cosine similarity."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(found: list[list[int]], truth: np.ndarray) -> float:
+    """Mean fraction of the true top-k that was retrieved."""
+    hits = [len(set(f) & set(t)) / len(t) for f, t in zip(found, truth.tolist())]
+    return float(np.mean(hits))
+
+
+def write_json(results, path: Path | None):
+    """Write results to `path`, or print them when no path is given."""
+    text = json.dumps(results, indent=2)
+    if path is None:
+        print(text)
+    else:
+        Path(path).write_text(text)
+        print(f"Wrote {path}")
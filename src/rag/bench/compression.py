@@ -0,0 +1,163 @@
+import argparse
+import itertools
+import tempfile
+from pathlib import Path
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from rag.bench.common import exact_top_k, recall_at_k, synthetic_vectors, write_json
+from rag.compression import SHORT_VECTOR_DTYPES, truncate_vectors, two_stage_search
+from rag.indexing import (
+    SHORT_VECTOR_COLUMN,
+    VECTOR_COLUMN,
+    IndexParams,
+    build_vector_index,
+)
+from rag.timing import latency_summary, timed
+
+
+def matryoshka_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Synthetic vectors whose leading components carry most of the signal.
+
+    Plain Gaussian vectors spread information evenly over all dimensions, which
+    would make truncation look far worse than on text-embedding-3 vectors.
+    Scaling component i by 1/sqrt(1 + i/32) approximates the decaying variance
+    of Matryoshka-trained embeddings.
+    """
+    vectors = synthetic_vectors(n, dim, seed=seed)
+    vectors *= 1.0 / np.sqrt(1.0 + np.arange(dim, dtype=np.float32) / 32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _vector_array(vectors: np.ndarray) -> pa.FixedSizeListArray:
+    values = pa.array(vectors.ravel(), pa.from_numpy_dtype(vectors.dtype))
+    return pa.FixedSizeListArray.from_arrays(values, vectors.shape[1])
+
+
+def _column_bytes(table, column: str) -> int:
+    return table.to_lance().to_table(columns=[column])[column].nbytes
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Size, latency and recall of truncated/quantized vectors with rescoring."
+    )
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--short-dims", nargs="+", type=int, default=[256, 1024])
+    parser.add_argument("--dtypes", nargs="+", choices=SHORT_VECTOR_DTYPES, default=["float16"])
+    parser.add_argument(
+        "--index-types",
+        nargs="+",
+        default=["none", "IVF_HNSW_SQ"],
+        help="first-stage index; IVF_HNSW_SQ keeps int8 codes",
+    )
+    parser.add_argument("--rescore-factors", nargs="+", type=int, default=[1, 5])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    corpus = matryoshka_vectors(args.rows, args.dim)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(args.rows, args.queries, replace=False)
+    queries = corpus[picks] + 0.05 * rng.standard_normal(
+        (args.queries, args.dim)
+    ).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+
+        full = db.create_table(
+            "full",
+            data=pa.table({"id": np.arange(args.rows), VECTOR_COLUMN: _vector_array(corpus)}),
+            mode="overwrite",
+        )
+        found, latencies = [], []
+        for q in queries:
+            with timed(latencies):
+                rows = (
+                    full.search(q, vector_column_name=VECTOR_COLUMN)
+                    .distance_type("cosine")
+                    .select(["id"])
+                    .limit(args.k)
+                    .to_arrow()
+                )
+            found.append(rows["id"].to_pylist())
+        results.append(
+            {
+                "variant": f"full {args.dim} x float32, exact",
+                "search_bytes": _column_bytes(full, VECTOR_COLUMN),
+                "recall": recall_at_k(found, truth),
+                **latency_summary(latencies),
+            }
+        )
+        print(results[-1])
+        db.drop_table("full")
+
+        for short_dim, dtype in itertools.product(args.short_dims, args.dtypes):
+            name = f"short_{short_dim}_{dtype}"
+            table = db.create_table(
+                name,
+                data=pa.table(
+                    {
+                        "id": np.arange(args.rows),
+                        VECTOR_COLUMN: _vector_array(corpus),
+                        SHORT_VECTOR_COLUMN: _vector_array(
+                            truncate_vectors(corpus, short_dim, dtype)
+                        ),
+                    }
+                ),
+                mode="overwrite",
+            )
+            # Unindexed runs first; once built, the index serves every search
+            for index_type in sorted(args.index_types, key=lambda t: t != "none"):
+                params = None
+                if index_type != "none":
+                    params = build_vector_index(
+                        table, IndexParams(index_type=index_type), SHORT_VECTOR_COLUMN
+                    )
+                index_dir = Path(tmp) / f"{name}.lance" / "_indices"
+                index_bytes = _dir_bytes(index_dir) if index_dir.exists() else 0
+                for factor in args.rescore_factors:
+                    found, latencies = [], []
+                    for q in queries:
+                        with timed(latencies):
+                            rows = two_stage_search(
+                                table, q, args.k, ["id"], rescore_factor=factor, params=params
+                            )
+                        found.append(rows["id"].to_pylist())
+                    results.append(
+                        {
+                            "variant": f"{short_dim} x {dtype}, {index_type}",
+                            "rescore_factor": factor,
+                            "search_bytes": _column_bytes(table, SHORT_VECTOR_COLUMN),
+                            "index_bytes": index_bytes,
+                            "recall": recall_at_k(found, truth),
+                            **latency_summary(latencies),
+                        }
+                    )
+                    r = results[-1]
+                    print(
+                        f"{r['variant']} rescore={factor}: recall@{args.k}={r['recall']:.3f} "
+                        f"p50={r['p50_ms']:.2f}ms "
+                        f"first-stage bytes={r['search_bytes'] / 2**20:.1f}MiB"
+                    )
+            db.drop_table(name)
+
+    write_json(
+        {"rows": args.rows, "dim": args.dim, "k": args.k, "results": results}, args.json
+    )
+
+
+if __name__ == "__main__":
+    main()
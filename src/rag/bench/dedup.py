@@ -0,0 +1,98 @@
+import argparse
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from rag.bench.common import write_json
+from rag.bench.synthetic import synthetic_chunks, synthetic_sentences
+from rag.dedup import ChunkDeduplicator
+
+
+def corpus_with_duplicates(
+    count: int, exact: float, near: float, seed: int = 0
+) -> tuple[list[dict], set[str]]:
+    """Synthetic chunks where some repeat boilerplate and some are edited copies.
+
+    Exact duplicates are one of a few license paragraphs, with other casing and
+    spacing; near duplicates are earlier chunks with one word replaced.
+
+    Returns:
+        tuple[list[dict], set[str]]: Rows in corpus order and the ids of the
+        injected duplicates
+    """
+    rng = random.Random(seed)
+    rows = synthetic_chunks(count, seed)
+    boilerplate = [" ".join(synthetic_sentences(rng, 6)) for _ in range(5)]
+    duplicates = set()
+    for i, row in enumerate(rows):
+        draw = rng.random()
+        if draw < exact:
+            text = rng.choice(boilerplate)
+            row["text"] = text.upper() if rng.random() < 0.5 else f"  {text}\n"
+        elif draw < exact + near and i > 0:
+            words = rows[rng.randrange(i)]["text"].split()
+            words[rng.randrange(len(words))] = "perturbed"
+            row["text"] = " ".join(words)
+        else:
+            continue
+        duplicates.add(row["id"])
+    # The first copy of each boilerplate paragraph is canonical, not a duplicate
+    seen = set()
+    for row in rows:
+        key = row["text"].strip().lower()
+        if row["id"] in duplicates and key in boilerplate and key not in seen:
+            seen.add(key)
+            duplicates.discard(row["id"])
+    return rows, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput, accuracy and memory of MinHash LSH chunk dedup."
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--exact", type=float, default=0.1)
+    parser.add_argument("--near", type=float, default=0.1)
+    parser.add_argument("--batch", type=int, default=500, help="rows per split call")
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    rows, expected = corpus_with_duplicates(args.rows, args.exact, args.near)
+    with tempfile.TemporaryDirectory() as tmp:
+        dedup = ChunkDeduplicator(Path(tmp) / "dedup.sqlite")
+        found: set[str] = set()
+        # High-water mark of the process; growth past it is the index's doing
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        for i in range(0, len(rows), args.batch):
+            _, references = dedup.split(rows[i : i + args.batch])
+            dedup.commit()
+            found.update(reference["id"] for reference in references)
+        seconds = time.perf_counter() - start
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        index_bytes = (Path(tmp) / "dedup.sqlite").stat().st_size
+
+    hits = len(found & expected)
+    result = {
+        "rows": args.rows,
+        "chunks_per_second": args.rows / seconds,
+        "precision": hits / len(found) if found else 1.0,
+        "recall": hits / len(expected) if expected else 1.0,
+        "rss_growth_mb": rss_growth / 2**10,  # ru_maxrss is in KiB on Linux
+        "index_mb": index_bytes / 2**20,
+        **vars(dedup.stats),
+    }
+    print(dedup.stats.summary())
+    print(
+        f"{result['chunks_per_second']:.0f} chunks/s, "
+        f"precision {result['precision']:.3f}, recall {result['recall']:.3f}, "
+        f"peak memory +{result['rss_growth_mb']:.1f} MB, "
+        f"index {result['index_mb']:.1f} MB on disk"
+    )
+    write_json([result], args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from rag.bench.common import synthetic_vectors, write_json
+from rag.diversity import maximal_marginal_relevance
+from rag.timing import latency_summary, timed
+
+
+def candidates_with_duplicates(
+    n: int, dim: int, duplicate_fraction: float, seed: int = 0
+) -> np.ndarray:
+    """Candidate vectors where a fraction are slightly perturbed copies of others,
+    like a preprint and its published version."""
+    rng = np.random.default_rng(seed)
+    vectors = synthetic_vectors(n, dim, num_clusters=8, seed=seed)
+    num_duplicates = int(n * duplicate_fraction)
+    sources = rng.integers(0, n - num_duplicates, num_duplicates)
+    noise = 0.01 * rng.standard_normal((num_duplicates, dim)).astype(np.float32)
+    vectors[n - num_duplicates :] = vectors[sources] + noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency of MMR re-ranking and near-duplicate suppression."
+    )
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", nargs="+", type=int, default=[20, 40, 100])
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--duplicates", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = []
+    for n in args.candidates:
+        vectors = candidates_with_duplicates(n, args.dim, args.duplicates)
+        query = vectors[0] + 0.1 * vectors[1]
+        latencies = []
+        for _ in range(args.repeat):
+            with timed(latencies):
+                selected = maximal_marginal_relevance(query, vectors, args.k)
+        pairwise = vectors[selected] @ vectors[selected].T
+        np.fill_diagonal(pairwise, 0.0)
+        row = {
+            "candidates": n,
+            "selected": len(selected),
+            "max_pairwise_similarity": float(pairwise.max()) if len(selected) > 1 else 0.0,
+            "latency": latency_summary(latencies),
+        }
+        results.append(row)
+        print(
+            f"candidates={n}: p50={row['latency']['p50_ms']:.3f}ms, "
+            f"p99={row['latency']['p99_ms']:.3f}ms, "
+            f"max similarity among selected={row['max_pairwise_similarity']:.3f}"
+        )
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from lancedb.embeddings import get_registry
+
+
+def fake_embedding_function(dim: int = 256):
+    """Deterministic offline stand-in for the OpenAI embedding function."""
+    return get_registry().get("fake").create(dim=dim)
+
+
+@dataclass
+class _Delta:
+    content: str | None = None
+    role: str | None = None
+
+
+@dataclass
+class _Choice:
+    delta: _Delta
+    index: int = 0
+    finish_reason: str | None = None
+
+
+@dataclass
+class _Chunk:
+    choices: list[_Choice]
+    usage: object = None
+    object: str = "chat.completion.chunk"
+
+
+@dataclass
+class FakeChatCompletions:
+    """Mimics `client.chat.completions` with a fixed latency profile.
+
+    The answer is derived from a hash of the messages, so it is the same for
+    the same prompt. Streaming yields `answer_tokens` word tokens, the first
+    after `ttft` seconds and each later one after `token_delay` seconds.
+    """
+
+    ttft: float = 0.2
+    token_delay: float = 0.01
+    answer_tokens: int = 50
+    calls: list = field(default_factory=list)
+
+    def _answer(self, messages) -> list[str]:
+        digest = hashlib.sha256(repr(messages).encode()).hexdigest()
+        return [f"{digest[i % 64]}{i} " for i in range(self.answer_tokens)]
+
+    def _stream(self, tokens):
+        time.sleep(self.ttft)
+        yield _Chunk([_Choice(_Delta(role="assistant", content=""))])
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            yield _Chunk([_Choice(_Delta(content=token))])
+        yield _Chunk([_Choice(_Delta(), finish_reason="stop")])
+
+    def create(self, model: str, messages: list[dict], stream: bool = False, **kwargs):
+        self.calls.append({"model": model, "messages": messages, **kwargs})
+        tokens = self._answer(messages)
+        if stream:
+            return self._stream(tokens)
+        time.sleep(self.ttft + self.token_delay * (len(tokens) - 1))
+        message = SimpleNamespace(role="assistant", content="".join(tokens))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, index=0)])
+
+
+class FakeChatClient:
+    """Drop-in for `OpenAI()` where only chat completions are used."""
+
+    def __init__(self, ttft: float = 0.2, token_delay: float = 0.01, answer_tokens: int = 50):
+        self.chat = SimpleNamespace(
+            completions=FakeChatCompletions(ttft, token_delay, answer_tokens)
+        )
+
+
+class AsyncFakeChatCompletions(FakeChatCompletions):
+    """`AsyncOpenAI().chat.completions` counterpart; waits without blocking the loop."""
+
+    async def _astream(self, tokens):
+        await asyncio.sleep(self.ttft)
+        yield _Chunk([_Choice(_Delta(role="assistant", content=""))])
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield _Chunk([_Choice(_Delta(content=token))])
+        yield _Chunk([_Choice(_Delta(), finish_reason="stop")])
+
+    async def create(
+        self, model: str, messages: list[dict], stream: bool = False, **kwargs
+    ):
+        self.calls.append({"model": model, "messages": messages, **kwargs})
+        tokens = self._answer(messages)
+        if stream:
+            return self._astream(tokens)
+        await asyncio.sleep(self.ttft + self.token_delay * (len(tokens) - 1))
+        message = SimpleNamespace(role="assistant", content="".join(tokens))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, index=0)])
+
+
+class AsyncFakeChatClient:
+    """Drop-in for `AsyncOpenAI()` where only chat completions are used."""
+
+    def __init__(self, ttft: float = 0.2, token_delay: float = 0.01, answer_tokens: int = 50):
+        self.chat = SimpleNamespace(
+            completions=AsyncFakeChatCompletions(ttft, token_delay, answer_tokens)
+        )
@@ -0,0 +1,110 @@
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+import lancedb
+
+from rag.bench.common import write_json
+from rag.bench.fakes import fake_embedding_function
+from rag.bench.synthetic import synthetic_chunks, synthetic_sentences
+from rag.indexing import (
+    VECTOR_COLUMN,
+    IndexParams,
+    build_scalar_indexes,
+    build_vector_index,
+)
+from rag.retrieval import scope_filter
+from rag.schema import build_chunks_schema
+from rag.timing import latency_summary, timed
+
+JOURNALS = [f"Journal {chr(ord('A') + i)}" for i in range(20)]
+YEARS = list(range(2010, 2026))
+
+
+def with_articles(rows: list[dict], seed: int = 0) -> list[dict]:
+    """Give each synthetic article a DOI, year and journal."""
+    rng = random.Random(seed)
+    articles: dict[str, dict] = {}
+    for row in rows:
+        filename = row["metadata"]["filename"]
+        if filename not in articles:
+            articles[filename] = {
+                "doi": f"10.1002/synthetic.{len(articles):06d}",
+                "year": rng.choice(YEARS),
+                "journal": rng.choice(JOURNALS),
+            }
+        row.update(articles[filename])
+    return rows
+
+
+def scoped_search(table, query, k: int, where: str, prefilter: bool):
+    return (
+        table.search(query, query_type="vector", vector_column_name=VECTOR_COLUMN)
+        .where(where, prefilter=prefilter)
+        .select(["id", "doi"])
+        .limit(k)
+        .to_arrow()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre- vs post-filtered vector search scoped to an article, journal or year."
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--no-scalar-index", action="store_true")
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    func = fake_embedding_function()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        table = db.create_table("filtered", schema=build_chunks_schema(func), mode="overwrite")
+        rows = with_articles(synthetic_chunks(args.rows))
+        for i in range(0, len(rows), 5000):
+            table.add(rows[i : i + 5000])
+        build_vector_index(table, IndexParams())
+        if not args.no_scalar_index:
+            build_scalar_indexes(table)
+
+        scopes = {
+            "article": lambda: scope_filter(doi=rng.choice(rows)["doi"]),
+            "journal": lambda: scope_filter(journal=rng.choice(JOURNALS)),
+            "year": lambda: scope_filter(year_from=(year := rng.choice(YEARS)), year_to=year),
+        }
+        queries = [
+            func.compute_query_embeddings(synthetic_sentences(rng, 1)[0])[0]
+            for _ in range(args.queries)
+        ]
+        results = []
+        for scope, make_filter in scopes.items():
+            filters = [make_filter() for _ in queries]
+            for prefilter in (True, False):
+                latencies, returned = [], 0
+                for query, where in zip(queries, filters):
+                    with timed(latencies):
+                        found = scoped_search(table, query, args.k, where, prefilter)
+                    returned += found.num_rows
+                row = {
+                    "scope": scope,
+                    "prefilter": prefilter,
+                    # Post-filtering drops the matches outside the scope from
+                    # the top k, so narrow scopes come back (nearly) empty
+                    "results_per_query": returned / len(queries),
+                    "latency": latency_summary(latencies),
+                }
+                results.append(row)
+                print(
+                    f"{scope:<8} {'pre' if prefilter else 'post'}-filter: "
+                    f"{row['results_per_query']:.1f}/{args.k} results, "
+                    f"p50={row['latency']['p50_ms']:.2f}ms p99={row['latency']['p99_ms']:.2f}ms"
+                )
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
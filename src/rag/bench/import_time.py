@@ -0,0 +1,61 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[2]
+
+# Modules that must only be imported when they are actually used
+HEAVY_MODULES = ("lancedb", "docling", "openai", "torch", "transformers", "azure", "streamlit")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str = "rag", repeat: int = 5) -> dict:
+    """Import `module` in fresh interpreters and report the median time."""
+    samples, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(out)
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+    return {"module": module, "median_s": statistics.median(samples), "heavy": heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if `import rag` exceeds a budget.")
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--module", default="rag")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    ms = result["median_s"] * 1000
+    print(f"import {args.module}: {ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if ms > args.budget_ms:
+        print("FAIL: over the import-time budget")
+        failed = True
+    if result["heavy"]:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(result['heavy'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
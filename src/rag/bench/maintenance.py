@@ -0,0 +1,55 @@
+import argparse
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+import lancedb
+
+from rag.bench.common import write_json
+from rag.bench.fakes import fake_embedding_function
+from rag.bench.synthetic import synthetic_chunks
+from rag.indexing import IndexParams, build_text_index, build_vector_index
+from rag.maintenance import MaintenancePolicy, maintain
+from rag.schema import build_chunks_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search latency of an append-heavy table, before and after "
+        "maintenance."
+    )
+    parser.add_argument(
+        "--rows", type=int, default=50_000, help="rows indexed up front"
+    )
+    parser.add_argument(
+        "--appends", type=int, default=100, help="small batches appended afterwards"
+    )
+    parser.add_argument("--append-rows", type=int, default=100)
+    parser.add_argument("--probe", type=int, default=50)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    rows = synthetic_chunks(args.rows + args.appends * args.append_rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(tmp)
+        table = db.create_table(
+            "maintenance",
+            schema=build_chunks_schema(fake_embedding_function()),
+            mode="overwrite",
+        )
+        for i in range(0, args.rows, 5000):
+            table.add(rows[i : min(i + 5000, args.rows)])
+        build_vector_index(table, IndexParams())
+        build_text_index(table)
+        # What incremental ingestion does: one small write per document
+        for i in range(args.rows, len(rows), args.append_rows):
+            table.add(rows[i : i + args.append_rows])
+
+        # Versions are seconds old here, so prune without a grace period
+        report = maintain(table, MaintenancePolicy(grace_hours=0), probe=args.probe)
+        print(report.summary())
+    write_json([asdict(report)], args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from rag.bench.common import write_json
+from rag.prompting import format_context
+from rag.retrieval import to_records
+from rag.timing import latency_summary, timed
+
+
+def synthetic_results(k: int, dim: int = 3072, seed: int = 0) -> pa.Table:
+    """Search results shaped like the docling table, blank lines included."""
+    rng = np.random.default_rng(seed)
+    text = ("Paragraph one of the chunk.\n\nParagraph two, after a blank line. " * 40)
+    vectors = rng.standard_normal((k, dim)).astype(np.float32)
+    return pa.table(
+        {
+            "id": [f"chunk-{i}" for i in range(k)],
+            "text": [text] * k,
+            "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), dim),
+            "metadata": [
+                {"filename": f"paper-{i}.pdf", "page_numbers": [i, i + 1], "title": "Results"}
+                for i in range(k)
+            ],
+            "_distance": rng.random(k).astype(np.float32),
+        }
+    )
+
+
+def legacy_path(results: pa.Table):
+    """The former pandas round trip: iterrows, format, then re-split for the UI."""
+    df = results.to_pandas()
+    contexts = []
+    for _, row in df.iterrows():
+        filename = row["metadata"]["filename"]
+        page_numbers = row["metadata"]["page_numbers"]
+        title = row["metadata"]["title"]
+        source_parts = []
+        if filename:
+            source_parts.append(filename)
+        if page_numbers is not None and len(page_numbers) > 0:
+            source_parts.append(f"p. {', '.join(str(p) for p in page_numbers)}")
+        source = f"\nSource: {' - '.join(source_parts)}"
+        if title:
+            source += f"\nTitle: {title}"
+        contexts.append(f"{row['text']}{source}")
+    context = "\n\n".join(contexts)
+    shown = []
+    for chunk in context.split("\n\n"):
+        parts = chunk.split("\n")
+        metadata = {
+            line.split(": ")[0]: line.split(": ")[1] for line in parts[1:] if ": " in line
+        }
+        shown.append((parts[0], metadata.get("Source"), metadata.get("Title")))
+    return context, shown
+
+
+def records_path(results: pa.Table):
+    """The Arrow-native path: typed records shared by the prompt and the UI."""
+    chunks = to_records(results)
+    context = format_context(chunks)
+    shown = [(chunk.text, chunk.source, chunk.title) for chunk in chunks]
+    return context, shown
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-query overhead of turning search results into context."
+    )
+    parser.add_argument("--k", nargs="+", type=int, default=[5, 10, 20, 50, 100])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = []
+    for k in args.k:
+        table = synthetic_results(k)
+        row = {"k": k}
+        for name, path in (("legacy", legacy_path), ("records", records_path)):
+            latencies = []
+            for _ in range(args.repeat):
+                with timed(latencies):
+                    path(table)
+            row[name] = latency_summary(latencies)
+        row["speedup"] = row["legacy"]["p50_ms"] / row["records"]["p50_ms"]
+        results.append(row)
+        print(
+            f"k={k}: legacy p50={row['legacy']['p50_ms']:.3f}ms, "
+            f"records p50={row['records']['p50_ms']:.3f}ms ({row['speedup']:.1f}x)"
+        )
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import lancedb
+
+from rag.bench.common import write_json
+from rag.bench.fakes import AsyncFakeChatClient
+from rag.bench.suite import build_query_table
+from rag.bench.synthetic import synthetic_sentences
+from rag.client import iter_sse
+from rag.service import RagApp, RagService
+from rag.timing import latency_summary
+
+
+def _parse_events(buffer: bytearray) -> list[tuple[str, object]]:
+    """Pop complete SSE messages off the front of `buffer`."""
+    end = buffer.rfind(b"\n\n")
+    if end < 0:
+        return []
+    complete = bytes(buffer[: end + 2]).decode()
+    del buffer[: end + 2]
+    return list(iter_sse(complete.split("\n")))
+
+
+async def asgi_chat(app, payload: dict) -> AsyncIterator[tuple[str, object]]:
+    """Send one chat request through an ASGI app in-process, yielding its events."""
+    body = json.dumps(payload).encode()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    scope = {"type": "http", "method": "POST", "path": "/chat", "headers": []}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"Service answered {message['status']}")
+        if message["type"] == "http.response.body":
+            await queue.put(message.get("body", b""))
+
+    async def run():
+        try:
+            await app(scope, receive, send)
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(run())
+    buffer = bytearray()
+    while (chunk := await queue.get()) is not done:
+        buffer += chunk
+        for event in _parse_events(buffer):
+            yield event
+    await task
+
+
+async def http_chat(url: str, payload: dict) -> AsyncIterator[tuple[str, object]]:
+    """Send one chat request to a running service over HTTP/1.1, yielding its events."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    body = json.dumps(payload).encode()
+    writer.write(
+        (
+            f"POST {parts.path.rstrip('/')}/chat HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        + body
+    )
+    await writer.drain()
+    try:
+        status = (await reader.readline()).decode()
+        if " 200 " not in status:
+            raise RuntimeError(f"Service answered {status.strip()}")
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+
+        buffer = bytearray()
+        while True:
+            if chunked:
+                size = int((await reader.readline()).strip() or b"0", 16)
+                if size == 0:
+                    break
+                buffer += await reader.readexactly(size)
+                await reader.readline()
+            else:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+            for event in _parse_events(buffer):
+                yield event
+    finally:
+        writer.close()
+
+
+# --------------------------------------------------------------
+# Load test
+# --------------------------------------------------------------
+
+
+async def run_session(chat, session: int, turns: int, options: dict, samples: dict):
+    """One user: `turns` questions, each sent with the conversation so far."""
+    rng = random.Random(session)
+    messages = []
+    for turn in range(turns):
+        question = f"Session {session} turn {turn}: {synthetic_sentences(rng, 1)[0]}"
+        messages.append({"role": "user", "content": question})
+        payload = {"messages": messages, "num_results": 5, "options": options}
+        start = time.perf_counter()
+        first, answer = None, []
+        async for event, data in chat(payload):
+            if event == "error":
+                samples["errors"] += 1
+                break
+            if event == "token":
+                if first is None:
+                    first = time.perf_counter() - start
+                answer.append(data)
+        samples["total"].append(time.perf_counter() - start)
+        if first is not None:
+            samples["ttft"].append(first)
+        messages.append({"role": "assistant", "content": "".join(answer)})
+
+
+async def load_level(chat, sessions: int, turns: int, options: dict) -> dict:
+    samples = {"ttft": [], "total": [], "errors": 0}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(run_session(chat, s, turns, options, samples) for s in range(sessions))
+    )
+    wall = time.perf_counter() - start
+    return {
+        "sessions": sessions,
+        "turns": len(samples["total"]),
+        "errors": samples["errors"],
+        "turns_per_s": len(samples["total"]) / wall,
+        "ttft": latency_summary(samples["ttft"] or [0.0]),
+        "total": latency_summary(samples["total"] or [0.0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Concurrent chat sessions against rag.service with a mock LLM."
+    )
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="load a running service instead of an in-process app with a mock LLM",
+    )
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--mode", default="hybrid")
+    parser.add_argument("--ttft", type=float, default=0.2, help="mock LLM first-token delay")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument(
+        "--ttft-slo",
+        type=float,
+        default=1.0,
+        help="p99 time to first token (s) a level must meet to count as sustained",
+    )
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+    options = {"mode": args.mode}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+
+            def chat(payload):
+                return http_chat(args.url, payload)
+
+        else:
+            table = build_query_table(lancedb.connect(tmp), args.rows)
+            client = AsyncFakeChatClient(ttft=args.ttft, token_delay=args.token_delay)
+            app = RagApp(RagService(table, client))
+
+            def chat(payload):
+                return asgi_chat(app, payload)
+
+        results = []
+        for sessions in args.sessions:
+            row = asyncio.run(load_level(chat, sessions, args.turns, options))
+            results.append(row)
+            print(
+                f"{sessions} sessions: {row['turns_per_s']:.1f} turns/s, "
+                f"TTFT p50={row['ttft']['p50_ms']:.0f}ms p99={row['ttft']['p99_ms']:.0f}ms, "
+                f"errors={row['errors']}"
+            )
+
+    sustained = max(
+        (
+            row["sessions"]
+            for row in results
+            if not row["errors"] and row["ttft"]["p99_ms"] <= args.ttft_slo * 1000
+        ),
+        default=0,
+    )
+    print(f"Sustained concurrent sessions (p99 TTFT <= {args.ttft_slo}s): {sustained}")
+    write_json({"sustained_sessions": sustained, "results": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
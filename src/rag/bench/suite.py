@@ -0,0 +1,213 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+
+from rag.bench.common import write_json
+from rag.bench.fakes import FakeChatClient, fake_embedding_function
+from rag.bench.synthetic import synthetic_chunks, synthetic_sentences, write_corpus
+from rag.config import MAX_TOKENS, TABLE_NAME, TOKENIZER_NAME
+from rag.indexing import build_text_index
+from rag.prompting import format_context
+from rag.retrieval import SearchOptions, retrieve
+from rag.schema import build_chunks_schema
+from rag.telemetry import delta_text
+from rag.timing import latency_summary, timed
+
+# Higher is better for these metric names; lower is better for everything else
+RATE_SUFFIXES = ("per_s", "qps")
+
+
+def bench_ingestion(tmp: Path, count: int, pages: int, workers: int | None) -> dict:
+    """Documents/sec of the add_two_articles-style pipeline, with fake embeddings."""
+    from rag.ingestion import ingest, open_table
+
+    paths = write_corpus(tmp / "pdfs", count, pages)
+    table = open_table(str(tmp / "ingest-db"), overwrite=True, func=fake_embedding_function())
+    # Synthetic PDFs are deterministic; a fresh conversion cache keeps earlier
+    # runs from turning this into cache reads
+    report = ingest(paths, table, workers=workers, cache_dir=tmp / "conversions")
+    convert = sum(doc.convert_seconds for doc in report.documents)
+    chunk = sum(doc.chunk_seconds for doc in report.documents)
+    return {
+        "documents": len(report.documents),
+        "failed": len(report.failed),
+        "chunks": report.num_chunks,
+        "wall_s": report.wall_seconds,
+        "docs_per_s": len(report.documents) / report.wall_seconds,
+        "chunks_per_s": report.num_chunks / report.wall_seconds,
+        "convert_cpu_s": convert,
+        "chunk_cpu_s": chunk,
+        "write_s": report.write_seconds,
+    }
+
+
+def bench_chunking(tmp: Path, pages: int, repeat: int = 3) -> dict:
+    """Chunks/sec of HybridChunker on one converted synthetic document."""
+    from docling.document_converter import DocumentConverter
+
+    from rag.ingestion import build_chunker
+
+    (path,) = write_corpus(tmp / "chunking", 1, pages, seed=1000)
+    document = DocumentConverter().convert(path).document
+    chunker = build_chunker(TOKENIZER_NAME, MAX_TOKENS)
+    seconds, num_chunks = [], 0
+    for _ in range(repeat):
+        with timed(seconds):
+            num_chunks = sum(1 for _ in chunker.chunk(dl_doc=document))
+    return {"chunks": num_chunks, "chunks_per_s": num_chunks / min(seconds)}
+
+
+def build_query_table(db, size: int):
+    func = fake_embedding_function()
+    table = db.create_table(
+        f"{TABLE_NAME}_{size}", schema=build_chunks_schema(func), mode="overwrite"
+    )
+    rows = synthetic_chunks(size)
+    for i in range(0, size, 5000):
+        table.add(rows[i : i + 5000])
+    build_text_index(table)
+    return table
+
+
+def bench_queries(tmp: Path, sizes: list[int], num_queries: int, k: int) -> dict:
+    """QPS and latency percentiles of get_context (retrieve + format) per corpus size."""
+    import random
+
+    db = lancedb.connect(str(tmp / "query-db"))
+    queries = synthetic_sentences(random.Random(42), num_queries)
+    results = {}
+    for size in sizes:
+        table = build_query_table(db, size)
+        for mode in ("vector", "hybrid"):
+            options = SearchOptions(mode=mode)
+            format_context(retrieve(table, queries[0], k, options))  # warm-up
+            latencies = []
+            for query in queries:
+                with timed(latencies):
+                    format_context(retrieve(table, query, k, options))
+            results[f"{size}_{mode}"] = latency_summary(latencies)
+            print(f"  {size} rows, {mode}: {results[f'{size}_{mode}']}")
+    return results
+
+
+def bench_generation(num_prompts: int, ttft: float, token_delay: float) -> dict:
+    """Time-to-first-token and total time through a fake chat endpoint."""
+    client = FakeChatClient(ttft=ttft, token_delay=token_delay)
+    first, total = [], []
+    for i in range(num_prompts):
+        messages = [{"role": "user", "content": f"question {i}"}]
+        start = time.perf_counter()
+        stream = client.chat.completions.create(model="fake", messages=messages, stream=True)
+        for chunk in stream:
+            if len(first) == i and delta_text(chunk):
+                first.append(time.perf_counter() - start)
+        total.append(time.perf_counter() - start)
+    return {"ttft": latency_summary(first), "total": latency_summary(total)}
+
+
+def _flatten(data, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics that got worse than `baseline` by more than `tolerance`."""
+    regressions = []
+    old = _flatten(baseline["results"])
+    for name, value in _flatten(current["results"]).items():
+        if name not in old or old[name] == 0 or not name.endswith(
+            ("_ms", "_s", *RATE_SUFFIXES)
+        ):
+            continue
+        change = (value - old[name]) / old[name]
+        if name.endswith(RATE_SUFFIXES):
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{name}: {old[name]:.4g} -> {value:.4g} ({change:+.0%})")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for ingestion, chunking, retrieval and generation."
+    )
+    parser.add_argument("--pdfs", type=int, default=8, help="synthetic PDFs to ingest")
+    parser.add_argument("--pages", type=int, default=5, help="pages per synthetic PDF")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--corpus-sizes", nargs="+", type=int, default=[1_000, 10_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ttft", type=float, default=0.05, help="fake LLM first-token delay")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=["ingestion", "chunking", "queries", "generation"],
+        default=["ingestion", "chunking", "queries", "generation"],
+    )
+    parser.add_argument("--json", type=Path, default=None, help="write results here")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if "ingestion" in args.only:
+            print("Ingestion...")
+            results["ingestion"] = bench_ingestion(tmp, args.pdfs, args.pages, args.workers)
+        if "chunking" in args.only:
+            print("Chunking...")
+            results["chunking"] = bench_chunking(tmp, args.pages)
+        if "queries" in args.only:
+            print("Queries...")
+            results["queries"] = bench_queries(tmp, args.corpus_sizes, args.queries, args.k)
+        if "generation" in args.only:
+            print("Generation...")
+            results["generation"] = bench_generation(args.queries, args.ttft, args.token_delay)
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {k: str(v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    write_json(output, args.json)
+
+    if args.compare:
+        regressions = compare(output, json.loads(args.compare.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
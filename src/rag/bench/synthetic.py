@@ -0,0 +1,144 @@
+import argparse
+import random
+from pathlib import Path
+
+VOCABULARY = (
+    "alloy graphene lithium cathode anode electrolyte perovskite catalyst entropy "
+    "diffusion lattice grain boundary phase oxide nanoparticle thin film polymer "
+    "composite conductivity dielectric spectroscopy microscopy annealing sintering "
+    "hardness ductility fatigue corrosion interface defect dopant bandgap photovoltaic "
+    "capacity cycling stability synthesis precursor morphology crystalline amorphous "
+    "the of and in to with for by on at from results show that increased decreased"
+).split()
+SECTIONS = ("Abstract", "Introduction", "Methods", "Results", "Discussion", "Conclusion")
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_sentences(rng: random.Random, count: int) -> list[str]:
+    sentences = []
+    for _ in range(count):
+        words = rng.choices(VOCABULARY, k=rng.randint(8, 20))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return sentences
+
+
+def _page_stream(rng: random.Random, heading: str, lines: int) -> bytes:
+    text = " ".join(synthetic_sentences(rng, lines))
+    wrapped, line = [], ""
+    for word in text.split():
+        if len(line) + len(word) + 1 > 90:
+            wrapped.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    wrapped.append(line)
+
+    ops = [f"BT /F1 16 Tf 72 740 Td ({_escape(heading)}) Tj ET"]
+    ops.append("BT /F1 10 Tf 13 TL 72 710 Td")
+    ops += [f"({_escape(row)}) Tj T*" for row in wrapped[:50]]
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: Path, pages: int = 5, seed: int = 0, lines_per_page: int = 40):
+    """Write a small born-digital PDF with headings and body text.
+
+    Uses only the standard library, so benchmarks need no PDF toolkit. The
+    output is deterministic for a given seed.
+
+    Args:
+        path: Output file
+        pages: Number of pages
+        seed: Random seed for the text
+        lines_per_page: Sentences per page
+    """
+    rng = random.Random(seed)
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for page in range(pages):
+        heading = f"{page + 1}. {SECTIONS[page % len(SECTIONS)]}"
+        stream = _page_stream(rng, heading, lines_per_page)
+        content = add(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        page_ids.append(
+            add(
+                (
+                    f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>"
+                ).encode()
+            )
+        )
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        catalog,
+        xref,
+    )
+    Path(path).write_bytes(bytes(out))
+
+
+def write_corpus(directory: Path, count: int, pages: int = 5, seed: int = 0) -> list[Path]:
+    """Write `count` synthetic PDFs and return their paths."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = directory / f"synthetic-{i:05d}.pdf"
+        write_pdf(path, pages=pages, seed=seed + i)
+        paths.append(path)
+    return paths
+
+
+def synthetic_chunks(count: int, seed: int = 0) -> list[dict]:
+    """Rows shaped like the docling table, without going through Docling."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"synthetic-{i}",
+            "text": " ".join(synthetic_sentences(rng, rng.randint(3, 12))),
+            "metadata": {
+                "filename": f"synthetic-{i // 20:05d}.pdf",
+                "page_numbers": [i % 20 // 4 + 1],
+                "title": SECTIONS[i % len(SECTIONS)],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic PDFs for benchmarks.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = write_corpus(args.directory, args.count, args.pages, args.seed)
+    print(f"Wrote {len(paths)} PDFs to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
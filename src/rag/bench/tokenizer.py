@@ -0,0 +1,79 @@
+import argparse
+import time
+from pathlib import Path
+
+from rag.bench.common import write_json
+from rag.config import MAX_TOKENS, PDF_DIR
+from rag.ingestion import build_chunker
+
+
+def time_chunking(document, tokenizer_name: str, max_tokens: int, repeat: int) -> dict:
+    """Chunk one converted document `repeat` times with a fresh chunker each time."""
+    seconds, num_chunks = [], 0
+    for _ in range(repeat):
+        chunker = build_chunker(tokenizer_name, max_tokens)
+        start = time.perf_counter()
+        num_chunks = sum(1 for _ in chunker.chunk(dl_doc=document))
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+    return {
+        "tokenizer": tokenizer_name,
+        "chunks": num_chunks,
+        "best_s": best,
+        "chunks_per_s": num_chunks / best if best else float("inf"),
+    }
+
+
+def time_counting(texts: list[str], repeat: int) -> dict:
+    """Token counting: string tokens vs. memoized counts vs. batch encoding."""
+    from rag.utils.tokenizer import OpenAITokenizerWrapper
+
+    results = {}
+    for name, run in (
+        ("tokenize", lambda tok: [len(tok.tokenize(t)) for t in texts]),
+        ("count_tokens", lambda tok: [tok.count_tokens(t) for t in texts]),
+        ("count_tokens_batch", lambda tok: tok.count_tokens_batch(texts)),
+    ):
+        tok = OpenAITokenizerWrapper()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run(tok)
+        results[name] = (time.perf_counter() - start) / repeat
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chunking throughput: bert-base-uncased vs. the tiktoken wrapper."
+    )
+    parser.add_argument("pdf", nargs="?", type=Path, default=PDF_DIR / "test.pdf")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--tokenizers", nargs="+", default=["bert-base-uncased", "cl100k_base"]
+    )
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    from docling.document_converter import DocumentConverter
+
+    print(f"Converting {args.pdf} once...")
+    document = DocumentConverter().convert(args.pdf).document
+
+    results = {"chunking": [], "counting_s": None}
+    for name in args.tokenizers:
+        row = time_chunking(document, name, args.max_tokens, args.repeat)
+        results["chunking"].append(row)
+        print(f"{name}: {row['chunks']} chunks, {row['chunks_per_s']:.1f} chunks/s")
+
+    # Overlapping segments, as the chunker sees them while merging peers
+    texts = [item.text for item in document.texts if item.text]
+    texts += [" ".join(texts[i : i + 4]) for i in range(len(texts))]
+    results["counting_s"] = time_counting(texts, args.repeat)
+    print(f"token counting over {len(texts)} segments: {results['counting_s']}")
+
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from rag.config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL
+from rag.indexing import VECTOR_COLUMN
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query text -> query vector.
+
+    Query vectors depend only on the text and the table's embedding function,
+    so they never expire; the least recently used entries are dropped once
+    `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, table, query: str) -> np.ndarray:
+        """Embed a query with the table's embedding function, using the cache.
+
+        Args:
+            table: LanceDB table object with an embedding function
+            query: User's question
+
+        Returns:
+            np.ndarray: Query vector
+        """
+        func = table.embedding_functions[VECTOR_COLUMN].function
+        key = (repr(func), query.strip())
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                return vector
+
+        vector = np.asarray(func.compute_query_embeddings(query)[0], dtype=np.float32)
+        with self._lock:
+            self._entries[key] = vector
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vector
+
+
+def history_key(messages: list[dict]) -> str:
+    """Digest of the conversation before the current question."""
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class _Answer:
+    vector: np.ndarray
+    chunk_ids: tuple
+    history: str
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Cache of generated answers, matched by question similarity.
+
+    A cached answer is reused when a new question's embedding is within
+    `threshold` cosine similarity of a cached one, the same chunks were
+    retrieved for it and the earlier conversation is identical (first-turn
+    questions share an empty history, so they are reused across users).
+    Entries expire after `ttl` seconds and the whole cache is dropped when the
+    table version changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_size: int = 1000,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: list[_Answer] = []
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _prune(self, table_version):
+        if table_version != self._version:
+            self._entries.clear()
+            self._version = table_version
+        cutoff = time.time() - self.ttl
+        self._entries = [e for e in self._entries if e.created_at >= cutoff]
+
+    def lookup(
+        self, vector: np.ndarray, chunk_ids, history: str, table_version
+    ) -> str | None:
+        """Return a cached answer for an equivalent question, if any.
+
+        Args:
+            vector: Query embedding
+            chunk_ids: Ids of the retrieved chunks, in order
+            history: `history_key` of the earlier conversation
+            table_version: Current version of the table
+
+        Returns:
+            str | None: Cached answer
+        """
+        chunk_ids = tuple(chunk_ids)
+        with self._lock:
+            self._prune(table_version)
+            candidates = [
+                e
+                for e in self._entries
+                if e.chunk_ids == chunk_ids and e.history == history
+            ]
+            if not candidates:
+                return None
+            matrix = np.stack([e.vector for e in candidates])
+            similarities = matrix @ vector / (
+                np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector) + 1e-12
+            )
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return candidates[best].answer
+        return None
+
+    def put(self, vector: np.ndarray, chunk_ids, history: str, answer: str, table_version):
+        """Store an answer for later lookups."""
+        with self._lock:
+            self._prune(table_version)
+            self._entries.append(
+                _Answer(vector, tuple(chunk_ids), history, answer, time.time())
+            )
+            del self._entries[: -self.max_size]
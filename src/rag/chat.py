@@ -1,13 +1,42 @@
-import lancedb
+import sys
+from dataclasses import replace
+from pathlib import Path
+
 import streamlit as st
-from dotenv import load_dotenv
-from openai import OpenAI
 
-# Load environment variables
-load_dotenv()
+# Make the rag package importable under `streamlit run src/rag/chat.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag import telemetry  # noqa: E402
+from rag.caching import (  # noqa: E402
+    QueryEmbeddingCache,
+    SemanticAnswerCache,
+    history_key,
+)
+from rag.client import ServiceClient  # noqa: E402
+from rag.config import CHAT_MODEL, RAG_SERVICE_URL  # noqa: E402
+from rag.prompting import build_messages, format_context  # noqa: E402
+from rag.resources import get_dedup, get_openai_client, get_table  # noqa: E402
+from rag.retrieval import (  # noqa: E402
+    SEARCH_MODES,
+    RetrievedChunk,
+    Scope,
+    SearchOptions,
+    retrieve,
+)
+
+
+# Start the metrics exporter once per server process (RAG_TELEMETRY)
+@st.cache_resource
+def init_telemetry():
+    telemetry.configure()
+    return telemetry.enabled()
+
 
-# Initialize OpenAI client
-client = OpenAI()
+# With RAG_SERVICE_URL set, retrieval and generation run in rag.service
+@st.cache_resource
+def init_service_client():
+    return ServiceClient(RAG_SERVICE_URL) if RAG_SERVICE_URL else None
 
 
 # Initialize LanceDB connection
@@ -18,76 +47,92 @@ def init_db():
     Returns:
         LanceDB table object
     """
-    db = lancedb.connect("data/lancedb")
-    return db.open_table("docling")
+    return get_table()
+
+
+@st.cache_resource
+def init_caches():
+    """Initialize the query-embedding and answer caches shared by all sessions.
+
+    Returns:
+        tuple: (QueryEmbeddingCache, SemanticAnswerCache)
+    """
+    return QueryEmbeddingCache(), SemanticAnswerCache()
 
 
-def get_context(query: str, table, num_results: int = 5) -> str:
+def get_context(
+    query: str,
+    table,
+    num_results: int = 5,
+    options: SearchOptions | None = None,
+    scope: Scope | None = None,
+) -> str:
     """Search the database for relevant context.
 
     Args:
         query: User's question
         table: LanceDB table object
         num_results: Number of results to return
+        options: Retrieval mode and hybrid fusion weights
+        scope: Article, journal, years or file to search in, applied inside
+            the search; overrides `options.scope`
 
     Returns:
         str: Concatenated context from relevant chunks with source information
     """
-    results = table.search(query).limit(num_results).to_pandas()
-    contexts = []
-
-    for _, row in results.iterrows():
-        # Extract metadata
-        filename = row["metadata"]["filename"]
-        page_numbers = row["metadata"]["page_numbers"]
-        title = row["metadata"]["title"]
-
-        # Build source citation
-        source_parts = []
-        if filename:
-            source_parts.append(filename)
-        if page_numbers is not None and len(page_numbers) > 0:
-            source_parts.append(f"p. {', '.join(str(p) for p in page_numbers)}")
+    if scope is not None:
+        options = replace(options or SearchOptions(), scope=scope)
+    return format_context(retrieve(table, query, num_results, options))
 
-        source = f"\nSource: {' - '.join(source_parts)}"
-        if title:
-            source += f"\nTitle: {title}"
 
-        contexts.append(f"{row['text']}{source}")
-
-    return "\n\n".join(contexts)
-
-
-def get_chat_response(messages, context: str) -> str:
+def get_chat_response(messages, chunks: list[RetrievedChunk]) -> str:
     """Get streaming response from OpenAI API.
 
+    The retrieved chunks and earlier turns are fitted into the configured
+    token budgets, so the prompt does not grow with the conversation.
+
     Args:
-        messages: Chat history
-        context: Retrieved context from database
+        messages: Chat history, ending with the current question
+        chunks: Retrieved chunks, best-first
 
     Returns:
         str: Model's response
     """
-    system_prompt = f"""You are a helpful assistant that answers questions based on the provided context.
-    Use only the information from the context to answer questions. If you're unsure or the context
-    doesn't contain the relevant information, say so.
-    
-    Context:
-    {context}
-    """
-
-    messages_with_context = [{"role": "system", "content": system_prompt}, *messages]
+    with telemetry.span("prompt_build"):
+        messages_with_context, usage = build_messages(messages, chunks)
+    telemetry.count("prompt_tokens", usage.prompt_tokens)
 
     # Create the streaming response
-    stream = client.chat.completions.create(
-        model="gpt-4o-mini",
+    stream = get_openai_client().chat.completions.create(
+        model=CHAT_MODEL,
         messages=messages_with_context,
         temperature=0.7,
         stream=True,
     )
 
     # Use Streamlit's built-in streaming capability
-    response = st.write_stream(stream)
+    response = st.write_stream(telemetry.traced_stream(stream))
+    st.caption(usage.summary())
+    return response
+
+
+def stream_service_answer(events) -> str:
+    """Write the answer tokens of a service chat stream, like `get_chat_response`."""
+    usage = {}
+
+    def tokens():
+        for event, data in events:
+            if event == "token":
+                yield data
+            elif event == "usage":
+                usage.update(data)
+
+    response = st.write_stream(tokens())
+    if usage:
+        st.caption(
+            f"Prompt: {usage['prompt_tokens']} tokens "
+            f"(context {usage['context_tokens']}, history {usage['history_tokens']})"
+        )
     return response
 
 
@@ -98,8 +143,29 @@ st.title("📚 Document Q&A")
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Initialize database connection
-table = init_db()
+# Initialize database connection (or the service client)
+init_telemetry()
+service = init_service_client()
+if service is None:
+    table = init_db()
+    query_cache, answer_cache = init_caches()
+
+# Retrieval settings
+with st.sidebar:
+    search_options = SearchOptions(
+        mode=st.selectbox("Search mode", SEARCH_MODES, index=SEARCH_MODES.index("hybrid")),
+        vector_weight=st.slider("Vector weight", 0.0, 2.0, 1.0, 0.1),
+        text_weight=st.slider("Keyword weight", 0.0, 2.0, 1.0, 0.1),
+        diversify=st.checkbox("Diversify results (MMR)", value=False),
+    )
+    num_results = st.slider("Results", 1, 20, 5)
+    with st.expander("Restrict to"):
+        search_options.scope = Scope(
+            doi=st.text_input("DOI").strip() or None,
+            journal=st.text_input("Journal").strip() or None,
+            year_from=st.number_input("From year", value=None, step=1),
+            year_to=st.number_input("To year", value=None, step=1),
+        )
 
 # Display chat messages
 for message in st.session_state.messages:
@@ -112,12 +178,27 @@ if prompt := st.chat_input("Ask a question about the document"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
+    # Key the answer cache on the conversation before this question
+    history = history_key(st.session_state.messages)
+
     # Add user message to chat history
     st.session_state.messages.append({"role": "user", "content": prompt})
 
     # Get relevant context
     with st.status("Searching document...", expanded=False) as status:
-        context = get_context(prompt, table)
+        if service is not None:
+            events = service.chat(st.session_state.messages, num_results, search_options)
+            _, found = next(events)  # the first event carries the chunks
+            chunks = [
+                RetrievedChunk(**{k: v for k, v in chunk.items() if k != "source"})
+                for chunk in found
+            ]
+        else:
+            query_vector = query_cache.embed(table, prompt)
+            chunks = retrieve(
+                table, prompt, num_results, search_options, query_vector, get_dedup()
+            )
+            chunk_ids = [chunk.id for chunk in chunks]
         st.markdown(
             """
             <style>
@@ -146,26 +227,14 @@ if prompt := st.chat_input("Ask a question about the document"):
         )
 
         st.write("Found relevant sections:")
-        for chunk in context.split("\n\n"):
-            # Split into text and metadata parts
-            parts = chunk.split("\n")
-            text = parts[0]
-            metadata = {
-                line.split(": ")[0]: line.split(": ")[1]
-                for line in parts[1:]
-                if ": " in line
-            }
-
-            source = metadata.get("Source", "Unknown source")
-            title = metadata.get("Title", "Untitled section")
-
+        for chunk in chunks:
             st.markdown(
                 f"""
                 <div class="search-result">
                     <details>
-                        <summary>{source}</summary>
-                        <div class="metadata">Section: {title}</div>
-                        <div style="margin-top: 8px;">{text}</div>
+                        <summary>{chunk.source or "Unknown source"}</summary>
+                        <div class="metadata">Section: {chunk.title or "Untitled section"}</div>
+                        <div style="margin-top: 8px;">{chunk.text}</div>
                     </details>
                 </div>
             """,
@@ -174,8 +243,16 @@ if prompt := st.chat_input("Ask a question about the document"):
 
     # Display assistant response first
     with st.chat_message("assistant"):
-        # Get model response with streaming
-        response = get_chat_response(st.session_state.messages, context)
+        if service is not None:
+            response = stream_service_answer(events)
+        else:
+            response = answer_cache.lookup(query_vector, chunk_ids, history, table.version)
+            if response is not None:
+                st.markdown(response)
+            else:
+                # Get model response with streaming
+                response = get_chat_response(st.session_state.messages, chunks)
+                answer_cache.put(query_vector, chunk_ids, history, response, table.version)
 
     # Add assistant response to chat history
     st.session_state.messages.append({"role": "assistant", "content": response})
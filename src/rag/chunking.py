@@ -1,56 +1,22 @@
-from pathlib import Path
+from rag.config import PDF_DIR
+from rag.resources import get_chunker, get_converters
 
-from docling.chunking import HybridChunker
-from docling.document_converter import DocumentConverter
-from dotenv import load_dotenv
-from openai import OpenAI
-from transformers import AutoTokenizer
 
-load_dotenv()
+def chunk_pdf(pdf_path=PDF_DIR / "test.pdf") -> list:
+    """Convert a PDF and split it with the shared HybridChunker."""
+    # --------------------------------------------------------------
+    # Extract the data
+    # --------------------------------------------------------------
 
-# Initialize OpenAI client (make sure you have OPENAI_API_KEY in your environment variables)
-client = OpenAI()
+    document, _, _ = get_converters().convert(pdf_path)
 
+    # --------------------------------------------------------------
+    # Apply hybrid chunking
+    # --------------------------------------------------------------
 
-hf_tok = AutoTokenizer.from_pretrained(
-    "bert-base-uncased", use_fast=True
-)  # Load our custom tokenizer for OpenAI
-MAX_TOKENS = 8191  # text-embedding-3-large's maximum context length
+    return list(get_chunker().chunk(dl_doc=document))
 
 
-# --------------------------------------------------------------
-# Extract the data
-# --------------------------------------------------------------
-
-converter = DocumentConverter()
-# result = converter.convert("https://arxiv.org/pdf/2408.09869")
-
-pdf_dir = Path(__file__).parent.parent / "pdfs" / "test.pdf"
-result = converter.convert(pdf_dir)
-
-
-# --------------------------------------------------------------
-# Apply hybrid chunking
-# --------------------------------------------------------------
-
-# tok = AutoTokenizer.from_pretrained("bert-base-uncased", use_fast=True)
-# max_len = getattr(tok, "model_max_length", 512)  # usually 512 for BERT
-# safe_chunk = min(480, max_len - 32)  # small buffer
-
-# chunker = HybridChunker(
-#     tokenizer=tok,
-#     max_tokens=safe_chunk,  # e.g., 480
-#     merge_peers=True,
-# )
-
-
-chunker = HybridChunker(
-    tokenizer=hf_tok,
-    max_tokens=MAX_TOKENS,
-    merge_peers=True,
-)
-
-chunk_iter = chunker.chunk(dl_doc=result.document)
-chunks = list(chunk_iter)
-
-len(chunks)
+if __name__ == "__main__":
+    chunks = chunk_pdf()
+    print(f"{len(chunks)} chunks")
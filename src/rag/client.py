@@ -0,0 +1,55 @@
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict
+
+import requests
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[tuple[str, object]]:
+    """Parse Server-Sent Events with JSON payloads into (event, data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+    if data:
+        yield event, json.loads("\n".join(data))
+
+
+class ServiceClient:
+    """Blocking client of rag.service, for thin front ends such as the Streamlit app."""
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def chat(
+        self, messages: list[dict], num_results: int = 5, options=None
+    ) -> Iterator[tuple[str, object]]:
+        """Stream the events of one chat turn, see `RagService.chat`.
+
+        Args:
+            messages: Chat history, ending with the user's question
+            num_results: Number of chunks to retrieve
+            options: SearchOptions (or a dict of its fields)
+
+        Yields:
+            tuple[str, object]: (event name, payload)
+        """
+        if options is not None and not isinstance(options, dict):
+            options = asdict(options)
+        payload = {"messages": messages, "num_results": num_results, "options": options}
+        with self.session.post(
+            f"{self.base_url}/chat", json=payload, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            for event, data in iter_sse(response.iter_lines(decode_unicode=True)):
+                if event == "error":
+                    raise RuntimeError(data["error"])
+                yield event, data
@@ -0,0 +1,239 @@
+import argparse
+
+import numpy as np
+import pyarrow as pa
+
+from rag.config import RESCORE_FACTOR, SHORT_VECTOR_DIM, SHORT_VECTOR_DTYPE
+from rag.diversity import vectors_to_numpy
+from rag.indexing import (
+    SHORT_VECTOR_COLUMN,
+    VECTOR_COLUMN,
+    IndexParams,
+    apply_search_params,
+    index_metric,
+    vector_dim,
+)
+
+SHORT_VECTOR_DTYPES = ("float32", "float16")
+
+
+def truncate_vectors(vectors, dim: int, dtype: str = SHORT_VECTOR_DTYPE) -> np.ndarray:
+    """Matryoshka truncation: keep the leading `dim` components and renormalize.
+
+    text-embedding-3 models are trained so that prefixes of their vectors are
+    embeddings in their own right; renormalizing keeps cosine scores comparable.
+
+    Args:
+        vectors: Full vectors, one per row
+        dim: Number of leading components to keep
+        dtype: Storage type of the result
+
+    Returns:
+        np.ndarray: (n, dim) unit vectors
+    """
+    short = np.asarray(vectors, dtype=np.float32)[..., :dim]
+    norms = np.linalg.norm(short, axis=-1, keepdims=True)
+    return (short / np.where(norms == 0, 1.0, norms)).astype(dtype)
+
+
+def short_vector_type(dim: int, dtype: str = SHORT_VECTOR_DTYPE) -> pa.DataType:
+    return pa.list_(pa.from_numpy_dtype(np.dtype(dtype)), dim)
+
+
+def has_short_vectors(table) -> bool:
+    return SHORT_VECTOR_COLUMN in table.schema.names
+
+
+def add_short_vectors(table, rows: list[dict]) -> list[dict]:
+    """Embed rows up front and fill in the short column, if the table has one.
+
+    Rows that already carry a vector are not re-embedded by `table.add`, so
+    both columns are written from a single embedding call.
+
+    Args:
+        table: LanceDB table object
+        rows: Rows without vectors
+
+    Returns:
+        list[dict]: The rows, with both vector columns when the table has a
+        short column, otherwise unchanged
+    """
+    if not rows or not has_short_vectors(table):
+        return rows
+    func = table.embedding_functions[VECTOR_COLUMN].function
+    field_type = table.schema.field(SHORT_VECTOR_COLUMN).type
+    vectors = np.asarray(
+        func.compute_source_embeddings([row["text"] for row in rows]), dtype=np.float32
+    )
+    short = truncate_vectors(
+        vectors, field_type.list_size, field_type.value_type.to_pandas_dtype()
+    )
+    return [
+        {**row, VECTOR_COLUMN: vector, SHORT_VECTOR_COLUMN: short_vector}
+        for row, vector, short_vector in zip(rows, vectors, short)
+    ]
+
+
+def backfill_short_vectors(
+    table, dim: int = SHORT_VECTOR_DIM, dtype: str = SHORT_VECTOR_DTYPE
+):
+    """(Re)compute the short column of an existing table from its full vectors.
+
+    The new column is written as a new data file per fragment; the full
+    vectors are only read, never rewritten.
+
+    Args:
+        table: LanceDB table object
+        dim: Leading components to keep
+        dtype: "float32" or "float16"
+    """
+    import lance
+
+    if has_short_vectors(table):
+        table.drop_columns([SHORT_VECTOR_COLUMN])
+    value_type = pa.from_numpy_dtype(np.dtype(dtype))
+    output_schema = pa.schema([(SHORT_VECTOR_COLUMN, short_vector_type(dim, dtype))])
+
+    @lance.batch_udf(output_schema=output_schema)
+    def shorten(batch: pa.RecordBatch) -> pa.RecordBatch:
+        short = truncate_vectors(vectors_to_numpy(batch[VECTOR_COLUMN]), dim, dtype)
+        values = pa.array(short.ravel(), value_type)
+        column = pa.FixedSizeListArray.from_arrays(values, dim)
+        return pa.RecordBatch.from_arrays([column], [SHORT_VECTOR_COLUMN])
+
+    table.to_lance().add_columns(shorten, read_columns=[VECTOR_COLUMN])
+
+
+def rescore(
+    candidates: pa.Table,
+    query_vector,
+    limit: int,
+    keep_vectors: bool = False,
+    metric: str = IndexParams.metric,
+):
+    """Re-rank candidates by their exact distance on the full vectors.
+
+    Distances follow LanceDB's conventions for `metric`: `1 - similarity`
+    for cosine and dot, the squared euclidean distance for l2.
+
+    Args:
+        candidates: Rows including the full vector column
+        query_vector: Full query embedding
+        limit: Number of rows to keep
+        keep_vectors: Leave the full vector column in the result
+        metric: "cosine", "l2" or "dot"
+
+    Returns:
+        pa.Table: The best `limit` rows with `_distance` replaced by the exact
+        distance
+    """
+    if candidates.num_rows == 0:
+        return candidates
+    vectors = vectors_to_numpy(candidates[VECTOR_COLUMN]).astype(np.float32)
+    query = np.asarray(query_vector, dtype=np.float32)
+    if metric == "l2":
+        distances = np.sum((vectors - query) ** 2, axis=1)
+    elif metric == "dot":
+        distances = 1.0 - vectors @ query
+    elif metric == "cosine":
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        distances = 1.0 - vectors @ (query / max(np.linalg.norm(query), 1e-12))
+    else:
+        raise ValueError(f"Unknown metric: {metric}")
+    order = np.argsort(distances, kind="stable")[:limit]
+    results = candidates.take(order)
+    if "_distance" in results.column_names:
+        results = results.drop_columns(["_distance"])
+    if not keep_vectors:
+        results = results.drop_columns([VECTOR_COLUMN])
+    return results.append_column("_distance", pa.array(distances[order], pa.float32()))
+
+
+def two_stage_search(
+    table,
+    query_vector,
+    limit: int,
+    columns: list[str],
+    rescore_factor: int = RESCORE_FACTOR,
+    params: IndexParams | None = None,
+    keep_vectors: bool = False,
+    where: str | None = None,
+    metric: str | None = None,
+) -> pa.Table:
+    """Search the short vectors, then rescore the candidates at full precision.
+
+    The first stage reads only the short column (and its index); full vectors
+    are fetched for the `limit * rescore_factor` candidates alone.
+
+    Args:
+        table: LanceDB table object with a short vector column
+        query_vector: Full query embedding
+        limit: Number of results
+        columns: Columns to return
+        rescore_factor: Candidates fetched per result
+        params: Search settings of the short column's index, with the metric
+            it was built with when omitted
+        keep_vectors: Leave the full vector column in the result
+        where: Filter applied before the first stage
+        metric: Metric to rescore with, that of the full vector index when
+            omitted
+
+    Returns:
+        pa.Table: Results best-first, with the exact `_distance`
+    """
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    short_query = truncate_vectors(
+        query_vector, vector_dim(table, SHORT_VECTOR_COLUMN), "float32"
+    )
+    fetch = [*columns, VECTOR_COLUMN] if VECTOR_COLUMN not in columns else columns
+    params = params or IndexParams(metric=index_metric(table, SHORT_VECTOR_COLUMN))
+    query = apply_search_params(
+        table.search(
+            short_query, query_type="vector", vector_column_name=SHORT_VECTOR_COLUMN
+        ),
+        params,
+    )
+    if where:
+        query = query.where(where, prefilter=True)
+    candidates = (
+        query.select(fetch)
+        .with_row_id(True)
+        .limit(limit * max(rescore_factor, 1))
+        .to_arrow()
+    )
+    metric = metric or index_metric(table)
+    return rescore(candidates, query_vector, limit, keep_vectors, metric)
+
+
+def main():
+    from rag.indexing import build_vector_index
+    from rag.ingestion import open_table
+
+    parser = argparse.ArgumentParser(
+        description="Add a reduced-dimension copy of the vectors for first-stage search."
+    )
+    parser.add_argument("--dim", type=int, default=SHORT_VECTOR_DIM or 256)
+    parser.add_argument("--dtype", choices=SHORT_VECTOR_DTYPES, default=SHORT_VECTOR_DTYPE)
+    parser.add_argument(
+        "--index-type",
+        default=None,
+        help="also index the short column, e.g. IVF_HNSW_SQ for int8 storage",
+    )
+    args = parser.parse_args()
+
+    table = open_table()
+    backfill_short_vectors(table, args.dim, args.dtype)
+    table = open_table()
+    print(
+        f"Added {SHORT_VECTOR_COLUMN} ({args.dim} x {args.dtype}) "
+        f"to {table.count_rows()} rows."
+    )
+    if args.index_type:
+        params = build_vector_index(
+            table, IndexParams(index_type=args.index_type), SHORT_VECTOR_COLUMN
+        )
+        print(f"Built index: {params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# --------------------------------------------------------------
+# Storage
+# --------------------------------------------------------------
+
+PACKAGE_DIR = Path(__file__).parent
+DB_URI = os.getenv("LANCEDB_URI", str(PACKAGE_DIR / "data" / "lancedb"))
+TABLE_NAME = os.getenv("LANCEDB_TABLE", "docling")
+PDF_DIR = Path(os.getenv("PDF_DIR", PACKAGE_DIR.parent / "pdfs"))
+
+# --------------------------------------------------------------
+# Chunking and embedding
+# --------------------------------------------------------------
+
+TOKENIZER_NAME = "bert-base-uncased"
+MAX_TOKENS = 4000
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_CACHE_PATH = Path(
+    os.getenv("EMBEDDING_CACHE_PATH", PACKAGE_DIR / "data" / "embedding_cache.sqlite")
+)
+
+# Docling pipeline: "fast", "tables", "ocr" or "auto" (OCR only for scanned PDFs)
+DOCLING_PROFILE = os.getenv("DOCLING_PROFILE", "auto")
+# PDFs longer than this are converted in page ranges on several workers (0 = never)
+SHARD_PAGES = int(os.getenv("SHARD_PAGES", 20))
+
+# Converted DoclingDocuments, keyed by PDF hash, Docling version and options
+CONVERSION_CACHE_DIR = Path(
+    os.getenv("CONVERSION_CACHE_DIR", PACKAGE_DIR / "data" / "conversions")
+)
+
+# Estimated Jaccard similarity from which a chunk is stored as a reference to an
+# earlier one instead of being embedded (`ingest --dedup`)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+
+# DOI, year and journal of harvested articles (`python main.py harvest --metadata`)
+ARTICLE_METADATA_PATH = Path(
+    os.getenv("ARTICLE_METADATA_PATH", PACKAGE_DIR / "data" / "articles.jsonl")
+)
+
+# Matryoshka-truncated copy of the vectors for first-stage search (0 = none)
+SHORT_VECTOR_DIM = int(os.getenv("SHORT_VECTOR_DIM", 0))
+SHORT_VECTOR_DTYPE = os.getenv("SHORT_VECTOR_DTYPE", "float16")
+
+# --------------------------------------------------------------
+# Retrieval
+# --------------------------------------------------------------
+
+NPROBES = int(os.getenv("LANCEDB_NPROBES", 20))
+REFINE_FACTOR = int(os.getenv("LANCEDB_REFINE_FACTOR", 0)) or None
+# Candidates per result taken from the short vectors and rescored at full precision
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", 5))
+
+# Reuse an answer when a new question is this similar and retrieves the same chunks
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 3600))
+
+# --------------------------------------------------------------
+# Generation
+# --------------------------------------------------------------
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+# Prompt tokens for retrieved chunks and for earlier turns of the conversation
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 6000))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 2000))
+
+# --------------------------------------------------------------
+# Service (rag.service); the Streamlit app uses it when RAG_SERVICE_URL is set
+# --------------------------------------------------------------
+
+RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL") or None
+# Threads for blocking LanceDB and embedding calls, and concurrent LLM streams
+SERVICE_THREADS = int(os.getenv("SERVICE_THREADS", 16))
+SERVICE_MAX_GENERATIONS = int(os.getenv("SERVICE_MAX_GENERATIONS", 256))
+
+# --------------------------------------------------------------
+# Table maintenance (rag.maintenance): act once any threshold is crossed
+# --------------------------------------------------------------
+
+# Fragments below Lance's small-fragment size, merged by compaction
+MAINTENANCE_MAX_SMALL_FRAGMENTS = int(os.getenv("MAINTENANCE_MAX_SMALL_FRAGMENTS", 16))
+# Fraction of rows the vector index does not cover yet
+MAINTENANCE_MAX_UNINDEXED = float(os.getenv("MAINTENANCE_MAX_UNINDEXED", 0.05))
+# Versions older than the grace period (which readers may still be using), and
+# bytes on disk per byte of live data, before old versions are pruned
+MAINTENANCE_MAX_OLD_VERSIONS = int(os.getenv("MAINTENANCE_MAX_OLD_VERSIONS", 10))
+MAINTENANCE_MAX_DISK_RATIO = float(os.getenv("MAINTENANCE_MAX_DISK_RATIO", 2.0))
+MAINTENANCE_GRACE_HOURS = float(os.getenv("MAINTENANCE_GRACE_HOURS", 24))
+
+# --------------------------------------------------------------
+# Telemetry ("off", "local", "prometheus" or "otel")
+# --------------------------------------------------------------
+
+TELEMETRY_EXPORTER = os.getenv("RAG_TELEMETRY", "off")
+PROMETHEUS_PORT = int(os.getenv("RAG_PROMETHEUS_PORT", 9464))
+# Loopback only by default; set to 0.0.0.0 to let a remote scraper in
+PROMETHEUS_HOST = os.getenv("RAG_PROMETHEUS_HOST", "127.0.0.1")
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import os
+import zlib
+from pathlib import Path
+
+from rag.config import CONVERSION_CACHE_DIR
+from rag.documents import BlobDocument
+
+
+class NotCached(LookupError):
+    """Raised in cache-only mode for a PDF that was never converted."""
+
+
+def pdf_digest(source: Path | BlobDocument) -> str:
+    """sha256 of a PDF's bytes, the key of its cache entry."""
+    if isinstance(source, BlobDocument):
+        return hashlib.sha256(source.data).hexdigest()
+    from rag.manifest import file_sha256
+
+    return file_sha256(Path(source))
+
+
+def docling_version() -> str:
+    from importlib.metadata import version
+
+    return version("docling")
+
+
+def pipeline_fingerprint(converter) -> str:
+    """Short digest of the Docling version and the converter's PDF pipeline options.
+
+    Documents converted with other options (OCR, table structure, ...) or by
+    another Docling release are kept apart instead of being reused.
+    """
+    from docling.datamodel.base_models import InputFormat
+
+    option = converter.format_to_options.get(InputFormat.PDF)
+    options = ""
+    if option is not None:
+        options = f"{option.pipeline_cls.__name__}:{option.backend.__name__}"
+        if option.pipeline_options is not None:
+            options += ":" + option.pipeline_options.model_dump_json()
+    digest = hashlib.sha256(f"{docling_version()}\x00{options}".encode()).hexdigest()
+    return digest[:16]
+
+
+class ConversionCache:
+    """Content-addressed store of converted DoclingDocuments.
+
+    Documents are saved as gzip-compressed JSON under
+    `<directory>/<fingerprint>/<sha256[:2]>/<sha256>.json.gz`, where the
+    fingerprint covers the Docling version and pipeline options and the
+    sha256 is that of the PDF bytes. Renamed or re-uploaded copies of a PDF
+    hit the same entry.
+    """
+
+    def __init__(self, fingerprint: str, directory: Path = CONVERSION_CACHE_DIR):
+        """Open (or create) the cache for one converter configuration.
+
+        Args:
+            fingerprint: `pipeline_fingerprint` of the converter
+            directory: Root directory of the cache
+        """
+        self.directory = Path(directory) / fingerprint
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_converter(cls, converter, directory: Path = CONVERSION_CACHE_DIR):
+        return cls(pipeline_fingerprint(converter), directory)
+
+    def path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json.gz"
+
+    def get(self, digest: str):
+        """The cached DoclingDocument for a PDF hash, or None.
+
+        An entry that cannot be read back (truncated by a crash, corrupted on
+        disk) is removed and counts as a miss, so the PDF is converted again.
+        """
+        from docling_core.types.doc import DoclingDocument
+
+        path = self.path(digest)
+        try:
+            with gzip.open(path, "rb") as fl:
+                document = DoclingDocument.model_validate_json(fl.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, zlib.error, ValueError):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return document
+
+    def put(self, digest: str, document):
+        """Store a converted document; concurrent writers of one PDF are harmless."""
+        path = self.path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(tmp, "wb", compresslevel=6) as fl:
+            fl.write(document.model_dump_json().encode())
+        os.replace(tmp, path)
+
+    def convert(self, converter, source: Path | BlobDocument, cache_only: bool = False):
+        """Convert a PDF, reusing the cached document when the bytes are known.
+
+        Args:
+            converter: Docling DocumentConverter, only used on a miss
+            source: PDF file or downloaded blob
+            cache_only: Raise NotCached instead of converting on a miss
+
+        Returns:
+            tuple: (DoclingDocument, whether it came from the cache)
+        """
+        digest = pdf_digest(source)
+        document = self.get(digest)
+        if document is not None:
+            return document, True
+        if cache_only:
+            name = getattr(source, "name", source)
+            raise NotCached(f"{name} is not in the conversion cache")
+        stream = source.to_stream() if isinstance(source, BlobDocument) else source
+        document = converter.convert(stream).document
+        self.put(digest, document)
+        return document, False
@@ -0,0 +1,396 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+from rag.config import DB_URI, DEDUP_THRESHOLD, TABLE_NAME
+
+DEDUP_INDEX_PATH = Path(DB_URI) / f"{TABLE_NAME}.dedup.sqlite"
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MASK32 = np.uint64(0xFFFFFFFF)
+# Odd multiplier combining the word hashes of a shingle
+_SHINGLE_BASE = np.uint64(0x9E3779B1)
+# Candidates compared per chunk; boilerplate can share bands with many chunks
+_MAX_CANDIDATES = 50
+# Where a duplicate occurs, for scoped searches and citations
+_LOCATION_COLUMNS = (
+    ("filename", "TEXT"),
+    ("page_numbers", "TEXT"),
+    ("doi", "TEXT"),
+    ("year", "INTEGER"),
+    ("journal", "TEXT"),
+)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles.
+
+    Two texts' signatures agree in a fraction of positions that estimates the
+    Jaccard similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # (a * h + b) mod p over the whole field; the product wraps at 2**64
+        # like in datasketch, which keeps the permutations independent enough
+        self.a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.shingle_size = shingle_size
+
+    def shingles(self, words: list[str]) -> np.ndarray:
+        """32-bit hashes of the distinct word n-grams (the whole text if shorter).
+
+        Words are hashed once and combined per n-gram in numpy, which is much
+        faster than hashing every n-gram string.
+        """
+        words_hashed = np.fromiter(
+            (zlib.crc32(word.encode()) for word in words),
+            dtype=np.uint64,
+            count=len(words),
+        )
+        k = min(self.shingle_size, len(words))
+        n = len(words) - k + 1
+        hashes = np.zeros(n, dtype=np.uint64)
+        for offset in range(k):
+            window = words_hashed[offset : offset + n]
+            hashes = (hashes * _SHINGLE_BASE + window) & _MASK32
+        return np.unique(hashes)
+
+    def signature(self, words: list[str]) -> np.ndarray:
+        hashes = self.shingles(words)
+        values = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return (values.min(axis=0) & _MASK32).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> list[int]:
+    """LSH keys: one 64-bit hash per band of rows of the signature."""
+    rows = len(signature) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                bytes([band]) + signature[band * rows : (band + 1) * rows].tobytes(),
+                digest_size=8,
+            ).digest(),
+            "little",
+            signed=True,
+        )
+        for band in range(bands)
+    ]
+
+
+@dataclass
+class DedupStats:
+    """What deduplication kept out of the embedding call and the table."""
+
+    num_chunks: int = 0
+    num_exact: int = 0
+    num_near: int = 0
+    chars_saved: int = 0
+
+    @property
+    def num_duplicates(self) -> int:
+        return self.num_exact + self.num_near
+
+    def summary(self) -> str:
+        share = self.num_duplicates / self.num_chunks if self.num_chunks else 0.0
+        return (
+            f"Dedup: {self.num_duplicates} of {self.num_chunks} chunks ({share:.1%}) "
+            f"stored as references ({self.num_exact} exact, {self.num_near} near); "
+            f"~{self.chars_saved // 4} embedding tokens saved"
+        )
+
+
+def _scope_clause(scope) -> tuple[str, list]:
+    """SQL condition on the duplicates table for a `rag.retrieval.Scope`.
+
+    The values are bound as parameters; a caller's filter string never
+    reaches SQLite.
+    """
+    conditions, params = [], []
+    for column, op, value in (
+        ("doi", "=", scope.doi),
+        ("journal", "=", scope.journal),
+        ("year", ">=", scope.year_from),
+        ("year", "<=", scope.year_to),
+        ("filename", "=", scope.filename),
+    ):
+        if value is not None:
+            conditions.append(f"{column} {op} ?")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+
+class ChunkDeduplicator:
+    """Finds exact and near-duplicate chunks across a corpus before embedding.
+
+    Exact duplicates (same words, ignoring case, whitespace and punctuation)
+    are found by digest. Near duplicates are found with MinHash LSH: chunks
+    sharing any of `bands` signature bands are candidates, kept as duplicates
+    when their estimated Jaccard similarity reaches `threshold`. With 128
+    permutations in 16 bands of 8, pairs above ~0.7 similarity are almost
+    always candidates.
+
+    Canonical chunks, their band keys and the duplicate references live in
+    SQLite, so memory stays flat however large the corpus grows. Each
+    reference also records where the duplicate occurs (file, pages, doi, year
+    and journal), so searches scoped to a paper whose chunks were all
+    duplicates still find them through the canonical chunks; see
+    `rag.retrieval.retrieve`.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEDUP_INDEX_PATH,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+    ):
+        """Open or create the index.
+
+        Args:
+            path: SQLite file, one per table
+            threshold: Estimated Jaccard similarity from which a chunk is a
+                near duplicate
+            num_perm: MinHash permutations
+            bands: LSH bands; must divide `num_perm`
+            shingle_size: Words per shingle
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.path = Path(path)
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.stats = DedupStats()
+        self._committed_stats = DedupStats()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+            # Bounded page cache (64 MiB); the index itself lives on disk
+            "PRAGMA cache_size=-65536;"
+            "CREATE TABLE IF NOT EXISTS canonical (rowid INTEGER PRIMARY KEY, "
+            "id TEXT UNIQUE NOT NULL, digest TEXT NOT NULL, signature BLOB NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS canonical_digest ON canonical (digest);"
+            # Band keys point at canonical rowids, not the much longer chunk ids
+            "CREATE TABLE IF NOT EXISTS bands ("
+            "key INTEGER NOT NULL, canonical INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS bands_key ON bands (key);"
+            "CREATE TABLE IF NOT EXISTS duplicates ("
+            "id TEXT PRIMARY KEY, canonical_id TEXT NOT NULL, "
+            "similarity REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS duplicates_canonical "
+            "ON duplicates (canonical_id);"
+        )
+        # Columns added after the first release of the index are added in place
+        existing = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(duplicates)")
+        }
+        for name, kind in (("exact", "INTEGER"), *_LOCATION_COLUMNS):
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE duplicates ADD COLUMN {name} {kind}")
+        self._conn.commit()
+
+    def clear(self):
+        """Forget everything, for a table that is rebuilt from scratch."""
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM canonical; DELETE FROM bands; DELETE FROM duplicates;"
+            )
+            self._conn.commit()
+
+    def commit(self):
+        """Make the rows passed to `split` since the last commit permanent.
+
+        Call it once the unique rows are written to the table: a crash before
+        that leaves no canonical entry pointing at a chunk the table lacks.
+        """
+        with self._lock:
+            self._conn.commit()
+            self._committed_stats = replace(self.stats)
+
+    def rollback(self):
+        """Forget the rows passed to `split` since the last commit."""
+        with self._lock:
+            self._conn.rollback()
+            vars(self.stats).update(vars(self._committed_stats))
+
+    def _match(self, digest: str, signature: np.ndarray, keys: list[int]):
+        """(canonical id or None, estimated similarity, same digest)."""
+        row = self._conn.execute(
+            "SELECT id FROM canonical WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if row:
+            return row[0], 1.0, True
+        placeholders = ",".join("?" * len(keys))
+        candidates = self._conn.execute(
+            "SELECT DISTINCT c.id, c.signature FROM bands b "
+            "JOIN canonical c ON c.rowid = b.canonical "
+            f"WHERE b.key IN ({placeholders}) LIMIT ?",
+            (*keys, _MAX_CANDIDATES),
+        ).fetchall()
+        best, best_similarity = None, 0.0
+        for chunk_id, blob in candidates:
+            stored = np.frombuffer(blob, dtype=np.uint32)
+            similarity = float(np.mean(stored == signature))
+            if similarity > best_similarity:
+                best, best_similarity = chunk_id, similarity
+        if best_similarity >= self.threshold:
+            return best, best_similarity, False
+        return None, best_similarity, False
+
+    def split(self, records: list[dict]) -> tuple[list[dict], list[dict]]:
+        """Separate the rows to embed from duplicates of chunks already kept.
+
+        Rows that are kept become canonical at once, so duplicates within the
+        same batch are found too. Duplicate references are stored in the index.
+        Rows that are canonical already, stored by an earlier run, are left
+        out of both lists.
+        Nothing is permanent until `commit`; `rollback` undoes the split, for
+        when writing the unique rows fails.
+
+        Args:
+            records: Rows of one document, in chunker order
+
+        Returns:
+            tuple[list[dict], list[dict]]: (unique rows, references
+            {"id", "canonical_id", "similarity", "exact"} for the duplicates)
+        """
+        unique, references = [], []
+        with self._lock:
+            for record in records:
+                self.stats.num_chunks += 1
+                words = _WORD.findall(record["text"].lower())
+                if not words:
+                    unique.append(record)
+                    continue
+                digest = hashlib.sha256(" ".join(words).encode()).hexdigest()
+                signature = self.hasher.signature(words)
+                keys = band_keys(signature, self.bands)
+                canonical_id, similarity, exact = self._match(
+                    digest, signature, keys
+                )
+                if canonical_id == record["id"]:
+                    # Already stored by an earlier run; writing it again would
+                    # duplicate the row
+                    continue
+                if canonical_id is None:
+                    rowid = self._conn.execute(
+                        "INSERT INTO canonical (id, digest, signature) "
+                        "VALUES (?, ?, ?)",
+                        (record["id"], digest, signature.tobytes()),
+                    ).lastrowid
+                    self._conn.executemany(
+                        "INSERT INTO bands VALUES (?, ?)",
+                        [(key, rowid) for key in keys],
+                    )
+                    unique.append(record)
+                    continue
+
+                metadata = record.get("metadata") or {}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO duplicates (id, canonical_id, "
+                    "similarity, exact, filename, page_numbers, doi, year, journal) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record["id"],
+                        canonical_id,
+                        similarity,
+                        exact,
+                        metadata.get("filename"),
+                        json.dumps(metadata.get("page_numbers")),
+                        record.get("doi"),
+                        record.get("year"),
+                        record.get("journal"),
+                    ),
+                )
+                references.append(
+                    {
+                        "id": record["id"],
+                        "canonical_id": canonical_id,
+                        "similarity": similarity,
+                        "exact": exact,
+                    }
+                )
+                # Near duplicates can agree on every MinHash position too
+                if exact:
+                    self.stats.num_exact += 1
+                else:
+                    self.stats.num_near += 1
+                self.stats.chars_saved += len(record["text"])
+        return unique, references
+
+    def scope_ids(self, scope) -> list[str]:
+        """Canonical chunks with a duplicate in the scope of a search.
+
+        Args:
+            scope: `rag.retrieval.Scope` of the search
+
+        Returns:
+            list[str]: Ids of the canonical chunks, each once
+        """
+        clause, params = _scope_clause(scope)
+        if not clause:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT canonical_id FROM duplicates WHERE {clause}", params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def references(
+        self, canonical_ids: list[str], scope=None
+    ) -> dict[str, list[dict]]:
+        """Other places where the text of each canonical chunk occurs.
+
+        Args:
+            canonical_ids: Ids of stored chunks, such as search results
+            scope: Only the duplicates in this `rag.retrieval.Scope`
+
+        Returns:
+            dict: canonical id -> [{"id", "filename", "page_numbers", "doi",
+            "year", "journal", "similarity", "exact"}], most similar first
+        """
+        found: dict[str, list[dict]] = {chunk_id: [] for chunk_id in canonical_ids}
+        if not canonical_ids:
+            return found
+        placeholders = ",".join("?" * len(canonical_ids))
+        clause, params = _scope_clause(scope) if scope else ("", [])
+        scoped = f" AND {clause}" if clause else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT canonical_id, id, filename, page_numbers, doi, year, journal, "
+                "similarity, exact FROM duplicates "
+                f"WHERE canonical_id IN ({placeholders}){scoped} "
+                "ORDER BY similarity DESC, id",
+                [*canonical_ids, *params],
+            ).fetchall()
+        for canonical_id, chunk_id, filename, pages, *rest in rows:
+            doi, year, journal, similarity, exact = rest
+            found[canonical_id].append(
+                {
+                    "id": chunk_id,
+                    "filename": filename,
+                    "page_numbers": json.loads(pages) if pages else None,
+                    "doi": doi,
+                    "year": year,
+                    "journal": journal,
+                    "similarity": similarity,
+                    "exact": bool(exact),
+                }
+            )
+        return found
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM canonical").fetchone()[0]
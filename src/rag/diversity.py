@@ -0,0 +1,87 @@
+import numpy as np
+import pyarrow as pa
+
+
+def vectors_to_numpy(column) -> np.ndarray:
+    """A fixed-size-list vector column as an (n, dim) float32 matrix, zero-copy
+    where Arrow allows it."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    dim = column.type.list_size
+    return column.flatten().to_numpy(zero_copy_only=False).reshape(-1, dim)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def maximal_marginal_relevance(
+    query_vector,
+    vectors,
+    k: int,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.95,
+    relevance=None,
+) -> list[int]:
+    """Pick `k` candidates that are relevant to the query but not to each other.
+
+    Each step takes the candidate maximizing
+    `lambda_mult * sim(query, c) - (1 - lambda_mult) * max sim(c, selected)`,
+    where `sim(query, c)` is the cosine similarity unless `relevance` gives
+    the candidates' scores from the search that found them.
+    Candidates whose cosine similarity to an already selected one reaches
+    `duplicate_threshold` are dropped outright, so fewer than `k` indices are
+    returned when the candidates are mostly near-duplicates.
+
+    The pairwise similarities of the candidates come from one matrix product;
+    for the few dozen candidates of a query this takes well under a millisecond.
+
+    Args:
+        query_vector: Query embedding
+        vectors: Candidate embeddings, one row per candidate
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        duplicate_threshold: Cosine similarity at which a candidate counts as
+            a duplicate of a selected one
+        relevance: Query relevance per candidate on a 0-1 scale, e.g. the
+            normalized fused score of a hybrid search; the vectors are then
+            only used for the redundancy term
+
+    Returns:
+        list[int]: Indices into `vectors`, in selection order
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if k <= 0 or len(vectors) == 0:
+        return []
+    vectors = _normalize(vectors)
+    if relevance is None:
+        relevance = vectors @ _normalize(np.asarray(query_vector, dtype=np.float32))
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = max_similarity < duplicate_threshold
+    available[selected[0]] = False
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        available &= max_similarity < duplicate_threshold
+        available[best] = False
+    return selected
+
+
+def min_max_scale(scores) -> np.ndarray:
+    """Scores rescaled onto 0-1, to weigh them against cosine similarities."""
+    scores = np.asarray(scores, dtype=np.float32)
+    if scores.size == 0:
+        return scores
+    low, high = scores.min(), scores.max()
+    if high == low:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class BlobDocument:
+    """A PDF downloaded into memory, ready to be sent to a Docling worker."""
+
+    name: str
+    data: bytes
+
+    def to_stream(self):
+        """Wrap the bytes in a Docling DocumentStream (no temp file)."""
+        from io import BytesIO
+
+        from docling.datamodel.base_models import DocumentStream
+
+        return DocumentStream(name=self.name, stream=BytesIO(self.data))
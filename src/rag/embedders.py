@@ -0,0 +1,288 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+from lancedb.embeddings import TextEmbeddingFunction, get_registry, register
+from pydantic import PrivateAttr
+
+from rag import telemetry
+from rag.config import EMBEDDING_CACHE_PATH, EMBEDDING_MODEL
+
+# OpenAI's embedding endpoint accepts at most 2048 inputs and ~300k tokens per call
+MAX_BATCH_SIZE = 2048
+MAX_BATCH_TOKENS = 250_000
+
+
+@cache
+def _encoding():
+    from tiktoken import get_encoding
+
+    # text-embedding-3-* models use the cl100k_base encoding
+    return get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode_ordinary(text))
+
+
+def count_bytes(text: str) -> int:
+    """Upper bound of `count_tokens`: every token is at least one UTF-8 byte."""
+    return len(text.encode())
+
+
+class EmbeddingCache:
+    """Disk-backed vector cache with least-recently-used eviction.
+
+    Vectors are stored in SQLite as raw float32 bytes, keyed by a hash of
+    (model, dimensions, text).
+    """
+
+    def __init__(self, path: Path, max_entries: int = 1_000_000):
+        """Open or create the cache.
+
+        Args:
+            path: SQLite file
+            max_entries: Number of vectors kept before the oldest are evicted
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        # Kept up to date by put_many, so eviction checks need no table scan
+        (self._count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()
+
+    @staticmethod
+    def key(model: str, dim: int | None, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{dim}\x00{text}".encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Look up vectors and mark them as recently used."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(set(keys) - set(found))
+        return found
+
+    def _count_existing(self, keys: list[str]) -> int:
+        existing = 0
+        for i in range(0, len(keys), 500):
+            batch = keys[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            (found,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchone()
+            existing += found
+        return existing
+
+    def put_many(self, items: dict[str, np.ndarray]):
+        """Store vectors, evicting the least recently used beyond capacity."""
+        now = time.time()
+        with self._lock:
+            self._count += len(items) - self._count_existing(list(items))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            if self._count > self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,),
+                ).rowcount
+                self._count -= evicted
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_caches: dict[tuple[str, int], EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path: str, max_entries: int) -> EmbeddingCache:
+    """Share one cache connection per file within the process."""
+    with _caches_lock:
+        shared = _caches.get((path, max_entries))
+        if shared is None:
+            shared = _caches[(path, max_entries)] = EmbeddingCache(path, max_entries)
+        return shared
+
+
+def token_batches(
+    texts: list[str],
+    count_tokens,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_batch_size: int = MAX_BATCH_SIZE,
+):
+    """Split texts into batches that fit the embedding endpoint's limits.
+
+    Args:
+        texts: Texts to embed
+        count_tokens: Function returning the token count of a text
+        max_batch_tokens: Maximum total tokens per batch
+        max_batch_size: Maximum number of texts per batch
+
+    Yields:
+        list[int]: Indices into `texts` for each batch
+    """
+    batch, batch_tokens = [], 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if batch and (
+            batch_tokens + n > max_batch_tokens or len(batch) >= max_batch_size
+        ):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += n
+    if batch:
+        yield batch
+
+
+@register("cached")
+class CachedEmbeddings(TextEmbeddingFunction):
+    """Embedding function that puts a persistent cache in front of another.
+
+    The wrapped function is looked up in the LanceDB registry by `source`, so
+    the table schema records only plain settings and can be reopened anywhere
+    this module has been imported.
+    """
+
+    source: str = "openai"
+    name: str = EMBEDDING_MODEL
+    dim: int | None = None
+    cache_path: str = str(EMBEDDING_CACHE_PATH)
+    max_entries: int = 1_000_000
+    max_batch_tokens: int = MAX_BATCH_TOKENS
+    max_batch_size: int = MAX_BATCH_SIZE
+    _inner = PrivateAttr(default=None)
+
+    @property
+    def inner(self) -> TextEmbeddingFunction:
+        if self._inner is None:
+            kwargs = {"name": self.name}
+            if self.dim is not None:
+                kwargs["dim"] = self.dim
+            self._inner = get_registry().get(self.source).create(**kwargs)
+        return self._inner
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return get_cache(self.cache_path, self.max_entries)
+
+    def ndims(self) -> int:
+        return self.inner.ndims()
+
+    def generate_embeddings(self, texts) -> list[np.ndarray]:
+        """Return cached vectors and embed only the misses, in token-aware batches."""
+        texts = list(texts)
+        model = f"{self.source}/{self.name}"
+        keys = [EmbeddingCache.key(model, self.dim, text) for text in texts]
+        found = self.cache.get_many(keys)
+        telemetry.count("embedding_cache_hit", len(found))
+        telemetry.count("embedding_cache_miss", len(keys) - len(found))
+
+        # Embed each distinct missing text once
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            miss_keys, miss_texts = list(missing), list(missing.values())
+            # Skip the tokenizer when even the byte counts fit in one batch
+            counter = count_tokens
+            if sum(map(count_bytes, miss_texts)) <= self.max_batch_tokens:
+                counter = count_bytes
+            computed = {}
+            for batch in token_batches(
+                miss_texts,
+                counter,
+                self.max_batch_tokens,
+                self.max_batch_size,
+            ):
+                with telemetry.span("embed", texts=len(batch)):
+                    vectors = self.inner.generate_embeddings(
+                        [miss_texts[i] for i in batch]
+                    )
+                for i, vector in zip(batch, vectors):
+                    computed[miss_keys[i]] = np.asarray(vector, dtype=np.float32)
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+
+_WORD = re.compile(r"\w+")
+
+
+@register("fake")
+class FakeEmbeddings(TextEmbeddingFunction):
+    """Deterministic, offline stand-in for the OpenAI embedding function.
+
+    Each word is hashed into one of `dim` buckets, giving normalized
+    bag-of-words vectors. Texts that share words end up close together, which
+    is enough to exercise retrieval without network access.
+    """
+
+    name: str = "fake"
+    dim: int = 64
+    _num_calls: int = PrivateAttr(default=0)
+
+    @property
+    def num_calls(self) -> int:
+        return self._num_calls
+
+    def ndims(self) -> int:
+        return self.dim
+
+    def generate_embeddings(self, texts) -> list[np.ndarray]:
+        self._num_calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(str(text).lower()):
+                digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return list(vectors / norms)
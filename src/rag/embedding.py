@@ -1,123 +1,18 @@
-from pathlib import Path
-from typing import List
-
-import lancedb
-from docling.chunking import HybridChunker
-from docling.document_converter import DocumentConverter
-from dotenv import load_dotenv
-from lancedb.embeddings import get_registry
-from lancedb.pydantic import LanceModel, Vector
-from openai import OpenAI
-from transformers import AutoTokenizer
-
-# from docling.tokenizers import OpenAITokenizerWrapper
-
-hf_tok = AutoTokenizer.from_pretrained("bert-base-uncased", use_fast=True)
-
-load_dotenv()
-
-# Initialize OpenAI client (make sure you have OPENAI_API_KEY in your environment variables)
-client = OpenAI()
-
-tokenizer = hf_tok
-# tokenizer = OpenAITokenizerWrapper()  # Load our custom tokenizer for OpenAI
-MAX_TOKENS = 4000  # text-embedding-3-large's maximum context length
-
-
-# --------------------------------------------------------------
-# Extract the data
-# --------------------------------------------------------------
-
-converter = DocumentConverter()
-
-pdf_dir = Path(__file__).parent.parent / "pdfs" / "arzani.pdf"
-result = converter.convert(pdf_dir)
-
-# result = converter.convert("https://arxiv.org/pdf/2408.09869")
-
-
-# --------------------------------------------------------------
-# Apply hybrid chunking
-# --------------------------------------------------------------
-
-chunker = HybridChunker(
-    tokenizer=tokenizer,
-    max_tokens=MAX_TOKENS,
-    merge_peers=True,
-)
-
-chunk_iter = chunker.chunk(dl_doc=result.document)
-chunks = list(chunk_iter)
+from rag.config import PDF_DIR
+from rag.ingestion import ingest, open_table
 
 # --------------------------------------------------------------
-# Create a LanceDB database and table
+# Extract, chunk and embed one article into a fresh table
 # --------------------------------------------------------------
 
-# Create a LanceDB database
-db = lancedb.connect("data/lancedb")
+if __name__ == "__main__":
+    # Create a LanceDB table (chunks are embedded on `table.add`)
+    table = open_table(overwrite=True)
+    report = ingest([PDF_DIR / "arzani.pdf"], table, workers=1)
+    print(report.summary())
 
+    # --------------------------------------------------------------
+    # Load the table
+    # --------------------------------------------------------------
 
-# Get the OpenAI embedding function
-func = get_registry().get("openai").create(name="text-embedding-3-large")
-
-
-# Define a simplified metadata schema
-class ChunkMetadata(LanceModel):
-    """
-    You must order the fields in alphabetical order.
-    This is a requirement of the Pydantic implementation.
-    """
-
-    filename: str | None
-    page_numbers: List[int] | None
-    title: str | None
-
-
-# Define the main Schema
-class Chunks(LanceModel):
-    text: str = func.SourceField()
-    vector: Vector(func.ndims()) = func.VectorField()  # type: ignore
-    metadata: ChunkMetadata
-
-
-table = db.create_table("docling", schema=Chunks, mode="overwrite")
-
-# --------------------------------------------------------------
-# Prepare the chunks for the table
-# --------------------------------------------------------------
-
-# Create table with processed chunks
-processed_chunks = [
-    {
-        "text": chunk.text,
-        "metadata": {
-            "filename": chunk.meta.origin.filename,
-            "page_numbers": [
-                page_no
-                for page_no in sorted(
-                    set(
-                        prov.page_no
-                        for item in chunk.meta.doc_items
-                        for prov in item.prov
-                    )
-                )
-            ]
-            or None,
-            "title": chunk.meta.headings[0] if chunk.meta.headings else None,
-        },
-    }
-    for chunk in chunks
-]
-
-# --------------------------------------------------------------
-# Add the chunks to the table (automatically embeds the text)
-# --------------------------------------------------------------
-
-table.add(processed_chunks)
-
-# --------------------------------------------------------------
-# Load the table
-# --------------------------------------------------------------
-
-table.to_pandas()
-table.count_rows()
+    print(f"{table.count_rows()} rows in the table")
@@ -0,0 +1,316 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from rag.config import MAX_TOKENS, TOKENIZER_NAME
+from rag.indexing import INDEX_TYPES, IndexParams, build_text_index, build_vector_index
+from rag.retrieval import (
+    SEARCH_MODES,
+    RetrievedChunk,
+    SearchOptions,
+    embed_queries,
+    retrieve_many,
+)
+from rag.timing import latency_summary
+
+# Index setting that leaves the table's vector index as it is
+CURRENT_INDEX = "current"
+
+
+@dataclass
+class LabeledQuestion:
+    """A benchmark question and the chunks that answer it.
+
+    Relevant chunks are named by id, which is stable for one chunker setting,
+    or by source ({"filename": ..., "page": ...}, page optional), which still
+    matches after re-chunking with another MAX_TOKENS.
+    """
+
+    question: str
+    chunk_ids: list[str] = field(default_factory=list)
+    sources: list[dict] = field(default_factory=list)
+
+    @property
+    def num_relevant(self) -> int:
+        return len(self.chunk_ids) + len(self.sources)
+
+    def matches(self, chunk: RetrievedChunk) -> set:
+        """Labels satisfied by a retrieved chunk."""
+        found = {("id", chunk.id)} if chunk.id in self.chunk_ids else set()
+        for i, source in enumerate(self.sources):
+            page = source.get("page")
+            if chunk.filename == source["filename"] and (
+                page is None or page in (chunk.page_numbers or [])
+            ):
+                found.add(("source", i))
+        return found
+
+
+def load_labels(path: Path) -> list[LabeledQuestion]:
+    """Read labeled questions, one JSON object per line."""
+    with open(path) as fl:
+        return [LabeledQuestion(**json.loads(line)) for line in fl if line.strip()]
+
+
+def write_labels(labels: list[LabeledQuestion], path: Path):
+    with open(path, "w") as fl:
+        for label in labels:
+            fl.write(json.dumps(asdict(label)) + "\n")
+
+
+def recall_at_k(label: LabeledQuestion, chunks: list[RetrievedChunk], k: int) -> float:
+    """Fraction of the question's labels satisfied by the top k chunks."""
+    found = set().union(*(label.matches(chunk) for chunk in chunks[:k]))
+    return len(found) / label.num_relevant if label.num_relevant else 0.0
+
+
+def reciprocal_rank(label: LabeledQuestion, chunks: list[RetrievedChunk]) -> float:
+    """1 / rank of the first relevant chunk, 0 when none was retrieved."""
+    for rank, chunk in enumerate(chunks, start=1):
+        if label.matches(chunk):
+            return 1.0 / rank
+    return 0.0
+
+
+@dataclass
+class EvalReport:
+    num_questions: int
+    recall: dict[int, float]
+    mrr: float
+    embed_seconds: float
+    latency: dict
+    wall_seconds: float
+
+    def summary(self) -> str:
+        recall = ", ".join(f"R@{k}={value:.3f}" for k, value in self.recall.items())
+        return (
+            f"{recall}, MRR={self.mrr:.3f}; "
+            f"search p50={self.latency['p50_ms']:.1f}ms "
+            f"p99={self.latency['p99_ms']:.1f}ms, "
+            f"{self.num_questions} questions in {self.wall_seconds:.2f}s "
+            f"(embedding {self.embed_seconds:.2f}s)"
+        )
+
+
+def evaluate(
+    table,
+    labels: list[LabeledQuestion],
+    options: SearchOptions | None = None,
+    k_values: tuple[int, ...] = (1, 5, 10),
+    workers: int = 8,
+) -> EvalReport:
+    """Score retrieval on labeled questions.
+
+    All questions are embedded in one batch and searched in parallel with
+    `retrieve_many`; the latency percentiles are those of the searches alone.
+
+    Args:
+        table: LanceDB table object
+        labels: Questions with their relevant chunks
+        options: Retrieval settings under test
+        k_values: Cut-offs for recall@k; MRR is taken over the largest
+        workers: Searches run at the same time
+
+    Returns:
+        EvalReport: Mean recall@k, MRR and timings
+    """
+    options = options or SearchOptions()
+    questions = [label.question for label in labels]
+    start = time.perf_counter()
+    vectors = None
+    if options.mode != "fts" or options.diversify:
+        vectors = embed_queries(table, questions)
+    embed_seconds = time.perf_counter() - start
+
+    latencies: list[float] = []
+    results = retrieve_many(
+        table, questions, max(k_values), options, vectors, workers, latencies
+    )
+    pairs = list(zip(labels, results))
+    n = max(len(pairs), 1)
+    return EvalReport(
+        num_questions=len(labels),
+        recall={
+            k: sum(recall_at_k(label, chunks, k) for label, chunks in pairs) / n
+            for k in k_values
+        },
+        mrr=sum(reciprocal_rank(label, chunks) for label, chunks in pairs) / n,
+        embed_seconds=embed_seconds,
+        latency=latency_summary(latencies or [0.0]),
+        wall_seconds=time.perf_counter() - start,
+    )
+
+
+# --------------------------------------------------------------
+# Offline tables: fake embeddings, nothing leaves the machine
+# --------------------------------------------------------------
+
+
+def synthetic_labels(
+    rows: list[dict], count: int, seed: int = 0
+) -> list[LabeledQuestion]:
+    """Questions made of words from one synthetic chunk, labeled with that chunk."""
+    rng = random.Random(seed)
+    labels = []
+    for row in rng.sample(rows, min(count, len(rows))):
+        words = row["text"].split()
+        start = rng.randrange(max(1, len(words) - 8))
+        labels.append(
+            LabeledQuestion(" ".join(words[start : start + 8]), chunk_ids=[row["id"]])
+        )
+    return labels
+
+
+def build_pdf_table(
+    db_uri: str, pdfs: list[Path], max_tokens: int, tokenizer_name: str, func
+):
+    """Ingest PDFs into a fresh table with one chunker setting."""
+    from rag.articles import ArticleCatalog
+    from rag.ingestion import ingest, open_table
+
+    table = open_table(db_uri, overwrite=True, func=func)
+    report = ingest(
+        pdfs,
+        table,
+        articles=ArticleCatalog(),
+        tokenizer_name=tokenizer_name,
+        max_tokens=max_tokens,
+    )
+    if report.failed:
+        print(f"{len(report.failed)} PDFs failed to ingest")
+    build_text_index(table)
+    return table
+
+
+def main():
+    from rag.bench.common import write_json
+
+    parser = argparse.ArgumentParser(
+        description="Recall@k, MRR and latency of retrieval on labeled questions."
+    )
+    parser.add_argument(
+        "--labels",
+        type=Path,
+        default=None,
+        help='JSON lines {"question", "chunk_ids" and/or "sources"}',
+    )
+    corpus = parser.add_mutually_exclusive_group()
+    corpus.add_argument(
+        "--pdfs",
+        type=Path,
+        default=None,
+        help="ingest this folder into a temporary table per --max-tokens",
+    )
+    corpus.add_argument(
+        "--synthetic",
+        type=int,
+        default=None,
+        metavar="ROWS",
+        help="evaluate on synthetic chunks with generated questions",
+    )
+    parser.add_argument(
+        "--openai",
+        action="store_true",
+        help="embed --pdfs with the OpenAI model instead of the offline fake",
+    )
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument(
+        "--save-labels", type=Path, default=None, help="write the questions used"
+    )
+    parser.add_argument("--max-tokens", nargs="+", type=int, default=[MAX_TOKENS])
+    parser.add_argument("--tokenizer", default=TOKENIZER_NAME)
+    parser.add_argument(
+        "--index-types",
+        nargs="+",
+        choices=[CURRENT_INDEX, *INDEX_TYPES],
+        default=[CURRENT_INDEX],
+        help="vector indexes built on the temporary tables (current: leave as is)",
+    )
+    parser.add_argument("--modes", nargs="+", choices=SEARCH_MODES, default=["hybrid"])
+    parser.add_argument(
+        "--text-weights",
+        nargs="+",
+        type=float,
+        default=[1.0],
+        help="keyword weights tried in hybrid mode (vector weight 1.0)",
+    )
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 5, 10])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.labels is None and args.synthetic is None:
+        parser.error("--labels is required unless questions are generated (--synthetic)")
+    labels = load_labels(args.labels) if args.labels else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # (setting, table) pairs; setting is recorded with each result
+        if args.synthetic:
+            import lancedb
+
+            from rag.bench.suite import build_query_table
+            from rag.bench.synthetic import synthetic_chunks
+
+            table = build_query_table(lancedb.connect(tmp), args.synthetic)
+            if labels is None:
+                rows = synthetic_chunks(args.synthetic)
+                labels = synthetic_labels(rows, args.questions)
+            tables = [({"rows": args.synthetic}, table)]
+        elif args.pdfs:
+            from rag.bench.fakes import fake_embedding_function
+            from rag.schema import get_embedding_function
+
+            func = get_embedding_function() if args.openai else fake_embedding_function()
+            pdfs = sorted(args.pdfs.glob("*.pdf"))
+            tables = (
+                (
+                    {"max_tokens": max_tokens},
+                    build_pdf_table(
+                        str(Path(tmp) / f"max-tokens-{max_tokens}"),
+                        pdfs,
+                        max_tokens,
+                        args.tokenizer,
+                        func,
+                    ),
+                )
+                for max_tokens in args.max_tokens
+            )
+        else:
+            if args.index_types != [CURRENT_INDEX]:
+                parser.error("--index-types rebuilds indexes; use --pdfs or --synthetic")
+            from rag.resources import get_table
+
+            tables = [({}, get_table())]
+
+        if args.save_labels:
+            write_labels(labels, args.save_labels)
+        results = []
+        for setting, table in tables:
+            for index_type in args.index_types:
+                if index_type != CURRENT_INDEX:
+                    build_vector_index(table, IndexParams(index_type=index_type))
+                for mode in args.modes:
+                    weights = args.text_weights if mode == "hybrid" else [1.0]
+                    for text_weight in weights:
+                        options = SearchOptions(mode=mode, text_weight=text_weight)
+                        report = evaluate(
+                            table, labels, options, tuple(args.k), args.workers
+                        )
+                        params = {
+                            **setting,
+                            "index_type": index_type,
+                            "mode": mode,
+                            "text_weight": text_weight,
+                        }
+                        results.append({**params, **asdict(report)})
+                        name = ", ".join(f"{k}={v}" for k, v in params.items())
+                        print(f"{name}: {report.summary()}")
+    write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
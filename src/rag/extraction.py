@@ -1,17 +1,20 @@
-from pathlib import Path
+from rag.config import PDF_DIR
+from rag.resources import get_converters
 
-from docling.document_converter import DocumentConverter
 
-converter = DocumentConverter()
+def extract(pdf_path=PDF_DIR / "test.pdf"):
+    """Convert a PDF (or load its cached conversion) and return the Docling document."""
+    document, _, _ = get_converters().convert(pdf_path)
+    return document
+
 
 # --------------------------------------------------------------
 # Basic PDF extraction
 # --------------------------------------------------------------
-pdf_dir = Path(__file__).parent.parent / "pdfs" / "test.pdf"
-result = converter.convert(pdf_dir)
 
-document = result.document
-markdown_output = document.export_to_markdown()
-json_output = document.export_to_dict()
+if __name__ == "__main__":
+    document = extract()
+    markdown_output = document.export_to_markdown()
+    json_output = document.export_to_dict()
 
-print(markdown_output)
+    print(markdown_output)
@@ -0,0 +1,256 @@
+import argparse
+import math
+from dataclasses import dataclass
+from datetime import timedelta
+
+from rag.config import NPROBES, REFINE_FACTOR
+
+VECTOR_COLUMN = "vector"
+# Optional reduced-dimension copy of VECTOR_COLUMN (see rag.compression)
+SHORT_VECTOR_COLUMN = "vector_short"
+TEXT_COLUMN = "text"
+INDEX_TYPES = ("IVF_PQ", "IVF_HNSW_SQ", "IVF_HNSW_PQ")
+METRICS = ("cosine", "l2", "dot")
+# Scalar columns used in filters: BTREE for near-unique values, BITMAP for few
+SCALAR_INDEXES = {"doi": "BTREE", "year": "BITMAP", "journal": "BITMAP"}
+
+
+@dataclass
+class IndexParams:
+    """Build and query settings for the ANN index on the vector column.
+
+    `num_partitions` and `num_sub_vectors` are derived from the table size and
+    vector width when left unset.
+    """
+
+    index_type: str = "IVF_PQ"
+    metric: str = "cosine"
+    num_partitions: int | None = None
+    num_sub_vectors: int | None = None
+    m: int = 20
+    ef_construction: int = 300
+    nprobes: int = NPROBES
+    refine_factor: int | None = REFINE_FACTOR
+
+    def resolve(self, num_rows: int, dim: int) -> "IndexParams":
+        """Fill in partition and sub-vector counts for a table."""
+        num_partitions = self.num_partitions or max(1, int(math.sqrt(num_rows)))
+        num_sub_vectors = self.num_sub_vectors
+        if num_sub_vectors is None:
+            # 16 dims per PQ sub-vector, falling back to a divisor of the width
+            num_sub_vectors = next(
+                n for n in range(max(1, dim // 16), 0, -1) if dim % n == 0
+            )
+        return IndexParams(
+            index_type=self.index_type,
+            metric=self.metric,
+            num_partitions=num_partitions,
+            num_sub_vectors=num_sub_vectors,
+            m=self.m,
+            ef_construction=self.ef_construction,
+            nprobes=self.nprobes,
+            refine_factor=self.refine_factor,
+        )
+
+
+def vector_dim(table, column: str = VECTOR_COLUMN) -> int:
+    return table.schema.field(column).type.list_size
+
+
+def vector_index_name(table, column: str = VECTOR_COLUMN) -> str | None:
+    """Name of the index on a vector column, if there is one."""
+    for index in table.list_indices():
+        if column in index.columns:
+            return index.name
+    return None
+
+
+def index_metric(table, column: str = VECTOR_COLUMN) -> str:
+    """Metric the index on a vector column was built with.
+
+    Queries must search with it: an l2 or dot index searched with cosine
+    ranks by a distance it was not built for. Unindexed columns are searched
+    exhaustively with the default metric.
+    """
+    name = vector_index_name(table, column)
+    if name is None:
+        return IndexParams.metric
+    return table.index_stats(name).distance_type.lower()
+
+
+def build_vector_index(
+    table, params: IndexParams | None = None, column: str = VECTOR_COLUMN
+) -> IndexParams:
+    """Build (or replace) the ANN index on a vector column.
+
+    Args:
+        table: LanceDB table object
+        params: Index settings, defaults derived from the table
+        column: Vector column to index
+
+    Returns:
+        IndexParams: The settings actually used
+    """
+    params = (params or IndexParams()).resolve(
+        table.count_rows(), vector_dim(table, column)
+    )
+    table.create_index(
+        metric=params.metric,
+        num_partitions=params.num_partitions,
+        num_sub_vectors=params.num_sub_vectors,
+        vector_column_name=column,
+        replace=True,
+        index_type=params.index_type,
+        m=params.m,
+        ef_construction=params.ef_construction,
+    )
+    return params
+
+
+def secondary_index_names(table) -> list[str]:
+    """Names of every index but the vector one: full-text, scalar, short vectors."""
+    vector = vector_index_name(table)
+    return [index.name for index in table.list_indices() if index.name != vector]
+
+
+def unindexed_ratio(table, name: str | None = None) -> float:
+    """Fraction of rows not yet covered by an index (1.0 if there is none).
+
+    Args:
+        table: LanceDB table object
+        name: Index name; the vector index by default
+    """
+    name = name or vector_index_name(table)
+    if name is None:
+        return 1.0
+    stats = table.index_stats(name)
+    total = stats.num_indexed_rows + stats.num_unindexed_rows
+    return stats.num_unindexed_rows / total if total else 0.0
+
+
+def refresh_vector_index(
+    table,
+    params: IndexParams | None = None,
+    rebuild_ratio: float = 0.2,
+    cleanup_older_than: timedelta | None = None,
+) -> str:
+    """Keep the vector index in step with a growing table.
+
+    New rows are folded into the existing index incrementally. Once more than
+    `rebuild_ratio` of the table is unindexed the partitions no longer fit the
+    data, so the index is rebuilt from scratch instead. The incremental update
+    runs `table.optimize()`, which also compacts the table and prunes the
+    versions older than `cleanup_older_than`.
+
+    Args:
+        table: LanceDB table object
+        params: Index settings used for a (re)build
+        rebuild_ratio: Unindexed fraction above which the index is rebuilt
+        cleanup_older_than: Age from which old versions may be pruned; None
+            keeps LanceDB's default of 7 days
+
+    Returns:
+        str: "built", "updated" or "unchanged"
+    """
+    ratio = unindexed_ratio(table)
+    if ratio > rebuild_ratio:
+        build_vector_index(table, params)
+        return "built"
+    if ratio > 0:
+        table.optimize(cleanup_older_than=cleanup_older_than)
+        return "updated"
+    return "unchanged"
+
+
+def text_index_name(table) -> str | None:
+    """Name of the full-text index on the text column, if there is one."""
+    for index in table.list_indices():
+        if TEXT_COLUMN in index.columns and "fts" in str(index.index_type).lower():
+            return index.name
+    return None
+
+
+def build_text_index(table):
+    """Build (or replace) the BM25 full-text index on the text column.
+
+    New rows are only searchable by keyword once the index is rebuilt or
+    refreshed with `table.optimize()`.
+    """
+    table.create_fts_index(TEXT_COLUMN, use_tantivy=False, replace=True)
+
+
+def build_scalar_indexes(table) -> list[str]:
+    """Build (or replace) the scalar indexes of SCALAR_INDEXES present in the table.
+
+    With them, `where` filters on these columns are answered from the index
+    instead of scanning the column, which is what makes pre-filtering a
+    vector search cheap. Like the other indexes they cover new rows once
+    refreshed with `table.optimize()`.
+
+    Returns:
+        list[str]: Indexed columns
+    """
+    columns = [name for name in SCALAR_INDEXES if name in table.schema.names]
+    for name in columns:
+        table.create_scalar_index(name, index_type=SCALAR_INDEXES[name], replace=True)
+    return columns
+
+
+def apply_search_params(query, params: IndexParams | None = None):
+    """Set the metric, nprobes and refine_factor on a vector query."""
+    params = params or IndexParams()
+    query = query.distance_type(params.metric).nprobes(params.nprobes)
+    if params.refine_factor:
+        query = query.refine_factor(params.refine_factor)
+    return query
+
+
+def main():
+    from rag.ingestion import open_table
+
+    parser = argparse.ArgumentParser(description="Manage the docling vector index.")
+    parser.add_argument(
+        "command", choices=["build", "refresh", "fts", "scalar", "stats"]
+    )
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="IVF_PQ")
+    parser.add_argument("--metric", choices=METRICS, default="cosine")
+    parser.add_argument("--num-partitions", type=int, default=None)
+    parser.add_argument("--num-sub-vectors", type=int, default=None)
+    parser.add_argument("--m", type=int, default=20)
+    parser.add_argument("--ef-construction", type=int, default=300)
+    parser.add_argument("--rebuild-ratio", type=float, default=0.2)
+    parser.add_argument(
+        "--column",
+        choices=[VECTOR_COLUMN, SHORT_VECTOR_COLUMN],
+        default=VECTOR_COLUMN,
+        help="vector column for `build` (IVF_HNSW_SQ stores it as int8)",
+    )
+    args = parser.parse_args()
+
+    table = open_table()
+    params = IndexParams(
+        index_type=args.index_type,
+        metric=args.metric,
+        num_partitions=args.num_partitions,
+        num_sub_vectors=args.num_sub_vectors,
+        m=args.m,
+        ef_construction=args.ef_construction,
+    )
+    if args.command == "build":
+        print(f"Built index: {build_vector_index(table, params, args.column)}")
+    elif args.command == "refresh":
+        print(f"Index {refresh_vector_index(table, params, args.rebuild_ratio)}.")
+    elif args.command == "fts":
+        build_text_index(table)
+        print("Built full-text index.")
+    elif args.command == "scalar":
+        print(f"Built scalar indexes on: {', '.join(build_scalar_indexes(table))}")
+    name = vector_index_name(table)
+    if name is None:
+        print(f"No vector index; {table.count_rows()} rows are scanned per query.")
+    else:
+        print(table.index_stats(name))
+
+
+if __name__ == "__main__":
+    main()
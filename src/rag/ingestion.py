@@ -0,0 +1,886 @@
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import lancedb
+import pyarrow as pa
+
+from rag import telemetry
+from rag.articles import ArticleCatalog, add_article_columns
+from rag.compression import add_short_vectors
+from rag.config import (
+    ARTICLE_METADATA_PATH,
+    CONVERSION_CACHE_DIR,
+    DB_URI,
+    DOCLING_PROFILE,
+    MAX_TOKENS,
+    PDF_DIR,
+    SHARD_PAGES,
+    TABLE_NAME,
+    TOKENIZER_NAME,
+)
+from rag.conversion_cache import pdf_digest
+from rag.dedup import DEDUP_INDEX_PATH, ChunkDeduplicator, DedupStats
+from rag.documents import BlobDocument
+from rag.indexing import SHORT_VECTOR_COLUMN, VECTOR_COLUMN
+from rag.manifest import Manifest
+from rag.pipelines import (
+    AUTO,
+    PROFILES,
+    ProfileConverters,
+    inspect_pdf,
+    merge_documents,
+    page_ranges,
+    resolve_profile,
+)
+from rag.schema import (
+    assign_chunk_ids,
+    build_chunks_schema,
+    chunk_to_record,
+    get_embedding_function,
+    sql_quote,
+)
+
+# --------------------------------------------------------------
+# Worker side: one converter and chunker per process
+# --------------------------------------------------------------
+
+_chunker = None
+_converters = ProfileConverters()
+_cache_only = False
+
+
+# tiktoken encodings, chunked through the memoized OpenAITokenizerWrapper
+OPENAI_ENCODINGS = ("cl100k_base", "o200k_base")
+
+
+def build_chunker(tokenizer_name: str = TOKENIZER_NAME, max_tokens: int = MAX_TOKENS):
+    """HybridChunker for a HuggingFace tokenizer name or a tiktoken encoding."""
+    from docling.chunking import HybridChunker
+
+    if tokenizer_name in OPENAI_ENCODINGS:
+        from rag.utils.tokenizer import OpenAITokenizerWrapper
+
+        tokenizer = OpenAITokenizerWrapper(tokenizer_name).for_chunker(max_tokens)
+        return HybridChunker(tokenizer=tokenizer, merge_peers=True)
+
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+    return HybridChunker(tokenizer=tokenizer, max_tokens=max_tokens, merge_peers=True)
+
+
+def _init_worker(
+    tokenizer_name: str,
+    max_tokens: int,
+    cache_only: bool = False,
+    profile: str = DOCLING_PROFILE,
+    cache_dir: Path = CONVERSION_CACHE_DIR,
+):
+    """Build the chunker once per worker; converters are built per profile on use."""
+    global _chunker, _converters, _cache_only
+
+    _chunker = build_chunker(tokenizer_name, max_tokens)
+    _converters = ProfileConverters(profile, cache_dir)
+    _cache_only = cache_only
+
+
+@dataclass
+class ShardResult:
+    """A page range of a large PDF, converted on its own worker."""
+
+    page_range: tuple[int, int]
+    document: dict | None = None
+    seconds: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class DocumentResult:
+    """Chunks and timings for a single converted PDF."""
+
+    path: Path
+    records: list[dict] = field(default_factory=list)
+    num_pages: int = 0
+    num_chunks: int = 0
+    convert_seconds: float = 0.0
+    chunk_seconds: float = 0.0
+    cached: bool = False
+    profile: str | None = None
+    num_shards: int = 1
+    error: str | None = None
+
+    @property
+    def seconds(self) -> float:
+        return self.convert_seconds + self.chunk_seconds
+
+
+def _convert_shard(
+    source: Path | BlobDocument, profile: str, page_range: tuple[int, int]
+) -> ShardResult:
+    """Convert one page range of a PDF inside a worker."""
+    shard = ShardResult(page_range=page_range)
+    try:
+        converter, _ = _converters.get(profile)
+        stream = source.to_stream() if isinstance(source, BlobDocument) else source
+        start = time.perf_counter()
+        result = converter.convert(stream, page_range=page_range)
+        shard.document = result.document.export_to_dict()
+        shard.seconds = time.perf_counter() - start
+    except Exception as e:  # reported when the shards are merged
+        shard.error = f"{type(e).__name__}: {e}"
+    return shard
+
+
+def _convert(
+    source: Path | BlobDocument, profile: str | None, shards: list[ShardResult] | None
+) -> tuple:
+    """A whole document: from the cache, a fresh conversion or merged shards."""
+    if shards is None:
+        return _converters.convert(source, profile, cache_only=_cache_only)
+
+    for shard in shards:
+        if shard.error:
+            first, last = shard.page_range
+            raise RuntimeError(f"pages {first}-{last}: {shard.error}")
+    document = merge_documents([shard.document for shard in shards])
+    _, cache = _converters.get(profile)
+    cache.put(pdf_digest(source), document)
+    return document, False, profile
+
+
+def _process_pdf(
+    source: Path | BlobDocument,
+    profile: str | None = None,
+    shards: list[ShardResult] | None = None,
+) -> DocumentResult:
+    """Convert and chunk one PDF (a file or in-memory blob) inside a worker.
+
+    Args:
+        source: PDF file or downloaded blob
+        profile: Concrete Docling profile, or None to use the worker's
+            (resolving "auto" per PDF)
+        shards: Converted page ranges to merge instead of converting
+    """
+    path = Path(source.name) if isinstance(source, BlobDocument) else source
+    doc = DocumentResult(path=path)
+    try:
+        start = time.perf_counter()
+        document, doc.cached, doc.profile = _convert(source, profile, shards)
+        doc.convert_seconds = time.perf_counter() - start
+        if shards:
+            doc.convert_seconds += sum(shard.seconds for shard in shards)
+            doc.num_shards = len(shards)
+        doc.num_pages = len(document.pages)
+
+        start = time.perf_counter()
+        doc.records = assign_chunk_ids(
+            [chunk_to_record(chunk) for chunk in _chunker.chunk(dl_doc=document)]
+        )
+        doc.chunk_seconds = time.perf_counter() - start
+        doc.num_chunks = len(doc.records)
+    except Exception as e:  # keep the pool alive when a single PDF is broken
+        doc.error = f"{type(e).__name__}: {e}"
+    return doc
+
+
+# --------------------------------------------------------------
+# Driver side: bounded fan-out and batched writes
+# --------------------------------------------------------------
+
+
+@dataclass
+class _ShardGroup:
+    source: Path | BlobDocument
+    profile: str
+    shards: list[ShardResult | None]
+
+
+class _ShardPlanner:
+    """Decides in the driver which PDFs are split into page ranges.
+
+    A PDF is sharded when it has more than `shard_pages` pages and its
+    conversion is not cached yet. Only the page count and text layer are
+    read here (with pdfium); Docling is imported once, to fingerprint the
+    cache of each profile.
+    """
+
+    def __init__(
+        self, profile: str, shard_pages: int, cache_dir: Path = CONVERSION_CACHE_DIR
+    ):
+        self.profile = profile
+        self.shard_pages = shard_pages
+        self._converters = ProfileConverters(profile, cache_dir)
+
+    def plan(self, source: Path | BlobDocument) -> tuple[str, list] | None:
+        try:
+            info = inspect_pdf(source)
+        except Exception:
+            return None  # the worker reports the broken PDF
+        if info.num_pages <= self.shard_pages:
+            return None
+        profile = resolve_profile(self.profile, source, info)
+        _, cache = self._converters.get(profile)
+        if cache.path(pdf_digest(source)).exists():
+            return None
+        return profile, page_ranges(info.num_pages, self.shard_pages)
+
+
+def iter_documents(
+    pdf_paths: Iterable[Path | BlobDocument],
+    workers: int | None = None,
+    max_inflight: int | None = None,
+    tokenizer_name: str = TOKENIZER_NAME,
+    max_tokens: int = MAX_TOKENS,
+    cache_only: bool = False,
+    profile: str = DOCLING_PROFILE,
+    shard_pages: int = SHARD_PAGES,
+    cache_dir: Path = CONVERSION_CACHE_DIR,
+) -> Iterator[DocumentResult]:
+    """Convert and chunk PDFs in a process pool.
+
+    At most `max_inflight` tasks (whole documents, page-range shards and
+    merges) are queued or running at a time, and no further PDF is read
+    while that many are waiting, so the driver's memory stays bounded.
+    Results are yielded in completion order. Conversions go through the
+    persistent ConversionCache, so re-chunking a corpus skips Docling's
+    layout analysis for every PDF seen before.
+
+    PDFs longer than `shard_pages` are converted as page ranges on several
+    workers; once every range is done, one more task merges them (keeping
+    the original page numbers), caches the whole document and chunks it.
+
+    Args:
+        pdf_paths: PDFs to process, as paths or downloaded blobs
+        workers: Number of worker processes (defaults to the CPU count)
+        max_inflight: Maximum number of submitted but unconsumed tasks
+        tokenizer_name: HuggingFace tokenizer used by HybridChunker
+        max_tokens: Maximum tokens per chunk
+        cache_only: Only chunk cached conversions; other PDFs fail with
+            NotCached instead of being converted
+        profile: Docling pipeline profile, see rag.pipelines
+        shard_pages: Pages per shard of a large PDF; 0 disables sharding
+        cache_dir: Root directory of the conversion cache
+
+    Yields:
+        DocumentResult: One result per input PDF
+    """
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * workers
+    paths = iter(pdf_paths)
+    planner = None
+    if shard_pages > 0 and workers > 1 and not cache_only:
+        planner = _ShardPlanner(profile, shard_pages, cache_dir)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(tokenizer_name, max_tokens, cache_only, profile, cache_dir),
+    ) as pool:
+        # Tasks not submitted yet, and future -> None for whole documents or
+        # (group, index) for shards
+        queued: deque[tuple] = deque()
+        pending: dict = {}
+
+        def plan(source):
+            shard_plan = planner.plan(source) if planner else None
+            if shard_plan is None:
+                queued.append((_process_pdf, (source,), None))
+                return
+            shard_profile, ranges = shard_plan
+            group = _ShardGroup(source, shard_profile, [None] * len(ranges))
+            for index, page_range in enumerate(ranges):
+                args = (source, shard_profile, page_range)
+                queued.append((_convert_shard, args, (group, index)))
+
+        def submit():
+            while queued and len(pending) < max_inflight:
+                func, args, tag = queued.popleft()
+                pending[pool.submit(func, *args)] = tag
+
+        def collect(done) -> Iterator[DocumentResult]:
+            for future in done:
+                tag = pending.pop(future)
+                if tag is None:
+                    yield future.result()
+                    continue
+                group, index = tag
+                group.shards[index] = future.result()
+                if all(shard is not None for shard in group.shards):
+                    # Merge first: it frees the shards held for this document
+                    args = (group.source, group.profile, group.shards)
+                    queued.appendleft((_process_pdf, args, None))
+
+        for source in paths:
+            if not isinstance(source, BlobDocument):
+                source = Path(source)
+            plan(source)
+            submit()
+            while len(pending) + len(queued) >= max_inflight:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                yield from collect(done)
+                submit()
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            yield from collect(done)
+            submit()
+
+
+def record_document(doc: DocumentResult):
+    """Report a worker's conversion and chunking times as pipeline stages."""
+    if doc.error:
+        telemetry.count("documents_failed")
+        return
+    telemetry.count("documents_processed")
+    telemetry.count("conversion_cache_hit" if doc.cached else "conversion_cache_miss")
+    telemetry.observe("convert", doc.convert_seconds)
+    telemetry.observe("chunk", doc.chunk_seconds)
+
+
+@dataclass
+class IngestionReport:
+    """Per-document and overall throughput of an ingestion run."""
+
+    documents: list[DocumentResult] = field(default_factory=list)
+    num_chunks: int = 0
+    write_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    dedup: DedupStats | None = None
+
+    @property
+    def failed(self) -> list[DocumentResult]:
+        return [doc for doc in self.documents if doc.error]
+
+    def summary(self) -> str:
+        lines = []
+        for doc in self.documents:
+            if doc.error:
+                lines.append(f"  FAILED {doc.path.name}: {doc.error}")
+                continue
+            pages_per_sec = doc.num_pages / doc.seconds if doc.seconds else 0.0
+            notes = [doc.profile or "unknown profile"]
+            if doc.num_shards > 1:
+                notes.append(f"{doc.num_shards} shards")
+            if doc.cached:
+                notes.append("cached")
+            lines.append(
+                f"  {doc.path.name}: {doc.num_pages} pages, "
+                f"{doc.num_chunks} chunks, convert {doc.convert_seconds:.2f}s "
+                f"[{', '.join(notes)}], "
+                f"chunk {doc.chunk_seconds:.2f}s ({pages_per_sec:.2f} pages/s)"
+            )
+        wall = self.wall_seconds or float("inf")
+        lines.append(
+            f"{len(self.documents)} documents, {self.num_chunks} chunks in "
+            f"{self.wall_seconds:.2f}s ({len(self.documents) / wall:.2f} docs/s, "
+            f"{self.num_chunks / wall:.2f} chunks/s, writes {self.write_seconds:.2f}s)"
+        )
+        if self.dedup is not None:
+            lines.append(self.dedup.summary())
+        return "\n".join(lines)
+
+
+def backfill_chunk_ids(table) -> int:
+    """Give rows written before the id column the ids ingestion assigns them.
+
+    Rows are taken file by file in row-id order, the order in which they were
+    chunked and written, so `assign_chunk_ids` reproduces the ids a fresh
+    ingest would give them and `sync` can diff against them. Legacy rows have
+    no key an update could match them by, so the table is rewritten once,
+    vectors included, with the ids filled in; build its indexes again after.
+
+    Returns:
+        int: Rows given an id
+    """
+    if "id" not in table.schema.names:
+        table.add_columns({"id": "CAST(NULL AS STRING)"})
+    if not table.count_rows("id IS NULL"):
+        return 0
+    rows = (
+        table.search()
+        .with_row_id(True)
+        .limit(None)
+        .to_arrow()
+        .sort_by("_rowid")
+        .drop_columns(["_rowid"])
+    )
+    ids = rows["id"].to_pylist()
+    texts = rows["text"].to_pylist()
+    filenames = rows["metadata"].combine_chunks().field("filename").to_pylist()
+    files: dict[str | None, list[int]] = {}
+    for position, filename in enumerate(filenames):
+        files.setdefault(filename, []).append(position)
+    updated = 0
+    for filename, positions in files.items():
+        records = [
+            {"text": texts[i], "metadata": {"filename": filename}} for i in positions
+        ]
+        for position, record in zip(positions, assign_chunk_ids(records)):
+            if ids[position] is None:
+                ids[position] = record["id"]
+                updated += 1
+    id_field = rows.schema.field("id")
+    rows = rows.set_column(
+        rows.schema.get_field_index("id"), id_field, pa.array(ids, id_field.type)
+    )
+    table.add(rows, mode="overwrite")
+    return updated
+
+
+def open_table(db_uri: str = DB_URI, overwrite: bool = False, func=None):
+    """Open the docling table, creating it if needed.
+
+    Tables created before the id, doi, year and journal columns get them added
+    (see `backfill_chunk_ids`).
+
+    Args:
+        db_uri: LanceDB URI
+        overwrite: Drop any existing rows
+        func: Embedding function for a newly created table
+
+    Returns:
+        LanceDB table object
+    """
+    db = lancedb.connect(db_uri)
+    if not overwrite and TABLE_NAME in db.table_names():
+        table = db.open_table(TABLE_NAME)
+        if "id" not in table.schema.names or table.count_rows("id IS NULL"):
+            backfill_chunk_ids(table)
+        add_article_columns(table)
+        return table
+    schema = build_chunks_schema(func or get_embedding_function())
+    return db.create_table(TABLE_NAME, schema=schema, mode="overwrite")
+
+
+def ingest(
+    pdf_paths: Iterable[Path | BlobDocument],
+    table,
+    batch_size: int = 256,
+    workers: int | None = None,
+    max_inflight: int | None = None,
+    on_document=None,
+    cache_only: bool = False,
+    profile: str = DOCLING_PROFILE,
+    articles: ArticleCatalog | None = None,
+    tokenizer_name: str = TOKENIZER_NAME,
+    max_tokens: int = MAX_TOKENS,
+    dedup: ChunkDeduplicator | None = None,
+    cache_dir: Path = CONVERSION_CACHE_DIR,
+    shard_pages: int = SHARD_PAGES,
+) -> IngestionReport:
+    """Stream chunks from a pool of Docling workers into a LanceDB table.
+
+    Chunks are buffered until `batch_size` rows are ready and then written with
+    `table.add`, which also embeds them. Memory use is bounded by
+    `max_inflight` documents plus one batch, regardless of corpus size.
+
+    Args:
+        pdf_paths: PDFs to ingest, as paths or downloaded blobs
+        table: LanceDB table object
+        batch_size: Rows per `table.add` call
+        workers: Number of worker processes
+        max_inflight: Maximum number of documents buffered by the pool
+        on_document: Optional callback invoked with each DocumentResult
+        cache_only: Chunk only PDFs whose conversion is already cached
+        profile: Docling pipeline profile, see rag.pipelines
+        articles: DOI, year and journal per PDF, read from
+            ARTICLE_METADATA_PATH when omitted
+        tokenizer_name: Tokenizer of the chunker
+        max_tokens: Maximum tokens per chunk
+        dedup: Keep exact and near-duplicate chunks out of the table; they
+            are stored in the dedup index as references to the chunk they
+            repeat instead of being embedded. The index is committed after
+            each write, which then covers whole documents, and rolled back
+            when a write fails
+        cache_dir: Root directory of the conversion cache
+        shard_pages: Pages per shard of a large PDF; 0 disables sharding
+
+    Returns:
+        IngestionReport: Timings for the run
+    """
+    if articles is None:
+        articles = ArticleCatalog.load()
+    report = IngestionReport(dedup=dedup.stats if dedup else None)
+    batch: list[dict] = []
+    start = time.perf_counter()
+
+    def flush(rows: list[dict]):
+        write_start = time.perf_counter()
+        with telemetry.span("write", rows=len(rows)):
+            table.add(add_short_vectors(table, rows))
+        report.write_seconds += time.perf_counter() - write_start
+        report.num_chunks += len(rows)
+        telemetry.count("chunks_written", len(rows))
+
+    documents = iter_documents(
+        pdf_paths,
+        workers=workers,
+        max_inflight=max_inflight,
+        tokenizer_name=tokenizer_name,
+        max_tokens=max_tokens,
+        cache_only=cache_only,
+        profile=profile,
+        shard_pages=shard_pages,
+        cache_dir=cache_dir,
+    )
+    try:
+        for doc in documents:
+            report.documents.append(doc)
+            record_document(doc)
+            if on_document:
+                on_document(doc)
+            # Hand the rows over to the write buffer so the report stays small
+            records = articles.annotate(doc.records, doc.path.name)
+            if dedup is not None:
+                with telemetry.span("dedup", rows=len(records)):
+                    records, _ = dedup.split(records)
+            batch.extend(records)
+            doc.records = []
+            if dedup is not None:
+                # Write everything split so far, then make the split permanent
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch.clear()
+                    dedup.commit()
+                continue
+            while len(batch) >= batch_size:
+                flush(batch[:batch_size])
+                del batch[:batch_size]
+        if batch:
+            flush(batch)
+        if dedup is not None:
+            dedup.commit()
+    except BaseException:
+        if dedup is not None:
+            dedup.rollback()
+        raise
+
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+# --------------------------------------------------------------
+# Incremental sync: only the delta since the last run
+# --------------------------------------------------------------
+
+MANIFEST_PATH = Path(DB_URI) / f"{TABLE_NAME}.manifest.json"
+
+
+def chunker_settings(
+    tokenizer_name: str = TOKENIZER_NAME,
+    max_tokens: int = MAX_TOKENS,
+    profile: str = DOCLING_PROFILE,
+) -> dict:
+    """Settings that change the chunks produced for a given PDF."""
+    return {"tokenizer": tokenizer_name, "max_tokens": max_tokens, "profile": profile}
+
+
+@dataclass
+class SyncReport(IngestionReport):
+    """Ingestion report plus the changes applied to the table."""
+
+    num_unchanged: int = 0
+    removed: list[str] = field(default_factory=list)
+    num_inserted: int = 0
+    num_updated: int = 0
+    num_deleted: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{super().summary()}\n"
+            f"{self.num_unchanged} unchanged, {len(self.documents)} new or changed, "
+            f"{len(self.removed)} removed files; "
+            f"{self.num_inserted} chunks inserted, {self.num_updated} updated, "
+            f"{self.num_deleted} deleted"
+        )
+
+
+# Columns of a stored chunk that can change while its text (and id) stays
+_SYNCED_COLUMNS = ("metadata", "doi", "year", "journal")
+
+
+def _stored_rows(table, filename: str) -> dict[str, dict]:
+    """Rows of one file by id, with their vectors and `_SYNCED_COLUMNS`."""
+    columns = ["id", VECTOR_COLUMN, SHORT_VECTOR_COLUMN, *_SYNCED_COLUMNS]
+    rows = (
+        table.search()
+        .where(f"metadata.filename = {sql_quote(filename)}")
+        .select([name for name in columns if name in table.schema.names])
+        .limit(None)
+        .to_arrow()
+        .to_pylist()
+    )
+    return {row.pop("id"): row for row in rows}
+
+
+def _merge_rows(table, rows: list[dict]) -> pa.Table:
+    """Rows with their vectors, in the table's column order.
+
+    `table.add` embeds rows and orders their columns itself, but merge-insert
+    does not on every LanceDB release, so new rows are embedded up front.
+    """
+    if VECTOR_COLUMN not in rows[0]:
+        rows = add_short_vectors(table, rows)
+    if VECTOR_COLUMN not in rows[0]:
+        func = table.embedding_functions[VECTOR_COLUMN].function
+        vectors = func.compute_source_embeddings([row["text"] for row in rows])
+        rows = [{**row, VECTOR_COLUMN: vector} for row, vector in zip(rows, vectors)]
+    return pa.Table.from_pylist(rows, schema=table.schema)
+
+
+def _delete_ids(table, ids, batch_size: int = 1000):
+    ids = sorted(ids)
+    for i in range(0, len(ids), batch_size):
+        in_list = ", ".join(sql_quote(chunk_id) for chunk_id in ids[i : i + batch_size])
+        table.delete(f"id IN ({in_list})")
+
+
+def sync(
+    pdf_paths: Iterable[Path],
+    table,
+    manifest: Manifest,
+    batch_size: int = 256,
+    workers: int | None = None,
+    max_inflight: int | None = None,
+    on_document=None,
+    articles: ArticleCatalog | None = None,
+    shard_pages: int = SHARD_PAGES,
+) -> SyncReport:
+    """Bring the table in line with a set of PDFs, touching only the delta.
+
+    Unchanged PDFs (by content hash) are skipped. Rows of PDFs that are no
+    longer present are deleted. Changed PDFs are re-chunked; their chunks are
+    upserted by stable id, so only chunks with new text get embedded. Chunks
+    whose text is unchanged keep their stored vectors but take the new pages,
+    title and article columns, and chunks that disappeared are deleted. The
+    manifest is saved after every document, so an interrupted run picks up
+    where it stopped.
+
+    Args:
+        pdf_paths: PDFs that should be in the table
+        table: LanceDB table object with an `id` column
+        manifest: Manifest of what the table currently holds
+        batch_size: Rows per merge-insert call
+        workers: Number of worker processes
+        max_inflight: Maximum number of documents buffered by the pool
+        on_document: Optional callback invoked with each DocumentResult
+        articles: DOI, year and journal per PDF, read from
+            ARTICLE_METADATA_PATH when omitted
+        shard_pages: Pages per shard of a large PDF; 0 disables sharding
+
+    Returns:
+        SyncReport: Timings and changes for the run
+    """
+    if articles is None:
+        articles = ArticleCatalog.load()
+    report = SyncReport()
+    start = time.perf_counter()
+    pdf_paths = list(pdf_paths)
+
+    changed, report.removed = manifest.diff(pdf_paths)
+    report.num_unchanged = len(pdf_paths) - len(changed)
+    for name in report.removed:
+        table.delete(f"metadata.filename = {sql_quote(name)}")
+        manifest.forget(name)
+    manifest.save()
+
+    entries = {path: entry for path, entry in changed}
+    for doc in iter_documents(
+        entries,
+        workers=workers,
+        max_inflight=max_inflight,
+        tokenizer_name=manifest.settings["tokenizer"],
+        max_tokens=manifest.settings["max_tokens"],
+        profile=manifest.settings["profile"],
+        shard_pages=shard_pages,
+    ):
+        report.documents.append(doc)
+        record_document(doc)
+        if on_document:
+            on_document(doc)
+        if doc.error:
+            continue
+
+        write_start = time.perf_counter()
+        doc.records = articles.annotate(doc.records, doc.path.name)
+        stored = _stored_rows(table, doc.path.name)
+        current = {record["id"] for record in doc.records}
+        new_rows, moved_rows = [], []
+        for record in doc.records:
+            row = stored.get(record["id"])
+            if row is None:
+                new_rows.append(record)
+            elif any(
+                record.get(name) != row[name] for name in _SYNCED_COLUMNS if name in row
+            ):
+                # Same text on other pages or with new article columns
+                moved_rows.append({**row, **record})
+        stale = stored.keys() - current
+        if stale:
+            _delete_ids(table, stale)
+        # Moved rows carry their stored vectors, so only new text is embedded
+        for rows in (new_rows, moved_rows):
+            for i in range(0, len(rows), batch_size):
+                batch = _merge_rows(table, rows[i : i + batch_size])
+                with telemetry.span("write", rows=batch.num_rows):
+                    (
+                        table.merge_insert("id")
+                        .when_matched_update_all()
+                        .when_not_matched_insert_all()
+                        .execute(batch)
+                    )
+        telemetry.count("chunks_written", len(new_rows) + len(moved_rows))
+        report.write_seconds += time.perf_counter() - write_start
+
+        report.num_chunks += doc.num_chunks
+        report.num_inserted += len(new_rows)
+        report.num_updated += len(moved_rows)
+        report.num_deleted += len(stale)
+        doc.records = []
+
+        entry = entries[doc.path]
+        entry.num_chunks = doc.num_chunks
+        manifest.record(doc.path.name, entry)
+        manifest.save()
+
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest PDFs into LanceDB.")
+    parser.add_argument("paths", nargs="*", type=Path, help="PDFs or directories")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=256)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="rebuild the table; without it a full ingest needs an empty table",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only process new or changed PDFs and drop removed ones",
+    )
+    parser.add_argument(
+        "--from-blob",
+        metavar="CONTAINER",
+        help="stream PDFs from an Azure (or Azurite) container instead of disk",
+    )
+    parser.add_argument("--connection-string", default=None)
+    parser.add_argument(
+        "--profile",
+        choices=[*PROFILES, AUTO],
+        default=DOCLING_PROFILE,
+        help="Docling pipeline; auto runs OCR only on PDFs without a text layer",
+    )
+    parser.add_argument(
+        "--shard-pages",
+        type=int,
+        default=SHARD_PAGES,
+        help="convert PDFs longer than this in page ranges on several workers "
+        "(0: never)",
+    )
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="re-chunk cached conversions only; uncached PDFs are reported as failed",
+    )
+    parser.add_argument(
+        "--metadata",
+        type=Path,
+        default=ARTICLE_METADATA_PATH,
+        help="DOI, year and journal per article, from `harvest --metadata`",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="store exact and near-duplicate chunks as references, unembedded",
+    )
+    parser.add_argument(
+        "--maintain",
+        action="store_true",
+        help="afterwards compact, re-index and prune the table where needed",
+    )
+    args = parser.parse_args()
+    telemetry.configure()
+
+    if args.from_blob:
+        from rag.sources import get_container_client, iter_blob_documents
+
+        container_client = get_container_client(args.connection_string, args.from_blob)
+        names = [str(path) for path in args.paths] or None
+        pdf_paths = iter_blob_documents(container_client, names)
+    else:
+        pdf_paths = []
+        for path in args.paths or [PDF_DIR]:
+            if path.is_dir():
+                pdf_paths.extend(sorted(path.glob("*.pdf")))
+            else:
+                pdf_paths.append(path)
+
+    def on_document(doc: DocumentResult):
+        print(f"Processed {doc.path.name}")
+
+    if args.incremental:
+        if args.from_blob:
+            parser.error("--incremental works on local files only")
+        if args.cache_only:
+            parser.error("--cache-only re-chunks a full table, not an incremental sync")
+        if args.dedup:
+            # Deleting a canonical chunk would leave its references dangling
+            parser.error("--dedup works on full ingestion only")
+        table = open_table()
+        manifest = Manifest(MANIFEST_PATH, chunker_settings(profile=args.profile))
+        report = sync(
+            pdf_paths,
+            table,
+            manifest,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            on_document=on_document,
+            articles=ArticleCatalog.load(args.metadata),
+            shard_pages=args.shard_pages,
+        )
+    else:
+        table = open_table(overwrite=args.overwrite)
+        # Appending a second full ingest would store every chunk twice
+        if num_rows := table.count_rows():
+            parser.error(
+                f"the table already holds {num_rows} rows; pass --overwrite to "
+                "rebuild it or --incremental to add new and changed PDFs"
+            )
+        dedup = None
+        if args.dedup or DEDUP_INDEX_PATH.exists():
+            # The table starts out empty: references into old rows would dangle
+            dedup = ChunkDeduplicator()
+            dedup.clear()
+        report = ingest(
+            pdf_paths,
+            table,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            on_document=on_document,
+            cache_only=args.cache_only,
+            profile=args.profile,
+            articles=ArticleCatalog.load(args.metadata),
+            dedup=dedup if args.dedup else None,
+            shard_pages=args.shard_pages,
+        )
+    print(report.summary())
+    if args.maintain:
+        from rag.maintenance import maintain
+
+        print(maintain(table).summary())
+
+
+if __name__ == "__main__":
+    main()
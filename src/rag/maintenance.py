@@ -0,0 +1,386 @@
+import argparse
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from rag import telemetry
+from rag.config import (
+    MAINTENANCE_GRACE_HOURS,
+    MAINTENANCE_MAX_DISK_RATIO,
+    MAINTENANCE_MAX_OLD_VERSIONS,
+    MAINTENANCE_MAX_SMALL_FRAGMENTS,
+    MAINTENANCE_MAX_UNINDEXED,
+)
+from rag.indexing import (
+    TEXT_COLUMN,
+    VECTOR_COLUMN,
+    refresh_vector_index,
+    secondary_index_names,
+    unindexed_ratio,
+    vector_index_name,
+)
+from rag.retrieval import SearchOptions, search
+from rag.timing import latency_summary, timed
+
+# Run in this order: compaction rewrites fragments, the index update then folds
+# in what is left unindexed, and pruning drops the versions both superseded
+ACTIONS = ("compact", "index", "cleanup")
+
+
+def _stat(stats, name: str):
+    # Table.stats() returns dicts or dataclasses depending on the lancedb version
+    return stats[name] if isinstance(stats, dict) else getattr(stats, name)
+
+
+def _disk_bytes(table) -> int | None:
+    """Bytes of all versions of a local table; None for object storage."""
+    # Tables only have a `uri` from lancedb 0.25; the connection's is older
+    conn = getattr(table, "_conn", None)
+    if conn is None:
+        return None
+    uri = f"{conn.uri.rstrip('/')}/{table.name}.lance"
+    if "://" in uri and not uri.startswith("file://"):
+        return None
+    path = Path(uri.removeprefix("file://"))
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+@dataclass
+class TableHealth:
+    """What makes a table slower or larger than it needs to be."""
+
+    num_rows: int
+    num_fragments: int
+    num_small_fragments: int
+    num_versions: int
+    num_old_versions: int
+    unindexed_ratio: float | None
+    live_bytes: int
+    secondary_unindexed_ratio: float | None = None
+    disk_bytes: int | None = None
+
+    @property
+    def disk_ratio(self) -> float | None:
+        if self.disk_bytes is None or not self.live_bytes:
+            return None
+        return self.disk_bytes / self.live_bytes
+
+    def summary(self) -> str:
+        unindexed = (
+            "no vector index"
+            if self.unindexed_ratio is None
+            else f"{self.unindexed_ratio:.1%} unindexed"
+        )
+        if self.secondary_unindexed_ratio is not None:
+            unindexed += (
+                f" ({self.secondary_unindexed_ratio:.1%} by the other indexes)"
+            )
+        size = f"{self.live_bytes / 2**20:.1f} MiB live"
+        if self.disk_bytes is not None:
+            size += f", {self.disk_bytes / 2**20:.1f} MiB on disk"
+        return (
+            f"{self.num_rows} rows in {self.num_fragments} fragments "
+            f"({self.num_small_fragments} small), {unindexed}, "
+            f"{self.num_versions} versions ({self.num_old_versions} past the grace "
+            f"period), {size}"
+        )
+
+
+def table_health(table, grace_hours: float = MAINTENANCE_GRACE_HOURS) -> TableHealth:
+    """Fragment, index, version and size statistics of a table.
+
+    Args:
+        table: LanceDB table object
+        grace_hours: Age from which a version counts as old
+
+    Returns:
+        TableHealth: Current statistics
+    """
+    stats = table.stats()
+    fragments = _stat(stats, "fragment_stats")
+    versions = table.list_versions()
+    secondary = [unindexed_ratio(table, name) for name in secondary_index_names(table)]
+    old = 0
+    for version in versions[:-1]:  # the latest version is never pruned
+        stamp = version["timestamp"]
+        if stamp < datetime.now(stamp.tzinfo) - timedelta(hours=grace_hours):
+            old += 1
+    return TableHealth(
+        num_rows=_stat(stats, "num_rows"),
+        num_fragments=_stat(fragments, "num_fragments"),
+        num_small_fragments=_stat(fragments, "num_small_fragments"),
+        num_versions=len(versions),
+        num_old_versions=old,
+        unindexed_ratio=unindexed_ratio(table) if vector_index_name(table) else None,
+        live_bytes=_stat(stats, "total_bytes"),
+        secondary_unindexed_ratio=max(secondary) if secondary else None,
+        disk_bytes=_disk_bytes(table),
+    )
+
+
+@dataclass
+class MaintenancePolicy:
+    """Thresholds from which each maintenance action runs.
+
+    Attributes:
+        max_small_fragments: Small fragments tolerated before compaction
+        max_unindexed: Unindexed fraction of the rows tolerated before the
+            indexes are updated; tables without any are left alone
+        max_old_versions: Versions past the grace period tolerated before
+            pruning
+        max_disk_ratio: Bytes on disk per live byte tolerated before pruning
+        grace_hours: Versions younger than this are kept for running readers
+        rebuild_ratio: Unindexed fraction from which the index is rebuilt
+            rather than updated (see `refresh_vector_index`)
+    """
+
+    max_small_fragments: int = MAINTENANCE_MAX_SMALL_FRAGMENTS
+    max_unindexed: float = MAINTENANCE_MAX_UNINDEXED
+    max_old_versions: int = MAINTENANCE_MAX_OLD_VERSIONS
+    max_disk_ratio: float = MAINTENANCE_MAX_DISK_RATIO
+    grace_hours: float = MAINTENANCE_GRACE_HOURS
+    rebuild_ratio: float = 0.2
+
+    def plan(self, health: TableHealth) -> list[str]:
+        """Actions whose threshold the table has crossed, in ACTIONS order."""
+        actions = []
+        if health.num_small_fragments > self.max_small_fragments:
+            actions.append("compact")
+        if any(
+            ratio is not None and ratio > self.max_unindexed
+            for ratio in (health.unindexed_ratio, health.secondary_unindexed_ratio)
+        ):
+            actions.append("index")
+        disk_ratio = health.disk_ratio
+        if health.num_old_versions > self.max_old_versions or (
+            disk_ratio is not None
+            and disk_ratio > self.max_disk_ratio
+            and health.num_old_versions
+        ):
+            actions.append("cleanup")
+        return actions
+
+
+# --------------------------------------------------------------
+# Search latency probe
+# --------------------------------------------------------------
+
+
+def probe_queries(table, count: int = 20) -> list[tuple[str, list]]:
+    """Queries made of stored rows: their first words and their own vectors.
+
+    No embedding call is needed, and the same queries can be timed before and
+    after maintenance.
+    """
+    rows = table.search().select([TEXT_COLUMN, VECTOR_COLUMN]).limit(count).to_arrow()
+    texts = rows[TEXT_COLUMN].to_pylist()
+    vectors = rows[VECTOR_COLUMN].to_pylist()
+    return [
+        (" ".join(text.split()[:8]), vector) for text, vector in zip(texts, vectors)
+    ]
+
+
+def probe_latency(
+    table, queries: list[tuple[str, list]], num_results: int = 10, repeat: int = 3
+) -> dict:
+    """Latency of hybrid searches for `queries`, after one untimed warm-up pass."""
+    options = SearchOptions(mode="hybrid")
+    for text, vector in queries:
+        search(table, text, num_results, options, query_vector=vector)
+    latencies: list[float] = []
+    for _ in range(repeat):
+        for text, vector in queries:
+            with timed(latencies):
+                search(table, text, num_results, options, query_vector=vector)
+    return latency_summary(latencies or [0.0])
+
+
+# --------------------------------------------------------------
+# Maintenance run
+# --------------------------------------------------------------
+
+
+@dataclass
+class MaintenanceReport:
+    """Actions taken on a table and their effect."""
+
+    before: TableHealth
+    after: TableHealth | None = None
+    actions: dict[str, str] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+    latency_before: dict | None = None
+    latency_after: dict | None = None
+
+    def summary(self) -> str:
+        lines = [f"Before: {self.before.summary()}"]
+        if not self.actions:
+            lines.append("No threshold crossed; nothing to do.")
+            return "\n".join(lines)
+        for action, outcome in self.actions.items():
+            lines.append(f"  {action}: {outcome} ({self.seconds[action]:.2f}s)")
+        lines.append(f"After: {self.after.summary()}")
+        if self.latency_before and self.latency_after:
+            lines.append(
+                f"Search p50 {self.latency_before['p50_ms']:.1f}ms -> "
+                f"{self.latency_after['p50_ms']:.1f}ms, "
+                f"p99 {self.latency_before['p99_ms']:.1f}ms -> "
+                f"{self.latency_after['p99_ms']:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+def _run_action(table, action: str, policy: MaintenancePolicy) -> str:
+    if action == "compact":
+        metrics = table.compact_files()
+        return (
+            f"{metrics.fragments_removed} fragments rewritten as "
+            f"{metrics.fragments_added}"
+        )
+    if action == "index":
+        # The incremental update prunes versions too; keep the grace period
+        cleanup_older_than = timedelta(hours=policy.grace_hours)
+        outcomes, outcome = [], None
+        if vector_index_name(table):
+            outcome = refresh_vector_index(
+                table,
+                rebuild_ratio=policy.rebuild_ratio,
+                cleanup_older_than=cleanup_older_than,
+            )
+            outcomes.append(f"vector index {outcome}")
+        # Only the incremental update also folds new rows into the full-text
+        # and scalar indexes; after a rebuild, or without a vector index, they
+        # are updated here
+        if outcome != "updated" and secondary_index_names(table):
+            table.optimize(cleanup_older_than=cleanup_older_than)
+            outcomes.append("other indexes updated")
+        return ", ".join(outcomes)
+    stats = table.cleanup_old_versions(
+        older_than=timedelta(hours=policy.grace_hours), delete_unverified=False
+    )
+    return (
+        f"{stats.old_versions} old versions pruned, "
+        f"{stats.bytes_removed / 2**20:.1f} MiB freed"
+    )
+
+
+def maintain(
+    table,
+    policy: MaintenancePolicy | None = None,
+    force: bool = False,
+    probe: int = 20,
+) -> MaintenanceReport:
+    """Compact, re-index and prune a table where its thresholds are crossed.
+
+    Appending in batches leaves many small fragments, rows the vector index
+    does not cover (searched by brute force) and old versions on disk, and
+    search latency drifts upward. Each is checked against `policy` and only
+    the actions needed are run.
+
+    Args:
+        table: LanceDB table object
+        policy: Thresholds, from the MAINTENANCE_* settings by default
+        force: Run every action regardless of the thresholds; the index
+            action still needs an existing index, which it never builds
+        probe: Search latency is measured before and after with this many
+            queries taken from the table; 0 skips the measurement
+
+    Returns:
+        MaintenanceReport: Statistics before and after, and what was done
+    """
+    policy = policy or MaintenancePolicy()
+    report = MaintenanceReport(before=table_health(table, policy.grace_hours))
+    if force:
+        indexed = (
+            report.before.unindexed_ratio is not None
+            or report.before.secondary_unindexed_ratio is not None
+        )
+        actions = [action for action in ACTIONS if action != "index" or indexed]
+    else:
+        actions = policy.plan(report.before)
+    if not actions:
+        return report
+
+    queries = probe_queries(table, probe) if probe and report.before.num_rows else []
+    if queries:
+        report.latency_before = probe_latency(table, queries)
+    for action in actions:
+        start = time.perf_counter()
+        with telemetry.span("maintenance", action=action):
+            report.actions[action] = _run_action(table, action, policy)
+        report.seconds[action] = time.perf_counter() - start
+    report.after = table_health(table, policy.grace_hours)
+    if queries:
+        report.latency_after = probe_latency(table, queries)
+    return report
+
+
+def main():
+    from rag.ingestion import open_table
+
+    parser = argparse.ArgumentParser(
+        description="Compact, re-index and prune the docling table when needed."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the statistics and plan only"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="run every action, ignoring thresholds"
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="check the table again every SECONDS until interrupted",
+    )
+    parser.add_argument(
+        "--probe", type=int, default=20, help="latency probe queries (0: none)"
+    )
+    parser.add_argument(
+        "--max-small-fragments", type=int, default=MAINTENANCE_MAX_SMALL_FRAGMENTS
+    )
+    parser.add_argument(
+        "--max-unindexed", type=float, default=MAINTENANCE_MAX_UNINDEXED
+    )
+    parser.add_argument(
+        "--max-old-versions", type=int, default=MAINTENANCE_MAX_OLD_VERSIONS
+    )
+    parser.add_argument(
+        "--max-disk-ratio", type=float, default=MAINTENANCE_MAX_DISK_RATIO
+    )
+    parser.add_argument("--grace-hours", type=float, default=MAINTENANCE_GRACE_HOURS)
+    parser.add_argument("--rebuild-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+    telemetry.configure()
+
+    policy = MaintenancePolicy(
+        max_small_fragments=args.max_small_fragments,
+        max_unindexed=args.max_unindexed,
+        max_old_versions=args.max_old_versions,
+        max_disk_ratio=args.max_disk_ratio,
+        grace_hours=args.grace_hours,
+        rebuild_ratio=args.rebuild_ratio,
+    )
+    table = open_table()
+    if args.dry_run:
+        health = table_health(table, policy.grace_hours)
+        print(health.summary())
+        print(f"Planned: {', '.join(policy.plan(health)) or 'nothing'}")
+        return
+
+    while True:
+        report = maintain(table, policy, args.force, args.probe)
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {report.summary()}")
+        if args.watch is None:
+            return
+        try:
+            time.sleep(args.watch)
+        except KeyboardInterrupt:
+            return
+        # Pick up rows written by other processes since the last check
+        table.checkout_latest()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Hash a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fl:
+        while block := fl.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    """What the manifest remembers about one ingested PDF."""
+
+    sha256: str
+    size: int
+    mtime_ns: int
+    num_chunks: int = 0
+
+
+class Manifest:
+    """Content-hash manifest of the PDFs that are in the docling table.
+
+    The manifest also stores the chunker settings. If they change, every file
+    counts as changed, since its chunks would come out differently; files
+    listed under the old settings but gone from disk still count as removed.
+    """
+
+    def __init__(self, path: Path, settings: dict):
+        """Load the manifest from disk, or start an empty one.
+
+        Args:
+            path: JSON file holding the manifest
+            settings: Chunker settings the table is built with
+        """
+        self.path = Path(path)
+        self.settings = settings
+        self.files: dict[str, FileEntry] = {}
+        # Written under other chunker settings; reset by the first `diff`
+        self.stale = False
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.files = {
+                name: FileEntry(**entry)
+                for name, entry in data.get("files", {}).items()
+            }
+            self.stale = data.get("settings") != settings
+
+    def _entry_for(self, path: Path) -> FileEntry:
+        stat = path.stat()
+        known = self.files.get(path.name)
+        # Skip re-hashing when size and mtime are unchanged
+        if known and known.size == stat.st_size and known.mtime_ns == stat.st_mtime_ns:
+            return known
+        return FileEntry(
+            sha256=file_sha256(path), size=stat.st_size, mtime_ns=stat.st_mtime_ns
+        )
+
+    def diff(self, pdf_paths) -> tuple[list[tuple[Path, FileEntry]], list[str]]:
+        """Compare PDFs on disk against the manifest.
+
+        Args:
+            pdf_paths: PDFs that should be in the table
+
+        Returns:
+            tuple: (new or changed PDFs with their entries, names of removed PDFs)
+        """
+        changed = []
+        seen = set()
+        for path in map(Path, pdf_paths):
+            seen.add(path.name)
+            entry = self._entry_for(path)
+            known = self.files.get(path.name)
+            if self.stale or known is None or known.sha256 != entry.sha256:
+                changed.append((path, entry))
+            elif known is not entry:
+                # Same content, new mtime: remember it so the next run is cheap
+                entry.num_chunks = known.num_chunks
+                self.files[path.name] = entry
+        removed = sorted(set(self.files) - seen)
+        if self.stale:
+            # Every file is re-chunked; removals were taken from the old list
+            self.files = {name: self.files[name] for name in removed}
+            self.stale = False
+        return changed, removed
+
+    def record(self, name: str, entry: FileEntry):
+        self.files[name] = entry
+
+    def forget(self, name: str):
+        self.files.pop(name, None)
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run can resume."""
+        data = {
+            "settings": self.settings,
+            "files": {name: asdict(entry) for name, entry in self.files.items()},
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(data, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
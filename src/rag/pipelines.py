@@ -0,0 +1,242 @@
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from rag.config import CONVERSION_CACHE_DIR, DOCLING_PROFILE
+from rag.documents import BlobDocument
+
+# fast: text and layout only; tables: plus TableFormer; ocr: plus OCR of page images.
+# "auto" picks "tables", or "ocr" for PDFs without a usable text layer.
+PROFILES = ("fast", "tables", "ocr")
+AUTO = "auto"
+
+
+def pipeline_options(profile: str):
+    """Docling PDF pipeline options for a conversion profile."""
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown Docling profile {profile!r}, expected one of {PROFILES}")
+    options = PdfPipelineOptions()
+    options.do_ocr = profile == "ocr"
+    options.do_table_structure = profile != "fast"
+    return options
+
+
+def build_converter(profile: str = DOCLING_PROFILE):
+    """DocumentConverter for a profile ("auto" builds the full OCR pipeline).
+
+    Models are loaded on the first conversion, not here.
+    """
+    from docling.datamodel.base_models import InputFormat
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    options = pipeline_options("ocr" if profile == AUTO else profile)
+    return DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)}
+    )
+
+
+# --------------------------------------------------------------
+# Inspecting PDFs before conversion
+# --------------------------------------------------------------
+
+
+@dataclass
+class PdfInfo:
+    num_pages: int
+    needs_ocr: bool
+
+
+def inspect_pdf(
+    source: Path | BlobDocument, sample_pages: int = 3, min_chars_per_page: int = 200
+) -> PdfInfo:
+    """Count pages and check for a text layer with pdfium, without Docling.
+
+    Born-digital PDFs have extractable text on (nearly) every page; scans have
+    none or only a few characters of stamps and page numbers. A few pages
+    spread over the document are sampled.
+
+    Args:
+        source: PDF file or downloaded blob
+        sample_pages: Pages checked for text
+        min_chars_per_page: Average characters per sampled page below which
+            the PDF is treated as scanned
+
+    Returns:
+        PdfInfo: Page count and whether the PDF needs OCR
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source.data if isinstance(source, BlobDocument) else source)
+    try:
+        num_pages = len(pdf)
+        if num_pages == 0:
+            return PdfInfo(0, False)
+        step = max(1, num_pages // sample_pages)
+        sample = list(range(0, num_pages, step))[:sample_pages]
+        chars = 0
+        for index in sample:
+            page = pdf[index]
+            textpage = page.get_textpage()
+            chars += len(textpage.get_text_range().strip())
+            textpage.close()
+            page.close()
+        return PdfInfo(num_pages, chars / len(sample) < min_chars_per_page)
+    finally:
+        pdf.close()
+
+
+def resolve_profile(
+    profile: str, source: Path | BlobDocument, info: PdfInfo | None = None
+) -> str:
+    """The concrete profile for a PDF: "auto" becomes "ocr" or "tables".
+
+    `info` saves inspecting a PDF a second time.
+    """
+    if profile != AUTO:
+        return profile
+    info = info or inspect_pdf(source)
+    return "ocr" if info.needs_ocr else "tables"
+
+
+def page_ranges(num_pages: int, shard_pages: int) -> list[tuple[int, int]]:
+    """Split 1-based, inclusive page numbers into ranges of `shard_pages` pages."""
+    return [
+        (start, min(start + shard_pages - 1, num_pages))
+        for start in range(1, num_pages + 1, shard_pages)
+    ]
+
+
+# --------------------------------------------------------------
+# Converters per profile
+# --------------------------------------------------------------
+
+
+class ProfileConverters:
+    """Converter and conversion cache of each concrete profile, built on first use.
+
+    The cache is keyed by the fingerprint of the pipeline that converted a
+    PDF, so with "auto" the profile has to be resolved per PDF before the
+    cache is consulted: a born-digital PDF is converted, and looked up, with
+    the "tables" pipeline, not the OCR one.
+    """
+
+    def __init__(
+        self, profile: str = DOCLING_PROFILE, cache_dir: Path = CONVERSION_CACHE_DIR
+    ):
+        """Set up converters for a configured profile.
+
+        Args:
+            profile: A profile of PROFILES or "auto"
+            cache_dir: Root directory of the conversion cache
+        """
+        self.profile = profile
+        self.cache_dir = cache_dir
+        self._built: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: str) -> tuple:
+        """(converter, ConversionCache) of a concrete profile.
+
+        Models are loaded on the first conversion, so cache-only use stays light.
+        """
+        from rag.conversion_cache import ConversionCache
+
+        with self._lock:
+            if profile not in self._built:
+                converter = build_converter(profile)
+                cache = ConversionCache.for_converter(converter, self.cache_dir)
+                self._built[profile] = (converter, cache)
+            return self._built[profile]
+
+    def convert(
+        self,
+        source: Path | BlobDocument,
+        profile: str | None = None,
+        cache_only: bool = False,
+    ) -> tuple:
+        """Convert a PDF with the pipeline of its profile, reusing cached results.
+
+        Args:
+            source: PDF file or downloaded blob
+            profile: Profile for this PDF, the configured one when omitted;
+                "auto" is resolved from the PDF itself
+            cache_only: Raise NotCached instead of converting on a miss
+
+        Returns:
+            tuple: (DoclingDocument, whether it came from the cache, the
+            concrete profile)
+        """
+        profile = resolve_profile(profile or self.profile, source)
+        converter, cache = self.get(profile)
+        document, cached = cache.convert(converter, source, cache_only=cache_only)
+        return document, cached, profile
+
+
+# --------------------------------------------------------------
+# Merging page-range shards
+# --------------------------------------------------------------
+
+# Item lists of a DoclingDocument that are addressed as "#/<list>/<index>"
+ITEM_LISTS = ("groups", "texts", "pictures", "tables", "key_value_items", "form_items")
+_REF = re.compile(r"^#/(\w+)/(\d+)$")
+
+
+def _shift_ref(ref: str, offsets: dict[str, int]) -> str:
+    match = _REF.match(ref)
+    if match is None or match[1] not in offsets:
+        return ref
+    return f"#/{match[1]}/{int(match[2]) + offsets[match[1]]}"
+
+
+def _shift_refs(node, offsets: dict[str, int]):
+    if isinstance(node, dict):
+        return {
+            key: _shift_ref(value, offsets)
+            if key in ("$ref", "self_ref") and isinstance(value, str)
+            else _shift_refs(value, offsets)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_shift_refs(value, offsets) for value in node]
+    return node
+
+
+def merge_documents(shards: list[dict]):
+    """Merge documents converted from consecutive page ranges into one.
+
+    Docling numbers the pages of a page-range conversion by their position in
+    the whole PDF, so provenance is already correct; merging appends the
+    item lists in page order, renumbers the "#/texts/3"-style references of
+    later shards and unions the page tables.
+
+    Args:
+        shards: `export_to_dict()` output of each shard, in page order
+
+    Returns:
+        DoclingDocument: The whole document
+    """
+    from docling_core.types.doc import DoclingDocument
+
+    first = shards[0]
+    merged = {
+        **first,
+        "body": {**first["body"], "children": []},
+        "pages": {},
+        **{name: [] for name in ITEM_LISTS},
+    }
+    if "furniture" in first:
+        merged["furniture"] = {**first["furniture"], "children": []}
+    for shard in shards:
+        shard = _shift_refs(shard, {name: len(merged[name]) for name in ITEM_LISTS})
+        for name in ITEM_LISTS:
+            merged[name].extend(shard.get(name, []))
+        merged["body"]["children"].extend(shard["body"].get("children", []))
+        if "furniture" in merged:
+            merged["furniture"]["children"].extend(
+                shard.get("furniture", {}).get("children", [])
+            )
+        merged["pages"].update(shard.get("pages", {}))
+    return DoclingDocument.model_validate(merged)
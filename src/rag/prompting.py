@@ -0,0 +1,233 @@
+import re
+from dataclasses import dataclass
+from functools import cache
+
+from rag.config import CHAT_MODEL, CONTEXT_TOKEN_BUDGET, HISTORY_TOKEN_BUDGET
+from rag.retrieval import RetrievedChunk
+
+SYSTEM_PROMPT = """You are a helpful assistant that answers questions based on the provided context.
+    Use only the information from the context to answer questions. If you're unsure or the context
+    doesn't contain the relevant information, say so.
+
+    Context:
+    {context}
+    """
+
+# Chat format overhead per message (role and separators), per OpenAI's cookbook
+TOKENS_PER_MESSAGE = 4
+# A trimmed chunk shorter than this is not worth its source line
+MIN_TRIMMED_TOKENS = 64
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@cache
+def _encoding(model: str = CHAT_MODEL):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of a text for the chat model."""
+    return len(_encoding().encode_ordinary(text))
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text to at most `max_tokens`, at a sentence boundary when possible.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget
+
+    Returns:
+        str: The longest prefix of whole sentences that fits, or a hard token
+        cut when even the first sentence does not
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        # +1 for the space joining the sentences
+        tokens = count_tokens(sentence) + (1 if kept else 0)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    if kept:
+        return " ".join(kept)
+    encoding = _encoding()
+    return encoding.decode(encoding.encode_ordinary(text)[:max_tokens])
+
+
+def format_chunk(chunk: RetrievedChunk, text: str | None = None) -> str:
+    """Format one retrieved chunk with its source information."""
+    text = f"{chunk.text if text is None else text}\nSource: {chunk.source}"
+    if chunk.title:
+        text += f"\nTitle: {chunk.title}"
+    if chunk.doi:
+        text += f"\nDOI: {chunk.doi}"
+    return text
+
+
+def format_context(chunks: list[RetrievedChunk]) -> str:
+    """Concatenate retrieved chunks into the context of the system prompt.
+
+    Args:
+        chunks: Retrieved chunks, best-first
+
+    Returns:
+        str: Context with source information for every chunk
+    """
+    return "\n\n".join(format_chunk(chunk) for chunk in chunks)
+
+
+@dataclass
+class PromptUsage:
+    """Token accounting of one chat turn's prompt."""
+
+    system_tokens: int = 0
+    context_tokens: int = 0
+    history_tokens: int = 0
+    chunks_used: int = 0
+    chunks_trimmed: int = 0
+    chunks_dropped: int = 0
+    messages_dropped: int = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.system_tokens + self.context_tokens + self.history_tokens
+
+    def summary(self) -> str:
+        text = (
+            f"Prompt: {self.prompt_tokens} tokens "
+            f"(context {self.context_tokens}, history {self.history_tokens}); "
+            f"{self.chunks_used} chunks"
+        )
+        if self.chunks_trimmed:
+            text += f", {self.chunks_trimmed} trimmed"
+        if self.chunks_dropped:
+            text += f", {self.chunks_dropped} dropped"
+        if self.messages_dropped:
+            text += f"; {self.messages_dropped} earlier messages left out"
+        return text
+
+
+def pack_context(
+    chunks: list[RetrievedChunk], budget: int = CONTEXT_TOKEN_BUDGET
+) -> tuple[str, PromptUsage]:
+    """Fit retrieved chunks into a token budget, most relevant first.
+
+    Chunks are taken in retrieval order. The first chunk that does not fit is
+    trimmed at a sentence boundary to the remaining budget (if enough is left
+    to be useful) and everything after it is left out.
+
+    Args:
+        chunks: Retrieved chunks, best-first
+        budget: Maximum context tokens, source lines included
+
+    Returns:
+        tuple[str, PromptUsage]: The context and its token accounting
+    """
+    usage = PromptUsage()
+    parts = []
+    separator = count_tokens("\n\n")
+    for position, chunk in enumerate(chunks):
+        cost = separator if parts else 0
+        formatted = format_chunk(chunk)
+        tokens = count_tokens(formatted)
+        if usage.context_tokens + cost + tokens <= budget:
+            parts.append(formatted)
+            usage.context_tokens += cost + tokens
+            continue
+
+        overhead = count_tokens(format_chunk(chunk, text=""))
+        remaining = budget - usage.context_tokens - cost - overhead
+        if remaining >= MIN_TRIMMED_TOKENS:
+            formatted = format_chunk(chunk, text=trim_to_tokens(chunk.text, remaining))
+            parts.append(formatted)
+            usage.context_tokens += cost + count_tokens(formatted)
+            usage.chunks_trimmed += 1
+            position += 1
+        usage.chunks_dropped = len(chunks) - position
+        break
+    usage.chunks_used = len(parts)
+    return "\n\n".join(parts), usage
+
+
+def bound_history(
+    messages: list[dict], budget: int = HISTORY_TOKEN_BUDGET
+) -> tuple[list[dict], int, int]:
+    """Keep the most recent turns of a conversation within a token budget.
+
+    The last message (the current question) is always kept; earlier messages
+    are added newest-first until the budget is spent. The oldest message that
+    still fits partially is truncated at a sentence boundary so the
+    conversation does not start mid-exchange without any context.
+
+    Args:
+        messages: Chat history, oldest first, ending with the current question
+        budget: Maximum tokens for the messages before the current question
+
+    Returns:
+        tuple[list[dict], int, int]: Kept messages, their tokens (current
+        question included) and the number of messages left out
+    """
+    if not messages:
+        return [], 0, 0
+    *earlier, current = messages
+    used = count_tokens(current["content"]) + TOKENS_PER_MESSAGE
+    kept, spent = [], 0
+    for message in reversed(earlier):
+        tokens = count_tokens(message["content"]) + TOKENS_PER_MESSAGE
+        if spent + tokens <= budget:
+            kept.append(message)
+            spent += tokens
+            continue
+        remaining = budget - spent - TOKENS_PER_MESSAGE
+        if remaining >= MIN_TRIMMED_TOKENS:
+            content = trim_to_tokens(message["content"], remaining)
+            kept.append({**message, "content": content})
+            spent += count_tokens(content) + TOKENS_PER_MESSAGE
+        break
+    kept.reverse()
+    dropped = len(earlier) - len(kept)
+    return [*kept, current], used + spent, dropped
+
+
+def build_messages(
+    messages: list[dict],
+    chunks: list[RetrievedChunk],
+    context_budget: int = CONTEXT_TOKEN_BUDGET,
+    history_budget: int = HISTORY_TOKEN_BUDGET,
+) -> tuple[list[dict], PromptUsage]:
+    """Chat completion messages with budgeted context and bounded history.
+
+    Prompt size stays roughly constant over a long conversation: at most
+    `context_budget` tokens of retrieved text and `history_budget` tokens of
+    earlier turns, plus the system prompt and the current question.
+
+    Args:
+        messages: Chat history, ending with the current question
+        chunks: Retrieved chunks, best-first
+        context_budget: Maximum tokens of retrieved context
+        history_budget: Maximum tokens of earlier turns
+
+    Returns:
+        tuple[list[dict], PromptUsage]: Messages for the API and their token
+        accounting
+    """
+    context, usage = pack_context(chunks, context_budget)
+    system_prompt = SYSTEM_PROMPT.format(context=context)
+    usage.system_tokens = (
+        count_tokens(system_prompt) - usage.context_tokens + TOKENS_PER_MESSAGE
+    )
+    history, usage.history_tokens, usage.messages_dropped = bound_history(
+        messages, history_budget
+    )
+    return [{"role": "system", "content": system_prompt}, *history], usage
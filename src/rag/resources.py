@@ -0,0 +1,96 @@
+import threading
+from datetime import timedelta
+from functools import wraps
+
+from rag.config import DB_URI, DOCLING_PROFILE, MAX_TOKENS, TABLE_NAME, TOKENIZER_NAME
+
+_lock = threading.RLock()
+
+
+def singleton(factory):
+    """Build a shared object on first use and return it for the life of the process.
+
+    Nothing is constructed at import time, so modules can be imported by
+    long-running workers and the Streamlit app without side effects.
+    """
+    instance = None
+    built = False
+
+    @wraps(factory)
+    def get():
+        nonlocal instance, built
+        if not built:
+            with _lock:
+                if not built:
+                    instance = factory()
+                    built = True
+        return instance
+
+    def reset():
+        nonlocal instance, built
+        with _lock:
+            instance, built = None, False
+
+    get.reset = reset
+    return get
+
+
+@singleton
+def get_openai_client():
+    from openai import OpenAI
+
+    return OpenAI()
+
+
+@singleton
+def get_async_openai_client():
+    from openai import AsyncOpenAI
+
+    # One client, one HTTP connection pool, for every request of the service
+    return AsyncOpenAI()
+
+
+@singleton
+def get_db():
+    import lancedb
+
+    # Re-check the table version periodically so readers see re-ingestion
+    return lancedb.connect(DB_URI, read_consistency_interval=timedelta(seconds=30))
+
+
+@singleton
+def get_table():
+    import rag.embedders  # noqa: F401  (registers the cached embedding function)
+
+    return get_db().open_table(TABLE_NAME)
+
+
+@singleton
+def get_dedup():
+    from rag.dedup import DEDUP_INDEX_PATH, ChunkDeduplicator
+
+    # Tables ingested without --dedup have no index to resolve references from
+    return ChunkDeduplicator() if DEDUP_INDEX_PATH.exists() else None
+
+
+@singleton
+def get_converters():
+    from rag.pipelines import ProfileConverters
+
+    # Resolves DOCLING_PROFILE=auto per PDF, for conversion and cache lookup alike
+    return ProfileConverters(DOCLING_PROFILE)
+
+
+def get_converter():
+    """Shared DocumentConverter of DOCLING_PROFILE ("auto" gives the OCR pipeline)."""
+    from rag.pipelines import AUTO
+
+    profile = "ocr" if DOCLING_PROFILE == AUTO else DOCLING_PROFILE
+    return get_converters().get(profile)[0]
+
+
+@singleton
+def get_chunker():
+    from rag.ingestion import build_chunker
+
+    return build_chunker(TOKENIZER_NAME, MAX_TOKENS)
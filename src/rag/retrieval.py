@@ -0,0 +1,602 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+
+import pyarrow as pa
+
+from rag import telemetry
+from rag.compression import has_short_vectors, two_stage_search
+from rag.config import RESCORE_FACTOR
+from rag.diversity import (
+    maximal_marginal_relevance,
+    min_max_scale,
+    vectors_to_numpy,
+)
+from rag.indexing import (
+    VECTOR_COLUMN,
+    IndexParams,
+    apply_search_params,
+    index_metric,
+    text_index_name,
+)
+from rag.schema import sql_quote
+
+SEARCH_MODES = ("vector", "fts", "hybrid")
+
+# Columns fetched for results; the vector column is left behind in storage
+RESULT_COLUMNS = ("id", "text", "metadata", "doi", "year", "journal")
+
+# Shared by all sessions; each hybrid query runs its two searches side by side
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
+
+
+@dataclass(frozen=True)
+class Scope:
+    """Restriction of a search to an article, journal, range of years or file.
+
+    Kept as fields rather than SQL so that each store builds its own filter:
+    `where` renders it for the LanceDB table and the dedup index binds the
+    values as parameters (see `ChunkDeduplicator.scope_ids`).
+    """
+
+    doi: str | None = None
+    journal: str | None = None
+    year_from: int | None = None
+    year_to: int | None = None
+    filename: str | None = None
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in asdict(self).values())
+
+    def where(self) -> str | None:
+        """LanceDB filter expression of the scope, see `scope_filter`."""
+        return scope_filter(**asdict(self))
+
+
+@dataclass
+class SearchOptions:
+    """How a single query is retrieved.
+
+    Attributes:
+        mode: "vector", "fts" (BM25 keyword search) or "hybrid"
+        vector_weight: Weight of the vector ranking in the fused score
+        text_weight: Weight of the keyword ranking in the fused score
+        rrf_k: Rank offset of reciprocal-rank fusion; larger values flatten
+            the difference between the first and later ranks
+        candidates: Results fetched from each list per requested result
+        diversify: Re-rank the candidates with Maximal Marginal Relevance
+            over their stored vectors and drop near-duplicates
+        mmr_lambda: Relevance/diversity trade-off of the re-ranking, 1.0
+            keeping the original relevance order
+        duplicate_threshold: Cosine similarity above which a candidate is
+            dropped as a near-duplicate of a higher-ranked one
+        rescore_factor: On tables with a short vector column, candidates per
+            result taken from it and rescored on the full vectors; 0 searches
+            the full vectors directly
+        scope: Article, journal, years or file to search in, applied before
+            the vector and keyword searches rather than to their results;
+            with a dedup index it also admits chunks stored under a
+            duplicate from the scope
+        where: Further LanceDB filter on the stored chunks, combined with
+            the scope
+    """
+
+    mode: str = "hybrid"
+    vector_weight: float = 1.0
+    text_weight: float = 1.0
+    rrf_k: int = 60
+    candidates: int = 4
+    diversify: bool = False
+    mmr_lambda: float = 0.7
+    duplicate_threshold: float = 0.95
+    rescore_factor: int = RESCORE_FACTOR
+    scope: Scope | None = None
+    where: str | None = None
+
+    def filter(self) -> str | None:
+        """LanceDB filter of the scope and `where` together."""
+        scoped = self.scope.where() if self.scope else None
+        if scoped and self.where:
+            return f"({scoped}) AND ({self.where})"
+        return scoped or self.where
+
+
+def scope_filter(
+    doi: str | None = None,
+    journal: str | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    filename: str | None = None,
+) -> str | None:
+    """Filter expression restricting a search to an article, journal or years.
+
+    The doi, year and journal columns have scalar indexes (see
+    `build_scalar_indexes`), so the filter is resolved from them.
+
+    Returns:
+        str | None: Conditions joined with AND, or None for no restriction
+    """
+    conditions = []
+    if doi:
+        conditions.append(f"doi = {sql_quote(doi)}")
+    if journal:
+        conditions.append(f"journal = {sql_quote(journal)}")
+    if year_from is not None:
+        conditions.append(f"year >= {int(year_from)}")
+    if year_to is not None:
+        conditions.append(f"year <= {int(year_to)}")
+    if filename:
+        conditions.append(f"metadata.filename = {sql_quote(filename)}")
+    return " AND ".join(conditions) or None
+
+
+def reciprocal_rank_fusion(
+    ranked: list[tuple[pa.Table, float]], limit: int, rrf_k: int = 60
+) -> pa.Table:
+    """Merge ranked result lists by weighted reciprocal-rank fusion.
+
+    Each row scores `sum(weight / (rrf_k + rank))` over the lists it appears
+    in, with ranks starting at 1. Rows are identified by `_rowid`.
+
+    Args:
+        ranked: (results, weight) pairs, each results table best-first
+        limit: Number of rows to return
+        rrf_k: Rank offset
+
+    Returns:
+        pa.Table: Fused rows, best-first, with a `_score` column
+    """
+    scores: dict[int, float] = {}
+    for results, weight in ranked:
+        for rank, row_id in enumerate(results["_rowid"].to_pylist(), start=1):
+            scores[row_id] = scores.get(row_id, 0.0) + weight / (rrf_k + rank)
+
+    # Drop the per-list score columns so the lists can be stacked
+    tables = [
+        results.select(
+            [name for name in results.column_names if not name.startswith("_")]
+            + ["_rowid"]
+        )
+        for results, _ in ranked
+    ]
+    stacked = pa.concat_tables(tables)
+    first_position: dict[int, int] = {}
+    for position, row_id in enumerate(stacked["_rowid"].to_pylist()):
+        first_position.setdefault(row_id, position)
+
+    best = sorted(scores, key=scores.get, reverse=True)[:limit]
+    fused = stacked.take([first_position[row_id] for row_id in best])
+    return fused.append_column(
+        "_score", pa.array([scores[row_id] for row_id in best], pa.float64())
+    )
+
+
+def _result_columns(table, with_vectors: bool = False) -> list[str]:
+    columns = RESULT_COLUMNS + ((VECTOR_COLUMN,) if with_vectors else ())
+    return [name for name in columns if name in table.schema.names]
+
+
+def _prefilter(query, where: str | None):
+    return query.where(where, prefilter=True) if where else query
+
+
+def _vector_search(
+    table,
+    query,
+    limit: int,
+    with_vectors: bool = False,
+    rescore_factor: int = 0,
+    where: str | None = None,
+    metric: str = IndexParams.metric,
+) -> pa.Table:
+    if rescore_factor and not isinstance(query, str) and has_short_vectors(table):
+        return two_stage_search(
+            table,
+            query,
+            limit,
+            _result_columns(table),
+            rescore_factor=rescore_factor,
+            keep_vectors=with_vectors,
+            where=where,
+            metric=metric,
+        )
+    search = table.search(query, query_type="vector", vector_column_name=VECTOR_COLUMN)
+    return (
+        _prefilter(apply_search_params(search, IndexParams(metric=metric)), where)
+        .select(_result_columns(table, with_vectors))
+        .with_row_id(True)
+        .limit(limit)
+        .to_arrow()
+    )
+
+
+def _text_search(
+    table, query: str, limit: int, with_vectors: bool = False, where: str | None = None
+) -> pa.Table:
+    return (
+        _prefilter(table.search(query, query_type="fts"), where)
+        .select(_result_columns(table, with_vectors))
+        .with_row_id(True)
+        .limit(limit)
+        .to_arrow()
+    )
+
+
+def search(
+    table,
+    query: str,
+    num_results: int = 5,
+    options: SearchOptions | None = None,
+    query_vector=None,
+    metric: str | None = None,
+) -> pa.Table:
+    """Retrieve the chunks most relevant to a query.
+
+    In hybrid mode the vector and BM25 searches run concurrently and are
+    merged with reciprocal-rank fusion. Without a full-text index the query
+    falls back to vector search. With `options.diversify` the search
+    over-fetches candidates and `diversify` picks the final results. Tables
+    with a short vector column are searched on it first and the candidates
+    rescored on the full vectors. The scope and `options.where` are applied
+    as a pre-filter, so a scoped query still returns `num_results` matching
+    chunks.
+
+    Args:
+        table: LanceDB table object
+        query: User's question
+        num_results: Number of results to return
+        options: Retrieval mode and fusion weights
+        query_vector: Precomputed embedding of `query`, to skip embedding it
+        metric: Metric of the vector index, read from the table when omitted
+
+    Returns:
+        pa.Table: Matching rows, best-first
+    """
+    options = options or SearchOptions()
+    metric = metric or index_metric(table)
+    where = options.filter()
+    two_stage = bool(options.rescore_factor) and has_short_vectors(table)
+    if (options.diversify or two_stage) and query_vector is None:
+        func = table.embedding_functions[VECTOR_COLUMN].function
+        query_vector = func.compute_query_embeddings(query)[0]
+    vector_query = query if query_vector is None else query_vector
+    mode = options.mode
+    if mode != "vector" and text_index_name(table) is None:
+        mode = "vector"
+
+    # Over-fetch with vectors attached so the candidates can be re-ranked
+    with_vectors = options.diversify
+    limit = num_results * options.candidates if with_vectors else num_results
+
+    with telemetry.span("retrieve", mode=mode):
+        if mode == "vector":
+            results = _vector_search(
+                table,
+                vector_query,
+                limit,
+                with_vectors,
+                options.rescore_factor,
+                where,
+                metric,
+            )
+        elif mode == "fts":
+            results = _text_search(table, query, limit, with_vectors, where)
+        else:
+            fetch = num_results * options.candidates
+            vector_future = _pool.submit(
+                _vector_search,
+                table,
+                vector_query,
+                fetch,
+                with_vectors,
+                options.rescore_factor,
+                where,
+                metric,
+            )
+            text_future = _pool.submit(
+                _text_search, table, query, fetch, with_vectors, where
+            )
+            results = reciprocal_rank_fusion(
+                [
+                    (vector_future.result(), options.vector_weight),
+                    (text_future.result(), options.text_weight),
+                ],
+                limit=limit,
+                rrf_k=options.rrf_k,
+            )
+
+    if with_vectors:
+        with telemetry.span("diversify"):
+            results = diversify(results, query_vector, num_results, options)
+    return results
+
+
+def diversify(
+    results: pa.Table, query_vector, num_results: int, options: SearchOptions
+) -> pa.Table:
+    """Re-rank candidates with Maximal Marginal Relevance, dropping near-duplicates.
+
+    Candidates of a hybrid or keyword search are judged relevant by their
+    `_score`, rescaled to 0-1, rather than by their cosine similarity to the
+    query, so MMR keeps the fused ranking and only uses the vectors to tell
+    how alike the candidates are.
+
+    Args:
+        results: Candidate rows including the vector column, best-first
+        query_vector: Query embedding
+        num_results: Number of results to keep
+        options: MMR trade-off and duplicate threshold
+
+    Returns:
+        pa.Table: Selected rows in selection order, without the vector column
+    """
+    if VECTOR_COLUMN not in results.column_names or results.num_rows == 0:
+        return results
+    relevance = None
+    if "_score" in results.column_names:
+        relevance = min_max_scale(results["_score"].to_numpy())
+    selected = maximal_marginal_relevance(
+        query_vector,
+        vectors_to_numpy(results[VECTOR_COLUMN]),
+        num_results,
+        lambda_mult=options.mmr_lambda,
+        duplicate_threshold=options.duplicate_threshold,
+        relevance=relevance,
+    )
+    return results.take(selected).drop_columns([VECTOR_COLUMN])
+
+
+def result_ids(results: pa.Table) -> list:
+    """Stable chunk ids of search results (row ids for tables without them)."""
+    column = "id" if "id" in results.column_names else "_rowid"
+    return results[column].to_pylist()
+
+
+@dataclass(frozen=True, slots=True)
+class RetrievedChunk:
+    """One search result, as consumed by prompt building and the UI.
+
+    `score` is higher-is-better: the fused score for hybrid search, BM25 for
+    keyword search and, for vector search, the similarity under the metric
+    searched with (see `distance_to_score`). `references` lists the other
+    places where the text occurs, as recorded by the dedup index.
+    """
+
+    id: str | int
+    text: str
+    filename: str | None
+    page_numbers: list[int] | None
+    title: str | None
+    score: float
+    doi: str | None = None
+    year: int | None = None
+    journal: str | None = None
+    references: tuple[dict, ...] = ()
+
+    @property
+    def source(self) -> str:
+        """Citation such as "paper.pdf - p. 3, 4"."""
+        parts = []
+        if self.filename:
+            parts.append(self.filename)
+        if self.page_numbers:
+            parts.append(f"p. {', '.join(str(p) for p in self.page_numbers)}")
+        return " - ".join(parts)
+
+
+def distance_to_score(distances: list[float], metric: str) -> list[float]:
+    """Turn LanceDB `_distance` values into higher-is-better scores.
+
+    LanceDB reports `1 - similarity` for the cosine and dot metrics, so those
+    map back to the cosine similarity and the dot product. For l2 it reports
+    the squared euclidean distance, which is negated.
+    """
+    if metric == "l2":
+        return [-d for d in distances]
+    if metric in ("cosine", "dot"):
+        return [1.0 - d for d in distances]
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def to_records(
+    results: pa.Table, metric: str = IndexParams.metric
+) -> list[RetrievedChunk]:
+    """Convert search results to records column by column, without pandas.
+
+    Args:
+        results: Search results as returned by `search`
+        metric: Distance metric of a vector search, to score `_distance` by
+
+    Returns:
+        list[RetrievedChunk]: Records in result order
+    """
+    if results.num_rows == 0:
+        return []
+    metadata = results["metadata"].combine_chunks()
+    if "_score" in results.column_names:
+        scores = results["_score"].to_pylist()
+    elif "_distance" in results.column_names:
+        scores = distance_to_score(results["_distance"].to_pylist(), metric)
+    else:
+        scores = [0.0] * results.num_rows
+    article_columns = [
+        results[name].to_pylist()
+        if name in results.column_names
+        else [None] * results.num_rows
+        for name in ("doi", "year", "journal")
+    ]
+    return [
+        RetrievedChunk(*row)
+        for row in zip(
+            result_ids(results),
+            results["text"].to_pylist(),
+            metadata.field("filename").to_pylist(),
+            metadata.field("page_numbers").to_pylist(),
+            metadata.field("title").to_pylist(),
+            scores,
+            *article_columns,
+        )
+    ]
+
+
+def _matching_ids(table, ids: list[str], where: str) -> set[str]:
+    """The ids among `ids` whose rows satisfy a filter."""
+    in_list = ", ".join(sql_quote(chunk_id) for chunk_id in ids)
+    rows = (
+        table.search()
+        .where(f"({where}) AND id IN ({in_list})")
+        .select(["id"])
+        .limit(len(ids))
+        .to_arrow()
+    )
+    return set(rows["id"].to_pylist())
+
+
+def resolve_references(
+    table, chunks: list[RetrievedChunk], dedup, scope: Scope | None = None
+) -> list[RetrievedChunk]:
+    """Attach the duplicates of each result from the dedup index.
+
+    Under a scope, a result that only matched through one of its duplicates
+    is cited as that duplicate: its file, pages, doi, year and journal
+    replace those of the stored chunk, whose text and id it keeps.
+
+    Args:
+        table: LanceDB table object
+        chunks: Results of a search widened by `dedup.scope_ids`
+        dedup: `ChunkDeduplicator` the table was ingested with
+        scope: The scope of the search
+
+    Returns:
+        list[RetrievedChunk]: The results, in the same order
+    """
+    references = dedup.references([chunk.id for chunk in chunks], scope)
+    through_duplicate = set()
+    if scope:
+        # Results with a duplicate in scope, less those in scope on their own
+        through_duplicate = {
+            chunk_id for chunk_id, found in references.items() if found
+        }
+        if through_duplicate:
+            through_duplicate -= _matching_ids(
+                table, list(through_duplicate), scope.where()
+            )
+    resolved = []
+    for chunk in chunks:
+        found = references[chunk.id]
+        if chunk.id in through_duplicate:
+            location = {
+                name: found[0][name]
+                for name in ("filename", "page_numbers", "doi", "year", "journal")
+            }
+            chunk = replace(chunk, **location)
+        resolved.append(replace(chunk, references=tuple(found)))
+    return resolved
+
+
+def retrieve(
+    table,
+    query: str,
+    num_results: int = 5,
+    options: SearchOptions | None = None,
+    query_vector=None,
+    dedup=None,
+) -> list[RetrievedChunk]:
+    """Search the table and return typed result records.
+
+    With the dedup index of the table, `options.scope` also admits the
+    stored chunks with a duplicate in scope, so a paper whose chunks were all
+    duplicates is still found (see `resolve_references`). `options.where` is
+    a LanceDB filter and only ever applies to the stored chunks.
+
+    Args:
+        table: LanceDB table object
+        query: User's question
+        num_results: Number of results to return
+        options: Retrieval mode and fusion weights
+        query_vector: Precomputed embedding of `query`
+        dedup: Optional `ChunkDeduplicator` the table was ingested with
+
+    Returns:
+        list[RetrievedChunk]: Results, best-first
+    """
+    options = options or SearchOptions()
+    metric = index_metric(table)
+    if dedup is None:
+        return to_records(
+            search(table, query, num_results, options, query_vector, metric), metric
+        )
+    scope = options.scope
+    if scope and (canonical_ids := dedup.scope_ids(scope)):
+        in_list = ", ".join(sql_quote(chunk_id) for chunk_id in canonical_ids)
+        where = f"({scope.where()}) OR id IN ({in_list})"
+        if options.where:
+            where = f"({where}) AND ({options.where})"
+        options = replace(options, scope=None, where=where)
+    chunks = to_records(
+        search(table, query, num_results, options, query_vector, metric), metric
+    )
+    return resolve_references(table, chunks, dedup, scope)
+
+
+# --------------------------------------------------------------
+# Batches of queries
+# --------------------------------------------------------------
+
+
+def embed_queries(table, queries: list[str]) -> list:
+    """Embed many queries with the table's embedding function in one call.
+
+    Text embedding functions embed queries and documents the same way, so
+    the batched source path (one API round trip per batch, cached) is used.
+    """
+    if not queries:
+        return []
+    func = table.embedding_functions[VECTOR_COLUMN].function
+    with telemetry.span("embed_queries", queries=len(queries)):
+        return list(func.compute_source_embeddings(list(queries)))
+
+
+def retrieve_many(
+    table,
+    queries: list[str],
+    num_results: int = 5,
+    options: SearchOptions | None = None,
+    query_vectors: list | None = None,
+    workers: int = 8,
+    latencies: list[float] | None = None,
+    dedup=None,
+) -> list[list[RetrievedChunk]]:
+    """Retrieve chunks for many queries: bulk embedding, parallel searches.
+
+    Args:
+        table: LanceDB table object
+        queries: Questions
+        num_results: Number of results per question
+        options: Retrieval mode and fusion weights, shared by all questions
+        query_vectors: Precomputed embeddings, one per question; computed with
+            `embed_queries` when omitted (and not needed for keyword search)
+        workers: Searches run at the same time
+        latencies: If given, the seconds of each search are appended to it
+        dedup: Optional `ChunkDeduplicator`, see `retrieve`
+
+    Returns:
+        list[list[RetrievedChunk]]: Results per question, in question order
+    """
+    options = options or SearchOptions()
+    if query_vectors is None:
+        if options.mode == "fts" and not options.diversify:
+            query_vectors = [None] * len(queries)
+        else:
+            query_vectors = embed_queries(table, queries)
+
+    def run(query: str, query_vector) -> list[RetrievedChunk]:
+        start = time.perf_counter()
+        chunks = retrieve(table, query, num_results, options, query_vector, dedup)
+        if latencies is not None:
+            latencies.append(time.perf_counter() - start)
+        return chunks
+
+    # A pool of its own: hybrid searches hand their halves to `_pool`
+    with ThreadPoolExecutor(workers, thread_name_prefix="retrieve-many") as pool:
+        return list(pool.map(run, queries, query_vectors))
@@ -0,0 +1,128 @@
+import hashlib
+from typing import List
+
+import numpy as np
+import pyarrow as pa
+from lancedb.embeddings import get_registry
+from lancedb.pydantic import LanceModel, Vector
+
+import rag.embedders  # noqa: F401  (registers the "cached" and "fake" functions)
+from rag.config import EMBEDDING_MODEL, SHORT_VECTOR_DIM, SHORT_VECTOR_DTYPE
+
+
+def get_embedding_function(name: str = EMBEDDING_MODEL, cached: bool = True):
+    """Get the OpenAI embedding function used by the docling table.
+
+    Args:
+        name: OpenAI embedding model
+        cached: Put the persistent embedding cache in front of the API
+
+    Returns:
+        LanceDB embedding function
+    """
+    if cached:
+        return get_registry().get("cached").create(source="openai", name=name)
+    return get_registry().get("openai").create(name=name)
+
+
+# Define a simplified metadata schema
+class ChunkMetadata(LanceModel):
+    """
+    You must order the fields in alphabetical order.
+    This is a requirement of the Pydantic implementation.
+    """
+
+    filename: str | None
+    page_numbers: List[int] | None
+    title: str | None
+
+
+def build_chunks_schema(
+    func, short_dim: int = SHORT_VECTOR_DIM, short_dtype: str = SHORT_VECTOR_DTYPE
+):
+    """Build the main table schema around an embedding function.
+
+    Args:
+        func: LanceDB embedding function that embeds the `text` column
+        short_dim: Width of the truncated `vector_short` column searched
+            before full-precision rescoring; 0 leaves the column out
+        short_dtype: Storage type of the short column
+
+    Returns:
+        LanceModel subclass describing a chunk row
+    """
+
+    class Chunks(LanceModel):
+        id: str
+        text: str = func.SourceField()
+        vector: Vector(func.ndims()) = func.VectorField()  # type: ignore
+        metadata: ChunkMetadata
+        # Article-level columns with scalar indexes, for pre-filtered search
+        doi: str | None = None
+        year: int | None = None
+        journal: str | None = None
+
+    if not short_dim:
+        return Chunks
+
+    value_type = pa.from_numpy_dtype(np.dtype(short_dtype))
+
+    class CompactChunks(Chunks):
+        vector_short: Vector(short_dim, value_type=value_type) = None  # type: ignore
+
+    return CompactChunks
+
+
+def chunk_to_record(chunk) -> dict:
+    """Convert a Docling chunk into a row for the docling table.
+
+    Args:
+        chunk: Chunk produced by HybridChunker
+
+    Returns:
+        dict: Row without the vector, which is filled in on `table.add`
+    """
+    return {
+        "text": chunk.text,
+        "metadata": {
+            "filename": chunk.meta.origin.filename,
+            "page_numbers": [
+                page_no
+                for page_no in sorted(
+                    set(
+                        prov.page_no
+                        for item in chunk.meta.doc_items
+                        for prov in item.prov
+                    )
+                )
+            ]
+            or None,
+            "title": chunk.meta.headings[0] if chunk.meta.headings else None,
+        },
+    }
+
+
+def assign_chunk_ids(records: list[dict]) -> list[dict]:
+    """Give each row a stable id derived from its file and text.
+
+    Identical texts within one file are told apart by their occurrence count,
+    so ids stay stable when unrelated parts of the file change.
+
+    Args:
+        records: Rows for a single file, in chunker order
+
+    Returns:
+        list[dict]: The same rows with an `id` key
+    """
+    seen: dict[str, int] = {}
+    for record in records:
+        key = f"{record['metadata']['filename']}\x00{record['text']}"
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        record["id"] = hashlib.sha256(f"{key}\x00{occurrence}".encode()).hexdigest()
+    return records
+
+
+def sql_quote(value: str) -> str:
+    """Quote a string literal for a LanceDB filter expression."""
+    return "'" + value.replace("'", "''") + "'"
@@ -1,25 +1,15 @@
-import lancedb
+from rag.resources import get_table
+from rag.retrieval import SearchOptions, retrieve
 
-# --------------------------------------------------------------
-# Connect to the database
-# --------------------------------------------------------------
 
-uri = "data/lancedb"
-db = lancedb.connect(uri)
+def main(query: str = "what is the name of the paper?", num_results: int = 3):
+    # --------------------------------------------------------------
+    # Search the table (uses the ANN index when one has been built)
+    # --------------------------------------------------------------
 
+    for chunk in retrieve(get_table(), query, num_results, SearchOptions(mode="vector")):
+        print(f"{chunk.score:.3f}  {chunk.source}  {chunk.title or ''}")
 
-# --------------------------------------------------------------
-# Load the table
-# --------------------------------------------------------------
 
-table = db.open_table("docling")
-
-
-# --------------------------------------------------------------
-# Search the table
-# --------------------------------------------------------------
-
-result = table.search(
-    query="what is the name of the paper?", query_type="vector"
-).limit(3)
-result.to_pandas()
+if __name__ == "__main__":
+    main()
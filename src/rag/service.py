@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from types import NoneType, UnionType
+from typing import get_args
+
+from rag import telemetry
+from rag.caching import QueryEmbeddingCache, SemanticAnswerCache, history_key
+from rag.config import CHAT_MODEL, SERVICE_MAX_GENERATIONS, SERVICE_THREADS
+from rag.prompting import build_messages
+from rag.retrieval import SEARCH_MODES, RetrievedChunk, Scope, SearchOptions, retrieve
+
+
+class BadRequest(ValueError):
+    """A request the service cannot answer; sent back as HTTP 400."""
+
+
+def chunk_to_dict(chunk: RetrievedChunk) -> dict:
+    return {**asdict(chunk), "source": chunk.source}
+
+
+def _is_instance(value, kind) -> bool:
+    """isinstance for JSON values against a field annotation such as `str | None`."""
+    if isinstance(kind, UnionType):
+        return any(_is_instance(value, member) for member in get_args(kind))
+    if kind is NoneType:
+        return value is None
+    if isinstance(value, bool):  # JSON true is not a number
+        return kind is bool
+    if kind is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, kind)
+
+
+def _check_fields(cls, data, name: str) -> dict:
+    """A JSON object's fields for dataclass `cls`, rejecting unknown names and types."""
+    if not isinstance(data, dict):
+        raise BadRequest(f"{name} must be an object")
+    known = {f.name: f.type for f in fields(cls)}
+    unknown = set(data) - set(known)
+    if unknown:
+        raise BadRequest(f"Unknown {name}: {', '.join(sorted(unknown))}")
+    for key, value in data.items():
+        if not _is_instance(value, known[key]):
+            kind = getattr(known[key], "__name__", known[key])
+            raise BadRequest(f"{name}.{key} must be {kind}")
+    return data
+
+
+def parse_options(data: dict | None) -> SearchOptions:
+    """SearchOptions from a JSON object, rejecting unknown fields, types and modes.
+
+    The scope is given as a nested object of `Scope` fields.
+    """
+    if data is None:
+        data = {}
+    if isinstance(data, dict) and isinstance(data.get("scope"), dict):
+        data = {**data, "scope": Scope(**_check_fields(Scope, data["scope"], "scope"))}
+    options = SearchOptions(**_check_fields(SearchOptions, data, "options"))
+    if options.mode not in SEARCH_MODES:
+        raise BadRequest(f"mode must be one of {SEARCH_MODES}")
+    return options
+
+
+def parse_num_results(value) -> int:
+    """The requested number of chunks, a positive integer."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise BadRequest("num_results must be a positive integer")
+    return value
+
+
+def validate_messages(messages) -> list[dict]:
+    """A chat history of {"role", "content"} strings ending with a user message."""
+    if not isinstance(messages, list):
+        raise BadRequest("messages must be a list")
+    for message in messages:
+        if not (
+            isinstance(message, dict)
+            and isinstance(message.get("role"), str)
+            and isinstance(message.get("content"), str)
+        ):
+            raise BadRequest("messages must be objects with string role and content")
+    if not messages or messages[-1]["role"] != "user":
+        raise BadRequest("messages must end with a user message")
+    return messages
+
+
+class RagService:
+    """Retrieval and streaming generation shared by all concurrent requests.
+
+    One table handle, one async OpenAI client (and its connection pool) and
+    the query-embedding and answer caches serve every session. LanceDB and
+    the query embedding call block, so they run on a bounded thread pool;
+    generation is awaited on the event loop, so a slow LLM stream holds no
+    thread while it waits for tokens.
+    """
+
+    def __init__(
+        self,
+        table,
+        client,
+        threads: int = SERVICE_THREADS,
+        max_generations: int = SERVICE_MAX_GENERATIONS,
+        dedup=None,
+    ):
+        """Set up the shared state.
+
+        Args:
+            table: LanceDB table object
+            client: AsyncOpenAI client (or a stand-in with the same interface)
+            threads: Threads for blocking embedding and search calls
+            max_generations: LLM streams allowed at once; further requests
+                wait for a slot after retrieval
+            dedup: Dedup index of the table, to resolve duplicate chunks
+        """
+        self.table = table
+        self.client = client
+        self.dedup = dedup
+        self.query_cache = QueryEmbeddingCache()
+        self.answer_cache = SemanticAnswerCache()
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="rag-service")
+        self._generations = asyncio.Semaphore(max_generations)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def retrieve(
+        self, query: str, num_results: int = 5, options: SearchOptions | None = None
+    ) -> tuple[list[RetrievedChunk], object]:
+        """Embed a query and search the table without blocking the event loop.
+
+        Returns:
+            tuple: (retrieved chunks, query vector)
+        """
+        query_vector = await self._run(self.query_cache.embed, self.table, query)
+        chunks = await self._run(
+            retrieve, self.table, query, num_results, options, query_vector, self.dedup
+        )
+        return chunks, query_vector
+
+    async def chat(
+        self,
+        messages: list[dict],
+        num_results: int = 5,
+        options: SearchOptions | None = None,
+    ) -> AsyncIterator[tuple[str, object]]:
+        """Answer the last message of a conversation as a stream of events.
+
+        Events are ("chunks", [chunk dicts]), ("usage", prompt token usage),
+        one ("token", text) per streamed delta and finally ("done", info).
+        A semantically cached answer is sent as a single token event.
+
+        Args:
+            messages: Chat history, ending with the user's question
+            num_results: Number of chunks to retrieve
+            options: Retrieval mode and fusion weights
+
+        Yields:
+            tuple[str, object]: (event name, JSON-serializable payload)
+        """
+        validate_messages(messages)
+        query = messages[-1]["content"]
+        history = history_key(messages[:-1])
+
+        chunks, query_vector = await self.retrieve(query, num_results, options)
+        yield "chunks", [chunk_to_dict(chunk) for chunk in chunks]
+
+        chunk_ids = [chunk.id for chunk in chunks]
+        # Reading the version checks the table's storage: not on the event loop
+        version = await self._run(getattr, self.table, "version")
+        answer = self.answer_cache.lookup(query_vector, chunk_ids, history, version)
+        if answer is not None:
+            yield "token", answer
+            yield "done", {"cached": True}
+            return
+
+        with telemetry.span("prompt_build"):
+            api_messages, usage = await self._run(build_messages, messages, chunks)
+        yield "usage", {**asdict(usage), "prompt_tokens": usage.prompt_tokens}
+
+        parts = []
+        async with self._generations:
+            start = time.perf_counter()
+            stream = await self.client.chat.completions.create(
+                model=CHAT_MODEL, messages=api_messages, temperature=0.7, stream=True
+            )
+            async for chunk in stream:
+                delta = telemetry.delta_text(chunk)
+                if not delta:
+                    continue
+                if not parts:
+                    telemetry.observe("time_to_first_token", time.perf_counter() - start)
+                parts.append(delta)
+                yield "token", delta
+            telemetry.observe("generation", time.perf_counter() - start)
+
+        self.answer_cache.put(query_vector, chunk_ids, history, "".join(parts), version)
+        yield "done", {"cached": False}
+
+
+# --------------------------------------------------------------
+# ASGI app
+# --------------------------------------------------------------
+
+
+def sse_event(event: str, data) -> bytes:
+    """One Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _read_json(receive) -> dict:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise BadRequest(f"Invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise BadRequest("Expected a JSON object")
+    return data
+
+
+async def _respond(send, status: int, body: bytes, content_type: str):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond_json(send, data, status: int = 200):
+    await _respond(send, status, json.dumps(data).encode(), "application/json")
+
+
+class RagApp:
+    """ASGI app exposing a RagService.
+
+    Routes:
+        POST /chat      {"messages", "num_results", "options"} -> SSE stream
+        POST /retrieve  {"query", "num_results", "options"} -> JSON chunks
+        GET  /health    liveness
+        GET  /metrics   Prometheus metrics of rag.telemetry
+
+    Run with `python -m rag.service` (uvicorn) or any ASGI server.
+    """
+
+    def __init__(self, service: RagService | None = None):
+        """Wrap a service.
+
+        Args:
+            service: Service to expose; built from the shared table and
+                AsyncOpenAI client on startup when omitted
+        """
+        self.service = service
+
+    def _startup(self):
+        telemetry.configure()
+        if self.service is None:
+            from rag.resources import get_async_openai_client, get_dedup, get_table
+
+            self.service = RagService(
+                get_table(), get_async_openai_client(), dedup=get_dedup()
+            )
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self._startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if self.service is None:
+            self._startup()
+
+        route = (scope["method"], scope["path"])
+        try:
+            if route == ("GET", "/health"):
+                await _respond_json(send, {"status": "ok"})
+            elif route == ("GET", "/metrics"):
+                body = telemetry.render_metrics().encode()
+                await _respond(send, 200, body, "text/plain; version=0.0.4")
+            elif route == ("POST", "/retrieve"):
+                await self._retrieve(receive, send)
+            elif route == ("POST", "/chat"):
+                await self._chat(receive, send)
+            else:
+                await _respond_json(send, {"error": "not found"}, status=404)
+        except BadRequest as e:
+            await _respond_json(send, {"error": str(e)}, status=400)
+
+    async def _retrieve(self, receive, send):
+        data = await _read_json(receive)
+        if not isinstance(data.get("query"), str):
+            raise BadRequest("query must be a string")
+        num_results = parse_num_results(data.get("num_results", 5))
+        options = parse_options(data.get("options"))
+        chunks, _ = await self.service.retrieve(data["query"], num_results, options)
+        await _respond_json(send, {"chunks": [chunk_to_dict(chunk) for chunk in chunks]})
+
+    async def _chat(self, receive, send):
+        data = await _read_json(receive)
+        messages = validate_messages(data.get("messages"))
+        num_results = parse_num_results(data.get("num_results", 5))
+        options = parse_options(data.get("options"))
+        events = self.service.chat(messages, num_results, options)
+        # Validate before committing to a 200 streaming response
+        first = await anext(events)
+
+        async def send_event(event: str, payload):
+            body = sse_event(event, payload)
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                ],
+            }
+        )
+        try:
+            await send_event(*first)
+            async for event in events:
+                await send_event(*event)
+        except Exception as e:  # headers are sent; report in-band
+            await send_event("error", {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            await events.aclose()
+        await send({"type": "http.response.body", "body": b""})
+
+
+app = RagApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve retrieval and chat over HTTP/SSE.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise SystemExit("The service needs an ASGI server: pip install uvicorn") from e
+    uvicorn.run("rag.service:app", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.storage.blob import ContainerClient
+
+from rag.documents import BlobDocument
+
+BLOB_CONTAINER = "articles"
+
+
+def get_container_client(
+    connection_string: str | None = None, container: str = BLOB_CONTAINER
+) -> ContainerClient:
+    """Container client from a connection string (Azure or Azurite)."""
+    return ContainerClient.from_connection_string(
+        connection_string or os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+        container_name=container,
+    )
+
+
+def iter_blob_documents(
+    container_client: ContainerClient,
+    names: Iterable[str] | None = None,
+    workers: int = 4,
+    max_buffered: int = 8,
+    max_concurrency: int = 4,
+) -> Iterator[BlobDocument]:
+    """Download PDFs from a container in parallel, yielding them from memory.
+
+    Downloads run on `workers` threads, each blob fetched in parallel ranged
+    chunks. At most `max_buffered` finished downloads wait for the consumer;
+    when conversion falls behind, the download threads block instead of
+    pulling the rest of the container into RAM.
+
+    Args:
+        container_client: Source container
+        names: Blob names to fetch, defaults to every PDF in the container
+        workers: Blobs downloaded at the same time
+        max_buffered: Downloaded blobs held while waiting to be consumed
+        max_concurrency: Parallel range requests per blob
+
+    Yields:
+        BlobDocument: Downloaded PDFs, in completion order
+    """
+    if names is None:
+        names = (
+            blob.name
+            for blob in container_client.list_blobs()
+            if blob.name.lower().endswith(".pdf")
+        )
+    names = iter(names)
+    names_lock = threading.Lock()
+    ready: queue.Queue = queue.Queue(maxsize=max_buffered)
+    done = object()
+    stop = threading.Event()
+
+    def download():
+        try:
+            while not stop.is_set():
+                with names_lock:
+                    name = next(names, None)
+                if name is None:
+                    return
+                data = container_client.download_blob(
+                    name, max_concurrency=max_concurrency
+                ).readall()
+                ready.put(BlobDocument(name=name, data=data))
+        except Exception as e:
+            ready.put(e)
+        finally:
+            ready.put(done)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(workers):
+            pool.submit(download)
+        remaining = workers
+        try:
+            while remaining:
+                item = ready.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # Unblock the download threads if the consumer stops early
+            stop.set()
+            while remaining:
+                if ready.get() is done:
+                    remaining -= 1
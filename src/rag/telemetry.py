@@ -0,0 +1,258 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rag.config import PROMETHEUS_HOST, PROMETHEUS_PORT, TELEMETRY_EXPORTER
+
+# Seconds; covers sub-millisecond cache hits up to multi-minute conversions
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+    60.0, 120.0, 300.0,
+)  # fmt: skip
+
+
+def _label_text(labels: tuple) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_label_text(labels)}}} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.buckets = name, help, buckets
+        # labels -> (bucket counts, sum, count)
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                label_text = _label_text(labels)
+                sep = "," if label_text else ""
+                cumulative = 0
+                for bound, n in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += n
+                    lines.append(
+                        f'{self.name}_bucket{{{label_text}{sep}le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+                lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("rag_stage_seconds", "Latency of pipeline stages")
+EVENTS = Counter("rag_events_total", "Documents, chunks, cache hits and other events")
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join([*STAGE_SECONDS.render(), *EVENTS.render()]) + "\n"
+
+
+# --------------------------------------------------------------
+# Exporters
+# --------------------------------------------------------------
+
+
+class PrometheusExporter:
+    """Serves `/metrics` from a background HTTP server."""
+
+    def __init__(self, port: int = PROMETHEUS_PORT, host: str = PROMETHEUS_HOST):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = render_metrics().encode()
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.end_headers()
+                if self.path == "/metrics":
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def on_span(self, name: str, start_ns: int, end_ns: int, attributes: dict):
+        pass  # spans are only aggregated into the histogram
+
+
+class OpenTelemetryExporter:
+    """Forwards spans and stage latencies to the OpenTelemetry API.
+
+    SDK setup (providers, OTLP endpoint) is left to the environment, e.g.
+    `opentelemetry-instrument` or OTEL_* variables.
+    """
+
+    def __init__(self):
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError as e:
+            raise ImportError(
+                "RAG_TELEMETRY=otel needs the opentelemetry-api package"
+            ) from e
+        self.tracer = trace.get_tracer("rag")
+        self.histogram = metrics.get_meter("rag").create_histogram(
+            "rag.stage.duration", unit="s", description="Latency of pipeline stages"
+        )
+
+    def on_span(self, name: str, start_ns: int, end_ns: int, attributes: dict):
+        span = self.tracer.start_span(name, start_time=start_ns, attributes=attributes)
+        span.end(end_time=end_ns)
+        self.histogram.record((end_ns - start_ns) / 1e9, {"stage": name, **attributes})
+
+
+# --------------------------------------------------------------
+# Instrumentation API
+# --------------------------------------------------------------
+
+_enabled = False
+_exporter = None
+_configure_lock = threading.Lock()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attributes", "_start")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _emit(self.name, self._start, end, self.attributes)
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+def _emit(name: str, start_ns: int, end_ns: int, attributes: dict):
+    STAGE_SECONDS.observe((end_ns - start_ns) / 1e9, stage=name)
+    if _exporter is not None:
+        # perf_counter has no epoch; shift onto wall-clock time for exporters
+        offset = time.time_ns() - time.perf_counter_ns()
+        _exporter.on_span(name, start_ns + offset, end_ns + offset, attributes)
+
+
+def span(name: str, **attributes):
+    """Time a block as a pipeline stage. A shared no-op when telemetry is off."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, attributes)
+
+
+def observe(name: str, seconds: float, **attributes):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)."""
+    if _enabled:
+        end = time.perf_counter_ns()
+        _emit(name, end - int(seconds * 1e9), end, attributes)
+
+
+def count(name: str, value: float = 1.0):
+    """Increment an event counter."""
+    if _enabled:
+        EVENTS.inc(value, event=name)
+
+
+def delta_text(chunk) -> str:
+    """Answer text carried by a streamed chat completion chunk, if any."""
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def traced_stream(stream, name: str = "generation"):
+    """Wrap a streaming chat response, recording time to first token and total.
+
+    The first token is the first chunk with answer text; the role-only chunk
+    the API sends up front does not count.
+    """
+    if not _enabled:
+        yield from stream
+        return
+    start = time.perf_counter_ns()
+    first = True
+    for chunk in stream:
+        if first and delta_text(chunk):
+            _emit("time_to_first_token", start, time.perf_counter_ns(), {})
+            first = False
+        yield chunk
+    _emit(name, start, time.perf_counter_ns(), {})
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def configure(
+    exporter: str | None = TELEMETRY_EXPORTER,
+    port: int = PROMETHEUS_PORT,
+    host: str = PROMETHEUS_HOST,
+):
+    """Turn instrumentation on with an exporter: "prometheus", "otel", "local" or "off".
+
+    "local" aggregates metrics in-process only (see `render_metrics`).
+    Calling this more than once keeps the first exporter.
+    """
+    global _enabled, _exporter
+    with _configure_lock:
+        if _enabled or exporter in (None, "", "off"):
+            return
+        if exporter == "prometheus":
+            _exporter = PrometheusExporter(port, host)
+        elif exporter == "otel":
+            _exporter = OpenTelemetryExporter()
+        elif exporter != "local":
+            raise ValueError(f"Unknown telemetry exporter: {exporter!r}")
+        _enabled = True
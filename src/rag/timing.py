@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    """Summarize per-call latencies in milliseconds."""
+    ms = np.asarray(seconds) * 1000
+    return {
+        "n": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "qps": float(len(ms) / (ms.sum() / 1000)) if ms.sum() else float("inf"),
+    }
+
+
+@contextmanager
+def timed(samples: list[float]):
+    """Append the duration of the block to `samples`."""
+    start = time.perf_counter()
+    yield
+    samples.append(time.perf_counter() - start)
@@ -1,5 +1,8 @@
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
+from docling_core.transforms.chunker.tokenizer.base import BaseTokenizer
+from pydantic import ConfigDict
 from tiktoken import get_encoding
 from transformers.tokenization_utils_base import PreTrainedTokenizerBase
 
@@ -9,21 +12,55 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
     """Minimal wrapper for OpenAI's tokenizer."""
 
     def __init__(
-        self, model_name: str = "cl100k_base", max_length: int = 8191, **kwargs
+        self,
+        model_name: str = "cl100k_base",
+        max_length: int = 8191,
+        cache_size: int = 65536,
+        id_cache_size: int = 1024,
+        **kwargs,
     ):
         """Initialize the tokenizer.
 
         Args:
             model_name: The name of the OpenAI encoding to use
             max_length: Maximum sequence length
+            cache_size: Number of distinct texts whose token counts are memoized
+            id_cache_size: Number of distinct texts whose token ids are memoized
         """
         super().__init__(model_max_length=max_length, **kwargs)
         self.tokenizer = get_encoding(model_name)
         self._vocab_size = self.tokenizer.max_token_value
+        self._vocab = None
+        # The chunker re-tokenizes the same, overlapping segments many times
+        # but mostly wants their length: counts are kept for many texts, the
+        # (much larger) id tuples only for a few.
+        self._count = lru_cache(maxsize=cache_size)(self._count_uncached)
+        self._encode = lru_cache(maxsize=id_cache_size)(self._encode_uncached)
+
+    def _count_uncached(self, text: str) -> int:
+        return len(self.tokenizer.encode_ordinary(text))
+
+    def _encode_uncached(self, text: str) -> Tuple[int, ...]:
+        return tuple(self.tokenizer.encode_ordinary(text))
+
+    def encode_ids(self, text: str) -> Tuple[int, ...]:
+        """Token ids of a text, memoized."""
+        return self._encode(text)
+
+    def count_tokens(self, text: str) -> int:
+        """Fast path for callers that only need the number of tokens."""
+        return self._count(text)
+
+    def encode_batch(self, texts: List[str], num_threads: int = 8) -> List[List[int]]:
+        """Encode many texts at once with tiktoken's threaded batch encoder."""
+        return self.tokenizer.encode_ordinary_batch(texts, num_threads=num_threads)
+
+    def count_tokens_batch(self, texts: List[str], num_threads: int = 8) -> List[int]:
+        return [len(ids) for ids in self.encode_batch(texts, num_threads=num_threads)]
 
     def tokenize(self, text: str, **kwargs) -> List[str]:
         """Main method used by HybridChunker."""
-        return [str(t) for t in self.tokenizer.encode(text)]
+        return [str(t) for t in self._encode(text)]
 
     def _tokenize(self, text: str) -> List[str]:
         return self.tokenize(text)
@@ -35,7 +72,9 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
         return str(index)
 
     def get_vocab(self) -> Dict[str, int]:
-        return dict(enumerate(range(self.vocab_size)))
+        if self._vocab is None:
+            self._vocab = {str(i): i for i in range(self.vocab_size)}
+        return self._vocab
 
     @property
     def vocab_size(self) -> int:
@@ -48,3 +87,25 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
     def from_pretrained(cls, *args, **kwargs):
         """Class method to match HuggingFace's interface."""
         return cls()
+
+    def for_chunker(self, max_tokens: int) -> "ChunkerTokenizer":
+        """Adapter that lets HybridChunker count tokens without building strings."""
+        return ChunkerTokenizer(tokenizer=self, max_tokens=max_tokens)
+
+
+class ChunkerTokenizer(BaseTokenizer):
+    """Docling chunker tokenizer backed by the memoized count path."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    tokenizer: OpenAITokenizerWrapper
+    max_tokens: int
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokenizer.count_tokens(text)
+
+    def get_max_tokens(self) -> int:
+        return self.max_tokens
+
+    def get_tokenizer(self) -> OpenAITokenizerWrapper:
+        return self.tokenizer
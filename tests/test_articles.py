@@ -0,0 +1,41 @@
+import lancedb
+import pyarrow as pa
+
+from rag.articles import (
+    ArticleCatalog,
+    add_article_columns,
+    backfill_article_columns,
+    doi_from_filename,
+)
+
+
+def test_doi_from_filename():
+    assert doi_from_filename("10.1002_advs.202508912.pdf") == "10.1002/advs.202508912"
+    assert doi_from_filename("notes.pdf") is None
+    assert doi_from_filename(None) is None
+
+
+def test_legacy_table_gets_typed_article_columns(tmp_path):
+    table = lancedb.connect(tmp_path).create_table(
+        "docling",
+        pa.table(
+            {
+                "text": ["a", "b"],
+                "metadata": [
+                    {"filename": "10.1002_advs.1.pdf"},
+                    {"filename": "other.pdf"},
+                ],
+            }
+        ),
+    )
+    assert add_article_columns(table) == ["doi", "year", "journal"]
+    assert add_article_columns(table) == []
+    schema = table.schema
+    assert schema.field("doi").type == pa.string()
+    assert schema.field("year").type == pa.int64()
+    assert schema.field("journal").type == pa.string()
+
+    catalog = ArticleCatalog([{"doi": "10.1002/ADVS.1", "year": 2025, "journal": "J"}])
+    assert backfill_article_columns(table, catalog) == 1
+    rows = table.search().where("year = 2025").select(["doi", "journal"]).to_list()
+    assert [(row["doi"], row["journal"]) for row in rows] == [("10.1002/advs.1", "J")]
@@ -0,0 +1,46 @@
+import pytest
+
+from rag.bench.suite import (
+    bench_generation,
+    bench_ingestion,
+    bench_queries,
+    compare,
+)
+
+# Generous ceilings: these catch order-of-magnitude regressions on any
+# machine; `python -m rag.bench.suite --compare` tracks the finer drift
+MAX_QUERY_P99_MS = 250
+MIN_INGESTION_DOCS_PER_S = 0.05
+MAX_TTFT_OVERHEAD_MS = 30
+
+
+def test_compare_reports_only_metrics_that_got_worse():
+    baseline = {"results": {"q": {"p99_ms": 10.0, "qps": 100.0, "n": 5}}}
+    current = {"results": {"q": {"p99_ms": 10.5, "qps": 80.0, "n": 50}}}
+    assert compare(current, baseline, tolerance=0.1) == [
+        "q.qps: 100 -> 80 (+20%)"
+    ]
+    assert compare(baseline, baseline, tolerance=0.1) == []
+
+
+def test_query_latency(tmp_path):
+    results = bench_queries(tmp_path, sizes=[2_000], num_queries=30, k=5)
+    for mode in ("vector", "hybrid"):
+        assert results[f"2000_{mode}"]["p99_ms"] < MAX_QUERY_P99_MS
+
+
+def test_generation_time_to_first_token():
+    ttft = 0.02
+    results = bench_generation(5, ttft=ttft, token_delay=0.001)
+    assert results["ttft"]["p50_ms"] >= ttft * 1000
+    assert results["ttft"]["p99_ms"] < ttft * 1000 + MAX_TTFT_OVERHEAD_MS
+    assert results["total"]["p50_ms"] > results["ttft"]["p50_ms"]
+
+
+def test_ingestion_throughput(tmp_path):
+    pytest.importorskip("docling")
+    results = bench_ingestion(tmp_path, count=2, pages=2, workers=2)
+    assert results["failed"] == 0
+    assert results["docs_per_s"] > MIN_INGESTION_DOCS_PER_S
+    # The conversions went to this run's own cache
+    assert any((tmp_path / "conversions").rglob("*.json.gz"))
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from ETL import blob_catalog
+from ETL.blob_catalog import BlobCatalog, sync_directory
+
+
+class FakeBlobClient:
+    def __init__(self, container, name):
+        self.container, self.name = container, name
+
+    def upload_blob(self, data, **kwargs):
+        self.container.uploads.append(self.name)
+        return {"etag": "0x1", "last_modified": datetime.now(timezone.utc)}
+
+
+class FakeContainer:
+    def __init__(self):
+        self.uploads = []
+
+    def get_blob_client(self, name):
+        return FakeBlobClient(self, name)
+
+
+def test_sync_uploads_each_content_once(tmp_path):
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    (pdfs / "a.pdf").write_bytes(b"%PDF a")
+    (pdfs / "copy of a.pdf").write_bytes(b"%PDF a")
+    (pdfs / "b.pdf").write_bytes(b"%PDF b")
+    container = FakeContainer()
+    catalog = BlobCatalog(tmp_path / "catalog.sqlite")
+
+    counts = sync_directory(pdfs, container, catalog, workers=2)
+    assert counts == {"uploaded": 2, "skipped": 1, "failed": 0}
+    assert sorted(container.uploads) == ["a.pdf", "b.pdf"]
+
+    # Everything is in the catalog now; nothing is uploaded again
+    counts = sync_directory(pdfs, container, catalog, workers=2)
+    assert counts == {"uploaded": 0, "skipped": 3, "failed": 0}
+    assert len(container.uploads) == 2
+
+
+def test_unchanged_files_are_not_hashed_again(tmp_path, monkeypatch):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF a")
+    catalog = BlobCatalog(tmp_path / "catalog.sqlite")
+    hashed = []
+    file_md5 = blob_catalog.file_md5
+    monkeypatch.setattr(
+        blob_catalog, "file_md5", lambda p: hashed.append(p) or file_md5(p)
+    )
+
+    first = catalog.local_md5(path)
+    assert catalog.local_md5(path) == first
+    assert len(hashed) == 1
+
+    path.write_bytes(b"%PDF changed")
+    assert catalog.local_md5(path) == (file_md5(path), path.stat().st_size)
+    assert len(hashed) == 2
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from rag import caching
+from rag.caching import QueryEmbeddingCache, SemanticAnswerCache, history_key
+
+
+class _CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def compute_query_embeddings(self, query: str):
+        self.calls.append(query)
+        return [[float(len(query)), 1.0]]
+
+
+def _table(func) -> SimpleNamespace:
+    function = SimpleNamespace(function=func)
+    return SimpleNamespace(embedding_functions={"vector": function})
+
+
+def test_embedding_cache_evicts_the_least_recently_used():
+    func = _CountingEmbedder()
+    table = _table(func)
+    cache = QueryEmbeddingCache(max_size=2)
+
+    cache.embed(table, "a")
+    cache.embed(table, "bb")
+    cache.embed(table, " a ")  # hit, and now the most recently used
+    cache.embed(table, "ccc")  # evicts "bb"
+    cache.embed(table, "a")
+    cache.embed(table, "bb")
+
+    assert func.calls == ["a", "bb", "ccc", "bb"]
+    assert cache.embed(table, "a").dtype == np.float32
+
+
+def test_embedding_cache_is_keyed_by_embedding_function():
+    cache = QueryEmbeddingCache()
+    first, second = _CountingEmbedder(), _CountingEmbedder()
+
+    cache.embed(_table(first), "a")
+    cache.embed(_table(second), "a")
+
+    assert (first.calls, second.calls) == (["a"], ["a"])
+
+
+HISTORY = history_key([])
+VECTOR = np.array([1.0, 0.0])
+
+
+def test_answer_cache_matches_similar_questions_only():
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60)
+    cache.put(VECTOR, ["c1", "c2"], HISTORY, "answer", table_version=1)
+
+    close = np.array([1.0, 0.2])  # cosine 0.98
+    far = np.array([1.0, 0.5])  # cosine 0.89
+    assert cache.lookup(close, ["c1", "c2"], HISTORY, 1) == "answer"
+    assert cache.lookup(far, ["c1", "c2"], HISTORY, 1) is None
+    assert cache.lookup(VECTOR, ["c2", "c1"], HISTORY, 1) is None
+    assert cache.lookup(VECTOR, ["c1", "c2"], history_key([{"a": 1}]), 1) is None
+
+
+def test_answer_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(caching.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(ttl=60)
+    cache.put(VECTOR, ["c1"], HISTORY, "answer", table_version=1)
+
+    now[0] += 60
+    assert cache.lookup(VECTOR, ["c1"], HISTORY, 1) == "answer"
+    now[0] += 1
+    assert cache.lookup(VECTOR, ["c1"], HISTORY, 1) is None
+
+
+def test_answer_cache_is_dropped_when_the_table_changes():
+    cache = SemanticAnswerCache()
+    cache.put(VECTOR, ["c1"], HISTORY, "answer", table_version=1)
+
+    assert cache.lookup(VECTOR, ["c1"], HISTORY, 2) is None
+    assert cache.lookup(VECTOR, ["c1"], HISTORY, 1) is None
+
+
+def test_answer_cache_keeps_the_newest_entries():
+    cache = SemanticAnswerCache(max_size=2)
+    for i in range(3):
+        cache.put(VECTOR, [f"c{i}"], HISTORY, f"answer {i}", table_version=1)
+
+    assert cache.lookup(VECTOR, ["c0"], HISTORY, 1) is None
+    assert [cache.lookup(VECTOR, [f"c{i}"], HISTORY, 1) for i in (1, 2)] == [
+        "answer 1",
+        "answer 2",
+    ]
+
+
+@pytest.mark.parametrize("threshold", [0.9, 0.99])
+def test_answer_cache_threshold(threshold):
+    cache = SemanticAnswerCache(threshold=threshold)
+    cache.put(VECTOR, ["c1"], HISTORY, "answer", table_version=1)
+    angle = np.arccos(threshold)
+
+    def at(scale: float) -> np.ndarray:
+        return np.array([np.cos(angle * scale), np.sin(angle * scale)])
+
+    assert cache.lookup(at(0.9), ["c1"], HISTORY, 1) == "answer"
+    assert cache.lookup(at(1.1), ["c1"], HISTORY, 1) is None
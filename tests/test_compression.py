@@ -0,0 +1,105 @@
+import lancedb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from rag.compression import rescore, truncate_vectors, two_stage_search
+from rag.indexing import SHORT_VECTOR_COLUMN, VECTOR_COLUMN
+
+
+def test_truncate_vectors_keeps_a_unit_prefix():
+    vectors = np.array([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]])
+
+    short = truncate_vectors(vectors, 2, "float16")
+
+    assert short.dtype == np.float16
+    assert short.astype(np.float32) == pytest.approx(
+        np.array([[0.6, 0.8], [0.0, 0.0]]), abs=1e-3
+    )
+
+
+def _candidates(vectors) -> pa.Table:
+    return pa.table(
+        {
+            "id": [str(i) for i in range(len(vectors))],
+            VECTOR_COLUMN: pa.array(vectors, pa.list_(pa.float32(), 2)),
+            "_distance": pa.array([0.0] * len(vectors), pa.float32()),
+        }
+    )
+
+
+CANDIDATES = [[1.0, 0.0], [3.0, 3.0], [0.0, 0.5]]
+QUERY = [1.0, 1.0]
+
+
+@pytest.mark.parametrize(
+    ("metric", "ids", "distances"),
+    [
+        ("cosine", ["1", "0"], [0.0, 1 - 1 / np.sqrt(2)]),
+        ("dot", ["1", "0"], [1 - 6.0, 1 - 1.0]),
+        ("l2", ["0", "2"], [1.0, 1.25]),
+    ],
+)
+def test_rescore_ranks_by_the_metric(metric, ids, distances):
+    results = rescore(_candidates(CANDIDATES), QUERY, 2, metric=metric)
+
+    assert results["id"].to_pylist() == ids
+    assert results["_distance"].to_pylist() == pytest.approx(distances)
+    assert VECTOR_COLUMN not in results.column_names
+
+
+def test_rescore_keeps_vectors_on_request():
+    results = rescore(_candidates(CANDIDATES), QUERY, 1, keep_vectors=True)
+
+    assert results.column_names == ["id", VECTOR_COLUMN, "_distance"]
+
+
+def test_rescore_rejects_unknown_metrics():
+    with pytest.raises(ValueError):
+        rescore(_candidates(CANDIDATES), QUERY, 1, metric="hamming")
+
+
+def _table(tmp_path, vectors: np.ndarray, short_dim: int):
+    short = truncate_vectors(vectors, short_dim, "float32")
+    dim = vectors.shape[1]
+    data = pa.table(
+        {
+            "id": [str(i) for i in range(len(vectors))],
+            VECTOR_COLUMN: pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.astype(np.float32).ravel()), dim
+            ),
+            SHORT_VECTOR_COLUMN: pa.FixedSizeListArray.from_arrays(
+                pa.array(short.ravel()), short_dim
+            ),
+        }
+    )
+    return lancedb.connect(tmp_path).create_table("docling", data)
+
+
+def test_two_stage_search_matches_an_exact_search(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16))
+    query = rng.normal(size=16)
+    table = _table(tmp_path, vectors, short_dim=8)
+
+    results = two_stage_search(table, query, 5, ["id"], rescore_factor=40)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = 1 - unit @ (query / np.linalg.norm(query))
+    expected = np.argsort(exact)[:5]
+    assert results["id"].to_pylist() == [str(i) for i in expected]
+    assert results["_distance"].to_pylist() == pytest.approx(exact[expected], abs=1e-5)
+    assert VECTOR_COLUMN not in results.column_names
+
+
+def test_two_stage_search_rescores_with_the_given_metric(tmp_path):
+    vectors = np.array([[1.0, 0.0, 0.0, 0.0], [4.0, 0.1, 0.0, 0.0]])
+    table = _table(tmp_path, vectors, short_dim=2)
+
+    cosine = two_stage_search(table, [1.0, 1.0, 0, 0], 1, ["id"], rescore_factor=2)
+    l2 = two_stage_search(
+        table, [1.0, 1.0, 0, 0], 1, ["id"], rescore_factor=2, metric="l2"
+    )
+
+    assert (cosine["id"][0].as_py(), l2["id"][0].as_py()) == ("1", "0")
+    assert l2["_distance"].to_pylist() == pytest.approx([1.0])
@@ -0,0 +1,99 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from docling_core.types.doc import DoclingDocument
+
+from rag import conversion_cache
+from rag.conversion_cache import (
+    ConversionCache,
+    NotCached,
+    pdf_digest,
+    pipeline_fingerprint,
+)
+
+
+class _Converter:
+    """Stand-in DocumentConverter counting its conversions."""
+
+    def __init__(self):
+        self.converted = []
+
+    def convert(self, source):
+        self.converted.append(source)
+        return SimpleNamespace(document=DoclingDocument(name=source.stem))
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.7 paper")
+    return path
+
+
+def test_second_conversion_is_a_hit(tmp_path, pdf):
+    cache = ConversionCache("abc", tmp_path / "cache")
+    converter = _Converter()
+
+    first, first_cached = cache.convert(converter, pdf)
+    second, second_cached = cache.convert(converter, pdf)
+
+    assert (first_cached, second_cached) == (False, True)
+    assert second == first
+    assert converter.converted == [pdf]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_other_fingerprints_miss(tmp_path, pdf):
+    converter = _Converter()
+    ConversionCache("abc", tmp_path).convert(converter, pdf)
+
+    with pytest.raises(NotCached):
+        ConversionCache("def", tmp_path).convert(converter, pdf, cache_only=True)
+    assert ConversionCache("abc", tmp_path).convert(converter, pdf, cache_only=True)[1]
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [
+        lambda path: path.write_bytes(b"not gzip"),
+        lambda path: path.write_bytes(path.read_bytes()[:20]),
+        lambda path: path.write_bytes(gzip.compress(b'{"name": 1')),
+    ],
+    ids=["not-gzip", "truncated", "bad-json"],
+)
+def test_corrupt_entries_are_converted_again(tmp_path, pdf, damage):
+    cache = ConversionCache("abc", tmp_path)
+    converter = _Converter()
+    cache.convert(converter, pdf)
+    damage(cache.path(pdf_digest(pdf)))
+
+    assert cache.get(pdf_digest(pdf)) is None
+    assert not cache.path(pdf_digest(pdf)).exists()
+    document, cached = cache.convert(converter, pdf)
+
+    assert not cached
+    assert document.name == "paper"
+    assert len(converter.converted) == 2
+    assert cache.convert(converter, pdf)[1]
+
+
+def test_fingerprint_covers_docling_version_and_options(monkeypatch):
+    pytest.importorskip("docling")
+    from docling.datamodel.base_models import InputFormat
+
+    def converter(ocr: bool):
+        options = SimpleNamespace(model_dump_json=lambda: f'{{"do_ocr": {ocr}}}')
+        option = SimpleNamespace(
+            pipeline_cls=_Converter, backend=_Converter, pipeline_options=options
+        )
+        return SimpleNamespace(format_to_options={InputFormat.PDF: option})
+
+    monkeypatch.setattr(conversion_cache, "docling_version", lambda: "2.0.0")
+    fingerprints = {pipeline_fingerprint(converter(False))}
+    fingerprints.add(pipeline_fingerprint(converter(True)))
+    monkeypatch.setattr(conversion_cache, "docling_version", lambda: "2.1.0")
+    fingerprints.add(pipeline_fingerprint(converter(False)))
+
+    assert len(fingerprints) == 3
+    assert pipeline_fingerprint(converter(False)) in fingerprints
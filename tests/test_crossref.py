@@ -0,0 +1,66 @@
+import itertools
+import json
+import threading
+import time
+
+import pytest
+
+from ETL import crossref
+
+
+def _works(query: str, count: int | None = None):
+    numbers = itertools.count() if count is None else range(count)
+    for i in numbers:
+        yield {"doi": f"10.1/{query}.{i}", "year": 2025, "journal": "J"}
+
+
+def test_harvest_yields_each_doi_once(monkeypatch):
+    def fake(query, year, session=None, cache=None):
+        yield from _works("shared", 3)
+        yield {"doi": "10.1/SHARED.0", "year": 2025, "journal": "J"}
+        yield from _works(query, 2)
+
+    monkeypatch.setattr(crossref, "iter_wiley_works", fake)
+    dois = [work["doi"] for work in crossref.harvest(["a", "b"], max_workers=2)]
+    assert sorted(dois) == sorted(
+        ["10.1/shared.0", "10.1/shared.1", "10.1/shared.2"]
+        + ["10.1/a.0", "10.1/a.1", "10.1/b.0", "10.1/b.1"]
+    )
+
+
+def test_stopping_early_releases_the_workers(monkeypatch):
+    # Endless queries fill the result queue; the workers must not block on it
+    monkeypatch.setattr(
+        crossref, "iter_wiley_works", lambda query, *args, **kwargs: _works(query)
+    )
+    before = threading.active_count()
+    works = crossref.harvest(["a", "b"], max_workers=2)
+    assert len(list(itertools.islice(works, 5))) == 5
+    works.close()
+
+    deadline = time.monotonic() + 5
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() == before
+
+
+def test_worker_error_surfaces_immediately(monkeypatch):
+    def fake(query, *args, **kwargs):
+        if query == "broken":
+            raise RuntimeError("HTTP 500")
+        yield from _works(query)  # never finishes
+
+    monkeypatch.setattr(crossref, "iter_wiley_works", fake)
+    with pytest.raises(RuntimeError, match="HTTP 500"):
+        for _ in crossref.harvest(["endless", "broken"], max_workers=2):
+            pass
+
+
+def test_write_dois_replaces_previous_output(tmp_path):
+    out, metadata = tmp_path / "dois.txt", tmp_path / "works.jsonl"
+    crossref.write_dois(_works("old", 3), out, metadata)
+    assert crossref.write_dois(_works("new", 2), out, metadata) == 2
+
+    assert out.read_text().split() == ["10.1/new.0", "10.1/new.1"]
+    lines = metadata.read_text().splitlines()
+    assert [json.loads(line)["doi"] for line in lines] == ["10.1/new.0", "10.1/new.1"]
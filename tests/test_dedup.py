@@ -0,0 +1,166 @@
+from pathlib import Path
+
+import lancedb
+import pytest
+
+from rag import ingestion
+from rag.articles import ArticleCatalog
+from rag.bench.fakes import fake_embedding_function
+from rag.dedup import ChunkDeduplicator
+from rag.ingestion import DocumentResult, ingest
+from rag.retrieval import Scope, SearchOptions, retrieve
+from rag.schema import build_chunks_schema
+
+PARAGRAPH = (
+    "This article is licensed under a Creative Commons Attribution license "
+    "which permits use, sharing and adaptation in any medium or format"
+)
+
+
+def _row(
+    chunk_id: str,
+    text: str,
+    filename: str,
+    doi: str | None = None,
+    journal: str | None = None,
+) -> dict:
+    return {
+        "id": chunk_id,
+        "text": text,
+        "metadata": {"filename": filename, "page_numbers": [1], "title": None},
+        "doi": doi,
+        "year": 2025,
+        "journal": journal,
+    }
+
+
+def test_exact_duplicates_are_told_apart_by_digest(tmp_path):
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    cycle = "alpha beta gamma delta epsilon"
+    _, references = dedup.split(
+        [
+            _row("a", PARAGRAPH, "a.pdf"),
+            _row("b", PARAGRAPH.upper(), "b.pdf"),
+            # Same shingles, so the same signature, but not the same words
+            _row("c", f"{cycle} {cycle}", "c.pdf"),
+            _row("d", f"{cycle} {cycle} {cycle}", "d.pdf"),
+        ]
+    )
+
+    assert [(ref["id"], ref["similarity"], ref["exact"]) for ref in references] == [
+        ("b", 1.0, True),
+        ("d", 1.0, False),
+    ]
+    assert (dedup.stats.num_exact, dedup.stats.num_near) == (1, 1)
+
+
+def test_rollback_forgets_the_split(tmp_path):
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    dedup.split([_row("a", PARAGRAPH, "a.pdf")])
+    dedup.commit()
+    dedup.split([_row("b", PARAGRAPH, "b.pdf"), _row("c", "other text", "c.pdf")])
+
+    dedup.rollback()
+
+    assert len(dedup) == 1
+    assert dedup.references(["a"]) == {"a": []}
+    assert (dedup.stats.num_chunks, dedup.stats.num_duplicates) == (1, 0)
+    reopened = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    assert len(reopened) == 1
+
+
+def test_chunks_stored_by_an_earlier_run_are_not_written_again(tmp_path):
+    rows = [_row("a", PARAGRAPH, "a.pdf"), _row("b", "results differ", "a.pdf")]
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    dedup.split(rows)
+    dedup.commit()
+
+    assert dedup.split(rows) == ([], [])
+
+
+class _FailingTable:
+    """Stand-in table whose `fail_on`-th write raises."""
+
+    def __init__(self, fail_on: int):
+        self.rows: list[dict] = []
+        self.writes = 0
+        self.fail_on = fail_on
+
+    def add(self, rows: list[dict]):
+        self.writes += 1
+        if self.writes == self.fail_on:
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+
+def test_ingest_commits_dedup_only_after_the_write(tmp_path, monkeypatch):
+    docs = [
+        DocumentResult(Path("a.pdf"), [_row("a1", PARAGRAPH, "a.pdf")]),
+        DocumentResult(
+            Path("b.pdf"),
+            [_row("b1", PARAGRAPH, "b.pdf"), _row("b2", "results differ", "b.pdf")],
+        ),
+    ]
+    monkeypatch.setattr(ingestion, "iter_documents", lambda *args, **kwargs: docs)
+    monkeypatch.setattr(ingestion, "add_short_vectors", lambda table, rows: rows)
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    table = _FailingTable(fail_on=2)
+
+    with pytest.raises(OSError):
+        ingest([], table, batch_size=1, articles=ArticleCatalog(), dedup=dedup)
+
+    assert [row["id"] for row in table.rows] == ["a1"]
+    assert len(dedup) == 1
+    assert dedup.references(["a1"]) == {"a1": []}
+
+
+def test_scoped_search_finds_papers_stored_as_references(tmp_path):
+    func = fake_embedding_function(dim=16)
+    table = lancedb.connect(tmp_path).create_table(
+        "docling", schema=build_chunks_schema(func, short_dim=0)
+    )
+    table.add(
+        [
+            _row("a1", PARAGRAPH, "a.pdf", doi="10.1/a"),
+            _row("a2", "grain boundaries in alloys", "a.pdf", doi="10.1/a"),
+        ]
+    )
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    dedup.split(
+        [
+            _row("a1", PARAGRAPH, "a.pdf", doi="10.1/a"),
+            _row("b1", PARAGRAPH, "b.pdf", doi="10.1/b"),
+        ]
+    )
+    dedup.commit()
+    options = SearchOptions(mode="vector", rescore_factor=0)
+    in_b = SearchOptions(mode="vector", rescore_factor=0, scope=Scope(doi="10.1/b"))
+
+    assert retrieve(table, PARAGRAPH, 5, in_b) == []
+    [chunk] = retrieve(table, PARAGRAPH, 5, in_b, dedup=dedup)
+    assert (chunk.id, chunk.doi, chunk.filename) == ("a1", "10.1/b", "b.pdf")
+
+    chunks = retrieve(table, PARAGRAPH, 5, options, dedup=dedup)
+    assert [chunk.id for chunk in chunks][0] == "a1"
+    assert chunks[0].doi == "10.1/a"
+    assert [ref["id"] for ref in chunks[0].references] == ["b1"]
+    assert chunks[1].references == ()
+
+
+def test_scope_values_are_bound_not_spliced(tmp_path):
+    dedup = ChunkDeduplicator(tmp_path / "dedup.sqlite")
+    dedup.split(
+        [
+            _row("a1", PARAGRAPH, "a.pdf", journal="Acta"),
+            _row("b1", PARAGRAPH, "b.pdf", journal="O'Brien Letters"),
+            _row("c1", PARAGRAPH, "c.pdf", journal="Acta"),
+        ]
+    )
+    dedup.commit()
+
+    assert dedup.scope_ids(Scope(journal="O'Brien Letters")) == ["a1"]
+    assert dedup.scope_ids(Scope(journal="Acta", year_from=2026)) == []
+    assert dedup.scope_ids(Scope(journal="x' OR '1'='1")) == []
+    assert dedup.scope_ids(Scope()) == []
+    references = dedup.references(["a1"], Scope(journal="Acta", year_to=2025))
+    assert [ref["id"] for ref in references["a1"]] == ["c1"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pyarrow as pa
+
+from rag.diversity import maximal_marginal_relevance, min_max_scale
+from rag.retrieval import SearchOptions, diversify
+
+QUERY = [1.0, 0.0, 0.0]
+# 0 and 1 are near-duplicates close to the query; 2 points elsewhere
+VECTORS = [[1.0, 0.1, 0.0], [1.0, 0.12, 0.0], [0.0, 0.0, 1.0]]
+
+
+def test_mmr_drops_near_duplicates():
+    assert maximal_marginal_relevance(QUERY, VECTORS, 2) == [0, 2]
+
+
+def test_mmr_ranks_by_given_relevance_instead_of_the_query_vector():
+    # The keyword side found chunk 2 best; the vectors only measure redundancy
+    selected = maximal_marginal_relevance(
+        QUERY, VECTORS, 3, lambda_mult=0.7, relevance=[0.5, 0.4, 1.0]
+    )
+    assert selected == [2, 0]
+
+
+def test_min_max_scale():
+    assert min_max_scale([0.02, 0.03, 0.04]).tolist() == [0.0, 0.5, 1.0]
+    assert min_max_scale([0.5, 0.5]).tolist() == [1.0, 1.0]
+    assert min_max_scale([]).size == 0
+
+
+def test_diversify_keeps_the_fused_ranking():
+    results = pa.table(
+        {
+            "id": ["a", "b", "c"],
+            "_score": [0.033, 0.032, 0.016],
+            "vector": pa.array(
+                np.asarray([VECTORS[2], VECTORS[0], VECTORS[1]], np.float32).tolist(),
+                pa.list_(pa.float32(), 3),
+            ),
+        }
+    )
+    selected = diversify(results, QUERY, 2, SearchOptions(mode="hybrid"))
+    assert selected["id"].to_pylist() == ["a", "b"]
+    assert "vector" not in selected.column_names
@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+
+from blob_utils.downloader import (
+    Checkpoint,
+    PermanentError,
+    TokenBucket,
+    WileyBatchDownloader,
+)
+
+
+def test_token_bucket_spaces_calls_by_the_rate():
+    bucket = TokenBucket(rate=20)  # one call per 50ms
+    start = time.monotonic()
+    stamps = []
+    for _ in range(5):
+        bucket.acquire()
+        stamps.append(time.monotonic() - start)
+
+    assert stamps[0] < 0.02  # a new bucket is full
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert min(gaps) >= 0.045
+    assert stamps[-1] == pytest.approx(0.2, abs=0.05)
+
+
+def test_token_bucket_allows_a_burst_of_its_capacity():
+    bucket = TokenBucket(rate=10, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.02
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_checkpoint_survives_a_restart(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    checkpoint = Checkpoint(path)
+    checkpoint.mark_failed("10.1/a", "HTTP 503")
+    checkpoint.mark_done("10.1/b")
+    checkpoint.mark_failed("10.1/c", "HTTP 404")
+    checkpoint.mark_done("10.1/a")
+
+    reloaded = Checkpoint(path)
+    assert reloaded.done == {"10.1/a", "10.1/b"}
+    assert reloaded.failed == {"10.1/c": "HTTP 404"}
+    assert not path.with_suffix(".tmp").exists()
+    assert json.loads(path.read_text())["done"] == ["10.1/a", "10.1/b"]
+
+
+class FakeContainer:
+    def __init__(self):
+        self.blobs = {}
+
+    def upload_blob(self, name, data, **kwargs):
+        self.blobs[name] = data
+
+
+def _downloader(container, checkpoint, failing=()):
+    downloader = WileyBatchDownloader(
+        container, checkpoint, limiter=TokenBucket(rate=1000), token="test"
+    )
+    downloaded = []
+
+    def download(doi):
+        downloaded.append(doi)
+        if doi in failing:
+            raise PermanentError("HTTP 404")
+        return f"%PDF {doi}".encode()
+
+    downloader.download = download
+    return downloader, downloaded
+
+
+def test_run_resumes_where_the_checkpoint_left_off(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    dois = ["10.1/a", "10.1/b", "10.1/c", "10.1/a"]
+
+    container = FakeContainer()
+    downloader, downloaded = _downloader(container, Checkpoint(path), {"10.1/c"})
+    checkpoint = downloader.run(dois)
+    assert downloaded == ["10.1/a", "10.1/b", "10.1/c"]
+    assert checkpoint.done == {"10.1/a", "10.1/b"}
+    assert set(checkpoint.failed) == {"10.1/c"}
+    assert set(container.blobs) == {"10.1_a.pdf", "10.1_b.pdf"}
+
+    # A second run skips what is done and retries only the failure
+    downloader, downloaded = _downloader(container, Checkpoint(path))
+    checkpoint = downloader.run(dois)
+    assert downloaded == ["10.1/c"]
+    assert checkpoint.done == {"10.1/a", "10.1/b", "10.1/c"}
+    assert checkpoint.failed == {}
+
+
+def test_failed_upload_is_recorded_not_marked_done(tmp_path):
+    class BrokenContainer:
+        def upload_blob(self, name, data, **kwargs):
+            raise ConnectionError("unreachable")
+
+    downloader, _ = _downloader(BrokenContainer(), Checkpoint(tmp_path / "c.json"))
+    checkpoint = downloader.run(["10.1/a"])
+    assert checkpoint.done == set()
+    assert checkpoint.failed["10.1/a"].startswith("upload: ConnectionError")
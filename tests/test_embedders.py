@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+from lancedb.embeddings import get_registry
+
+from rag.embedders import EmbeddingCache
+
+
+def _vector(value: float, dim: int = 4) -> np.ndarray:
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_cache_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    key_a = EmbeddingCache.key("fake/fake", 4, "alpha")
+    key_b = EmbeddingCache.key("fake/fake", 4, "beta")
+    cache.put_many({key_a: _vector(1.0)})
+
+    found = cache.get_many([key_a, key_b])
+    assert list(found) == [key_a]
+    np.testing.assert_array_equal(found[key_a], _vector(1.0))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_persists_across_connections(tmp_path):
+    key = EmbeddingCache.key("fake/fake", 4, "alpha")
+    EmbeddingCache(tmp_path / "cache.sqlite").put_many({key: _vector(2.0)})
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite")
+    assert len(reopened) == 1
+    np.testing.assert_array_equal(reopened.get_many([key])[key], _vector(2.0))
+
+
+def test_keys_depend_on_model_and_dimensions():
+    key = EmbeddingCache.key("openai/text-embedding-3-large", None, "alpha")
+    assert key != EmbeddingCache.key("openai/text-embedding-3-small", None, "alpha")
+    assert key != EmbeddingCache.key("openai/text-embedding-3-large", 256, "alpha")
+    assert key == EmbeddingCache.key("openai/text-embedding-3-large", None, "alpha")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put_many({"a": _vector(1.0), "b": _vector(2.0)})
+    time.sleep(0.01)
+    cache.get_many(["a"])  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.put_many({"c": _vector(3.0)})
+
+    assert len(cache) == 2
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_replacing_an_entry_does_not_count_twice(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put_many({"a": _vector(1.0), "b": _vector(2.0)})
+    cache.put_many({"a": _vector(1.5)})
+
+    assert set(cache.get_many(["a", "b"])) == {"a", "b"}
+
+
+def _cached_fake(tmp_path, dim: int = 8):
+    return (
+        get_registry()
+        .get("cached")
+        .create(
+            source="fake",
+            name="fake",
+            dim=dim,
+            cache_path=str(tmp_path / "cache.sqlite"),
+        )
+    )
+
+
+def test_cached_function_embeds_each_text_once(tmp_path):
+    func = _cached_fake(tmp_path)
+    first = func.compute_source_embeddings(["alpha beta", "gamma", "alpha beta"])
+    assert func.inner.num_calls == 1
+
+    second = func.compute_source_embeddings(["gamma", "alpha beta"])
+    assert func.inner.num_calls == 1
+    np.testing.assert_allclose(second[0], first[1])
+    np.testing.assert_allclose(second[1], first[0])
+
+
+def test_cached_function_matches_the_wrapped_function(tmp_path):
+    func = _cached_fake(tmp_path)
+    fake = get_registry().get("fake").create(dim=8)
+    texts = ["alpha beta", "delta"]
+    np.testing.assert_allclose(
+        func.compute_source_embeddings(texts), fake.compute_source_embeddings(texts)
+    )
+
+
+def test_other_dimensions_miss_the_cache(tmp_path):
+    _cached_fake(tmp_path, dim=8).compute_source_embeddings(["alpha"])
+    wider = _cached_fake(tmp_path, dim=16)
+    vectors = wider.compute_source_embeddings(["alpha"])
+    assert wider.inner.num_calls == 1
+    assert len(vectors[0]) == 16
@@ -0,0 +1,60 @@
+import pytest
+
+from rag.evaluation import LabeledQuestion, recall_at_k, reciprocal_rank
+from rag.retrieval import RetrievedChunk
+from rag.timing import latency_summary
+
+
+def _chunk(chunk_id: str, filename: str = "other.pdf", pages=(1,)) -> RetrievedChunk:
+    return RetrievedChunk(chunk_id, "text", filename, list(pages), None, 0.0)
+
+
+LABEL = LabeledQuestion(
+    "How are grain boundaries pinned?",
+    chunk_ids=["c1", "c2"],
+    sources=[{"filename": "a.pdf", "page": 3}, {"filename": "b.pdf"}],
+)
+# Ranks: 1 miss, 2 c2, 3 a.pdf p.3, 4 c2 again, 5 b.pdf (any page)
+CHUNKS = [
+    _chunk("x"),
+    _chunk("c2"),
+    _chunk("y", "a.pdf", pages=(2, 3)),
+    _chunk("c2"),
+    _chunk("z", "b.pdf", pages=(9,)),
+]
+
+
+@pytest.mark.parametrize(
+    ("k", "recall"),
+    [(0, 0.0), (1, 0.0), (2, 1 / 4), (3, 2 / 4), (4, 2 / 4), (5, 3 / 4), (50, 3 / 4)],
+)
+def test_recall_at_k_counts_each_label_once(k, recall):
+    assert recall_at_k(LABEL, CHUNKS, k) == recall
+
+
+def test_source_labels_match_on_page():
+    label = LabeledQuestion("q", sources=[{"filename": "a.pdf", "page": 3}])
+
+    assert recall_at_k(label, [_chunk("y", "a.pdf", pages=(2,))], 5) == 0.0
+    assert recall_at_k(label, [_chunk("y", "a.pdf", pages=(3, 4))], 5) == 1.0
+
+
+def test_recall_of_a_question_without_labels_is_zero():
+    assert recall_at_k(LabeledQuestion("q"), CHUNKS, 5) == 0.0
+
+
+def test_reciprocal_rank_of_the_first_relevant_chunk():
+    assert reciprocal_rank(LABEL, CHUNKS) == 1 / 2
+    assert reciprocal_rank(LABEL, CHUNKS[2:]) == 1.0
+    assert reciprocal_rank(LABEL, [_chunk("x"), _chunk("w"), _chunk("c1")]) == 1 / 3
+    assert reciprocal_rank(LABEL, [_chunk("x")]) == 0.0
+    assert reciprocal_rank(LABEL, []) == 0.0
+
+
+def test_latency_summary_in_milliseconds():
+    summary = latency_summary([0.001, 0.002, 0.003, 0.004])
+
+    assert summary["n"] == 4
+    assert summary["mean_ms"] == pytest.approx(2.5)
+    assert summary["p50_ms"] == pytest.approx(2.5)
+    assert summary["qps"] == pytest.approx(4 / 0.01)
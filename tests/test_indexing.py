@@ -0,0 +1,72 @@
+import lancedb
+import numpy as np
+import pytest
+
+from rag.indexing import IndexParams, build_vector_index, index_metric
+from rag.retrieval import SearchOptions, retrieve, search
+
+
+def test_resolve_derives_partitions_and_sub_vectors():
+    params = IndexParams().resolve(num_rows=10_000, dim=1536)
+
+    assert (params.num_partitions, params.num_sub_vectors) == (100, 96)
+
+
+@pytest.mark.parametrize(
+    ("dim", "num_sub_vectors"),
+    [
+        (768, 48),
+        # 100 // 16 = 6 does not divide 100, 5 is the largest that does
+        (100, 5),
+        # Narrower than one sub-vector
+        (8, 1),
+    ],
+)
+def test_resolve_picks_a_divisor_of_the_width(dim, num_sub_vectors):
+    assert IndexParams().resolve(num_rows=1, dim=dim).num_sub_vectors == num_sub_vectors
+
+
+def test_resolve_keeps_explicit_settings():
+    params = IndexParams(
+        index_type="IVF_HNSW_SQ", metric="dot", num_partitions=7, num_sub_vectors=3
+    )
+
+    resolved = params.resolve(num_rows=0, dim=1536)
+
+    assert resolved == params
+    assert resolved is not params
+
+
+def test_resolve_has_at_least_one_partition():
+    assert IndexParams().resolve(num_rows=0, dim=16).num_partitions == 1
+
+
+def test_search_uses_the_metric_of_the_index(tmp_path):
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=32).astype(np.float32)
+    vectors = {
+        # Closest by angle, far away by euclidean distance
+        "parallel": 10 * query,
+        "near": query + 0.3 * rng.normal(size=32),
+        **{str(i): vector for i, vector in enumerate(rng.normal(size=(300, 32)))},
+    }
+    rows = [
+        {
+            "id": key,
+            "text": key,
+            "metadata": {"filename": "a.pdf", "page_numbers": [1], "title": "A"},
+            "vector": vector.astype(np.float32),
+        }
+        for key, vector in vectors.items()
+    ]
+    table = lancedb.connect(tmp_path).create_table("docling", rows)
+    assert index_metric(table) == "cosine"
+
+    build_vector_index(table, IndexParams(metric="l2", num_partitions=2))
+    options = SearchOptions(mode="vector")
+    results = search(table, "", 1, options, query_vector=query)
+    [chunk] = retrieve(table, "", 1, options, query_vector=query)
+
+    assert index_metric(table) == "l2"
+    assert results["id"].to_pylist() == [chunk.id] == ["near"]
+    assert chunk.score == pytest.approx(-results["_distance"][0].as_py())
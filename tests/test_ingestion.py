@@ -0,0 +1,18 @@
+import lancedb
+import pytest
+
+from rag import ingestion, telemetry
+
+
+def test_full_ingest_refuses_to_append_to_a_table_with_rows(tmp_path, monkeypatch):
+    table = lancedb.connect(tmp_path).create_table(
+        "docling", [{"id": "a", "vector": [0.0, 1.0]}]
+    )
+    monkeypatch.setattr(ingestion, "open_table", lambda overwrite=False: table)
+    monkeypatch.setattr(ingestion, "ingest", lambda *args, **kwargs: pytest.fail())
+    monkeypatch.setattr(telemetry, "configure", lambda: None)
+    monkeypatch.setattr("sys.argv", ["ingest", str(tmp_path)])
+
+    with pytest.raises(SystemExit):
+        ingestion.main()
+    assert table.count_rows() == 1
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import lancedb
+import numpy as np
+import pytest
+
+from rag import indexing, maintenance
+from rag.indexing import refresh_vector_index, vector_index_name
+from rag.maintenance import MaintenancePolicy, maintain, table_health
+
+
+def _table(tmp_path, batches: int = 5):
+    table = lancedb.connect(tmp_path).create_table(
+        "docling",
+        [{"id": "0", "text": "first", "vector": np.zeros(4, np.float32)}],
+    )
+    for i in range(1, batches):
+        row = {"id": str(i), "text": f"row {i}", "vector": np.ones(4, np.float32)}
+        table.add([row])
+    return table
+
+
+def test_table_health_of_a_local_table(tmp_path):
+    table = _table(tmp_path)
+
+    health = table_health(table)
+
+    assert (health.num_rows, health.num_versions) == (5, 5)
+    assert health.unindexed_ratio is None
+    assert health.disk_bytes > 0
+
+
+def test_force_leaves_tables_without_a_vector_index_unindexed(tmp_path, monkeypatch):
+    ran = []
+    monkeypatch.setattr(
+        maintenance,
+        "_run_action",
+        lambda table, action, policy: ran.append(action) or "done",
+    )
+    table = _table(tmp_path)
+
+    report = maintain(table, MaintenancePolicy(), force=True, probe=0)
+
+    assert ran == list(report.actions) == ["compact", "cleanup"]
+    assert vector_index_name(table) is None
+
+
+class _Table:
+    def __init__(self, *indexed: str):
+        self.optimized = []
+        self.indices = [
+            SimpleNamespace(name=f"{column}_idx", columns=[column]) for column in indexed
+        ]
+
+    def list_indices(self):
+        return self.indices
+
+    def optimize(self, **kwargs):
+        self.optimized.append(kwargs)
+
+
+def test_index_update_keeps_the_grace_period(monkeypatch):
+    monkeypatch.setattr(indexing, "unindexed_ratio", lambda table: 0.05)
+    table = _Table()
+
+    assert refresh_vector_index(table, cleanup_older_than=timedelta(hours=6)) == (
+        "updated"
+    )
+    assert table.optimized == [{"cleanup_older_than": timedelta(hours=6)}]
+
+
+def test_maintenance_passes_the_grace_period_to_the_index_update(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        maintenance,
+        "refresh_vector_index",
+        lambda table, **kwargs: calls.append(kwargs) or "updated",
+    )
+
+    maintenance._run_action(
+        _Table("vector"), "index", MaintenancePolicy(grace_hours=6)
+    )
+
+    assert calls[0]["cleanup_older_than"] == timedelta(hours=6)
+
+
+@pytest.mark.parametrize(
+    ("indexed", "outcome", "optimized"),
+    [
+        (("vector", "text"), "updated", 0),
+        (("vector", "text"), "built", 1),
+        (("vector", "text"), "unchanged", 1),
+        (("vector",), "built", 0),
+        (("text", "year"), None, 1),
+    ],
+)
+def test_index_action_refreshes_the_other_indexes(
+    monkeypatch, indexed, outcome, optimized
+):
+    monkeypatch.setattr(
+        maintenance, "refresh_vector_index", lambda table, **kwargs: outcome
+    )
+    table = _Table(*indexed)
+
+    maintenance._run_action(table, "index", MaintenancePolicy())
+
+    assert len(table.optimized) == optimized
+
+
+def test_keyword_index_is_kept_up_without_a_vector_index(tmp_path):
+    table = _table(tmp_path)
+    table.create_fts_index("text", use_tantivy=False)
+    table.add([{"id": "5", "text": "late row", "vector": np.ones(4, np.float32)}])
+
+    health = table_health(table)
+    report = maintain(table, MaintenancePolicy(max_unindexed=0.1), probe=0)
+
+    assert health.unindexed_ratio is None
+    assert health.secondary_unindexed_ratio == pytest.approx(1 / 6)
+    assert "index" in report.actions
+    assert report.after.secondary_unindexed_ratio == 0.0
@@ -0,0 +1,59 @@
+from rag.manifest import Manifest
+
+SETTINGS = {"tokenizer": "bert-base-uncased", "max_tokens": 4000, "profile": "auto"}
+
+
+def _pdf(directory, name: str, content: bytes):
+    path = directory / name
+    path.write_bytes(content)
+    return path
+
+
+def _ingested(tmp_path, paths, settings=SETTINGS) -> Manifest:
+    manifest = Manifest(tmp_path / "manifest.json", settings)
+    changed, _ = manifest.diff(paths)
+    for path, entry in changed:
+        manifest.record(path.name, entry)
+    manifest.save()
+    return manifest
+
+
+def test_unchanged_files_are_skipped(tmp_path):
+    a = _pdf(tmp_path, "a.pdf", b"first")
+    b = _pdf(tmp_path, "b.pdf", b"second")
+    _ingested(tmp_path, [a, b])
+
+    b.write_bytes(b"second, revised")
+    changed, removed = Manifest(tmp_path / "manifest.json", SETTINGS).diff([a, b])
+    assert [path.name for path, _ in changed] == ["b.pdf"]
+    assert removed == []
+
+
+def test_removed_files_are_reported(tmp_path):
+    a = _pdf(tmp_path, "a.pdf", b"first")
+    b = _pdf(tmp_path, "b.pdf", b"second")
+    _ingested(tmp_path, [a, b])
+
+    changed, removed = Manifest(tmp_path / "manifest.json", SETTINGS).diff([a])
+    assert changed == []
+    assert removed == ["b.pdf"]
+
+
+def test_settings_change_rechunks_everything_and_keeps_removals(tmp_path):
+    a = _pdf(tmp_path, "a.pdf", b"first")
+    b = _pdf(tmp_path, "b.pdf", b"second")
+    _ingested(tmp_path, [a, b])
+
+    manifest = Manifest(tmp_path / "manifest.json", {**SETTINGS, "max_tokens": 512})
+    changed, removed = manifest.diff([a])
+    assert [path.name for path, _ in changed] == ["a.pdf"]
+    assert removed == ["b.pdf"]
+
+    manifest.forget("b.pdf")
+    manifest.save()
+    # Nothing recorded under the new settings yet, so a re-run redoes a.pdf
+    changed, removed = Manifest(
+        tmp_path / "manifest.json", {**SETTINGS, "max_tokens": 512}
+    ).diff([a])
+    assert [path.name for path, _ in changed] == ["a.pdf"]
+    assert removed == []
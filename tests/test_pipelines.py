@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from docling_core.types.doc import (
+    BoundingBox,
+    DocItemLabel,
+    DoclingDocument,
+    ProvenanceItem,
+    Size,
+)
+
+from rag import conversion_cache, ingestion, pipelines
+from rag.conversion_cache import NotCached
+from rag.pipelines import PdfInfo, ProfileConverters, merge_documents, page_ranges
+
+
+def test_page_ranges_cover_every_page_once():
+    assert page_ranges(10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert page_ranges(8, 4) == [(1, 4), (5, 8)]
+    assert page_ranges(3, 10) == [(1, 3)]
+    assert page_ranges(0, 4) == []
+
+
+def _shard(pages: list[int], texts: list[tuple[int, str]]) -> dict:
+    """What converting one page range gives: pages numbered as in the whole PDF."""
+    doc = DoclingDocument(name="paper")
+    for page in pages:
+        doc.add_page(page_no=page, size=Size(width=100, height=100))
+    for page, text in texts:
+        doc.add_text(
+            label=DocItemLabel.TEXT,
+            text=text,
+            prov=ProvenanceItem(
+                page_no=page,
+                bbox=BoundingBox(l=0, t=0, r=1, b=1),
+                charspan=(0, len(text)),
+            ),
+        )
+    return doc.export_to_dict()
+
+
+def test_merge_documents_renumbers_later_shards():
+    merged = merge_documents(
+        [
+            _shard([1, 2], [(1, "intro"), (2, "methods")]),
+            _shard([3], [(3, "results")]),
+        ]
+    )
+
+    assert [item.text for item, _ in merged.iterate_items()] == [
+        "intro",
+        "methods",
+        "results",
+    ]
+    assert [child.cref for child in merged.body.children] == [
+        "#/texts/0",
+        "#/texts/1",
+        "#/texts/2",
+    ]
+    assert [text.self_ref for text in merged.texts] == [
+        "#/texts/0",
+        "#/texts/1",
+        "#/texts/2",
+    ]
+    assert [text.prov[0].page_no for text in merged.texts] == [1, 2, 3]
+    assert sorted(merged.pages) == [1, 2, 3]
+
+
+def test_merge_documents_of_one_shard_is_that_document():
+    shard = _shard([1], [(1, "only")])
+    assert merge_documents([shard]).export_to_dict() == shard
+
+
+def _fake_pool(monkeypatch, pages: dict[str, int]) -> dict:
+    """Run iter_documents on threads with stand-in workers, tracking its tasks."""
+    stats = {"outstanding": 0, "max_outstanding": 0, "merged": {}}
+
+    def convert_shard(source, profile, page_range):
+        return ingestion.ShardResult(page_range=page_range, document={})
+
+    def process_pdf(source, profile=None, shards=None):
+        if shards is not None:
+            stats["merged"][source.name] = [shard.page_range for shard in shards]
+        return ingestion.DocumentResult(path=source)
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context, initializer, initargs):
+            super().__init__(max_workers)
+
+        def submit(self, *args, **kwargs):
+            stats["outstanding"] += 1
+            stats["max_outstanding"] = max(
+                stats["max_outstanding"], stats["outstanding"]
+            )
+            return super().submit(*args, **kwargs)
+
+    def wait(futures, return_when):
+        done, not_done = futures_wait(futures, return_when=return_when)
+        stats["outstanding"] -= len(done)
+        return done, not_done
+
+    def plan(self, source):
+        if pages[source.name] <= self.shard_pages:
+            return None
+        return "tables", page_ranges(pages[source.name], self.shard_pages)
+
+    monkeypatch.setattr(ingestion, "_convert_shard", convert_shard)
+    monkeypatch.setattr(ingestion, "_process_pdf", process_pdf)
+    monkeypatch.setattr(ingestion, "ProcessPoolExecutor", Pool)
+    monkeypatch.setattr(ingestion, "wait", wait)
+    monkeypatch.setattr(ingestion._ShardPlanner, "plan", plan)
+    return stats
+
+
+def test_shards_count_against_max_inflight(monkeypatch):
+    pages = {"big.pdf": 100, "a.pdf": 3, "b.pdf": 5, "c.pdf": 8}
+    stats = _fake_pool(monkeypatch, pages)
+
+    documents = ingestion.iter_documents(
+        [Path(name) for name in pages], workers=2, max_inflight=3, shard_pages=10
+    )
+    assert sorted(doc.path.name for doc in documents) == sorted(pages)
+    assert stats["max_outstanding"] <= 3
+    assert stats["merged"] == {"big.pdf": page_ranges(100, 10)}
+
+
+class _Converter:
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.converted = []
+
+    def convert(self, source):
+        self.converted.append(source.name)
+        return SimpleNamespace(document=DoclingDocument(name=self.profile))
+
+
+@pytest.fixture
+def converters(monkeypatch, tmp_path):
+    """ProfileConverters over stand-in converters; scanned PDFs are named scan*."""
+    monkeypatch.setattr(pipelines, "build_converter", _Converter)
+    monkeypatch.setattr(
+        conversion_cache, "pipeline_fingerprint", lambda converter: converter.profile
+    )
+    monkeypatch.setattr(
+        pipelines,
+        "inspect_pdf",
+        lambda source: PdfInfo(1, needs_ocr=source.name.startswith("scan")),
+    )
+    for name in ("paper.pdf", "scan.pdf"):
+        (tmp_path / name).write_bytes(name.encode())
+
+    def make(profile: str = "auto") -> ProfileConverters:
+        return ProfileConverters(profile, tmp_path / "cache")
+
+    return make
+
+
+def test_auto_profile_is_resolved_per_pdf(converters, tmp_path):
+    auto = converters("auto")
+
+    paper, _, paper_profile = auto.convert(tmp_path / "paper.pdf")
+    scan, _, scan_profile = auto.convert(tmp_path / "scan.pdf")
+
+    assert (paper_profile, scan_profile) == ("tables", "ocr")
+    assert (paper.name, scan.name) == ("tables", "ocr")
+    assert auto.get("tables")[0].converted == ["paper.pdf"]
+
+
+def test_cache_only_finds_pdfs_converted_under_auto(converters, tmp_path):
+    converters("auto").convert(tmp_path / "paper.pdf")
+
+    document, cached, profile = converters("auto").convert(
+        tmp_path / "paper.pdf", cache_only=True
+    )
+    assert (document.name, cached, profile) == ("tables", True, "tables")
+    with pytest.raises(NotCached):
+        converters("ocr").convert(tmp_path / "paper.pdf", cache_only=True)
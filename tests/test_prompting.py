@@ -0,0 +1,123 @@
+import pytest
+
+from rag import prompting
+from rag.prompting import (
+    MIN_TRIMMED_TOKENS,
+    TOKENS_PER_MESSAGE,
+    bound_history,
+    format_chunk,
+    pack_context,
+    trim_to_tokens,
+)
+from rag.retrieval import RetrievedChunk
+
+
+class _CharEncoding:
+    """One token per character, so budgets can be worked out by hand."""
+
+    def encode_ordinary(self, text: str) -> list[str]:
+        return list(text)
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(prompting, "_encoding", lambda model=None: _CharEncoding())
+
+
+def _chunk(name: str, text: str) -> RetrievedChunk:
+    return RetrievedChunk(name, text, f"{name}.pdf", [1], None, 1.0)
+
+
+SENTENCES = "First sentence here. Second sentence here. Third sentence here."
+
+
+def test_trim_to_tokens_at_exactly_the_limit():
+    assert trim_to_tokens(SENTENCES, len(SENTENCES)) == SENTENCES
+    assert trim_to_tokens(SENTENCES, len(SENTENCES) - 1) == (
+        "First sentence here. Second sentence here."
+    )
+    assert trim_to_tokens(SENTENCES, 0) == ""
+
+
+def test_trim_to_tokens_cuts_a_long_first_sentence():
+    assert trim_to_tokens(SENTENCES, 5) == "First"
+
+
+def test_pack_context_keeps_best_first_order_until_the_budget_is_spent():
+    chunks = [_chunk("a", "x" * 100), _chunk("b", "y" * 100), _chunk("c", "z")]
+    first, second = (len(format_chunk(chunk)) for chunk in chunks[:2])
+    # Two chunks and their separator fit exactly; the tiny third is not
+    # squeezed in ahead of its rank
+    budget = first + 2 + second
+
+    context, usage = pack_context(chunks, budget)
+
+    assert context == f"{format_chunk(chunks[0])}\n\n{format_chunk(chunks[1])}"
+    assert usage.context_tokens == budget
+    assert (usage.chunks_used, usage.chunks_trimmed, usage.chunks_dropped) == (2, 0, 1)
+
+
+def test_pack_context_trims_the_first_chunk_that_does_not_fit():
+    long_text = " ".join([SENTENCES] * 3)
+    chunks = [_chunk("a", "x" * 100), _chunk("b", long_text), _chunk("c", "z")]
+    overhead = len(format_chunk(chunks[1], text=""))
+    budget = len(format_chunk(chunks[0])) + 2 + overhead + len(SENTENCES) * 2
+
+    context, usage = pack_context(chunks, budget)
+
+    assert context.split("\n\n")[1].startswith(SENTENCES)
+    assert usage.context_tokens <= budget
+    assert (usage.chunks_used, usage.chunks_trimmed, usage.chunks_dropped) == (2, 1, 1)
+
+
+def test_pack_context_drops_everything_without_room_to_trim():
+    chunks = [_chunk("a", "x" * 100), _chunk("b", "y" * 100)]
+    budget = len(format_chunk(chunks[0])) + MIN_TRIMMED_TOKENS - 1
+
+    context, usage = pack_context(chunks, budget)
+
+    assert context == format_chunk(chunks[0])
+    assert (usage.chunks_used, usage.chunks_dropped) == (1, 1)
+
+
+def _message(content: str, role: str = "user") -> dict:
+    return {"role": role, "content": content}
+
+
+def test_bound_history_keeps_the_newest_turn_over_budget():
+    question = _message("q" * 500)
+    messages = [_message("old"), _message("reply", "assistant"), question]
+
+    kept, tokens, dropped = bound_history(messages, budget=0)
+
+    assert kept == [question]
+    assert tokens == 500 + TOKENS_PER_MESSAGE
+    assert dropped == 2
+
+
+def test_bound_history_keeps_turns_at_exactly_the_budget():
+    messages = [_message("a" * 10), _message("b" * 20, "assistant"), _message("q")]
+    budget = 10 + 20 + 2 * TOKENS_PER_MESSAGE
+
+    question_tokens = 1 + TOKENS_PER_MESSAGE
+    assert bound_history(messages, budget) == (messages, budget + question_tokens, 0)
+    kept, _, dropped = bound_history(messages, budget - 1)
+    assert kept == messages[1:]
+    assert dropped == 1
+
+
+def test_bound_history_truncates_the_oldest_message_that_partly_fits():
+    long_reply = _message(" ".join([SENTENCES] * 4), "assistant")
+    messages = [_message("old"), long_reply, _message("q")]
+    budget = len(SENTENCES) * 2 + TOKENS_PER_MESSAGE
+
+    kept, tokens, dropped = bound_history(messages, budget)
+
+    assert [message["role"] for message in kept] == ["assistant", "user"]
+    assert kept[0]["content"].startswith(SENTENCES)
+    assert len(kept[0]["content"]) <= len(SENTENCES) * 2
+    assert tokens <= budget + 1 + TOKENS_PER_MESSAGE
+    assert dropped == 1
@@ -0,0 +1,103 @@
+import lancedb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from rag.retrieval import distance_to_score, reciprocal_rank_fusion, scope_filter
+
+VECTORS = [[1.0, 0.0], [0.5, 0.5], [3.0, 0.0]]
+QUERY = [2.0, 0.0]
+
+
+def _expected(metric: str) -> list[float]:
+    query = np.asarray(QUERY)
+    scores = []
+    for vector in map(np.asarray, VECTORS):
+        if metric == "cosine":
+            norms = np.linalg.norm(vector) * np.linalg.norm(query)
+            scores.append(vector @ query / norms)
+        elif metric == "dot":
+            scores.append(vector @ query)
+        else:
+            scores.append(-np.sum((vector - query) ** 2))
+    return scores
+
+
+@pytest.mark.parametrize("metric", ["cosine", "dot", "l2"])
+def test_distance_to_score_recovers_the_similarity(tmp_path, metric):
+    table = lancedb.connect(tmp_path).create_table(
+        "vectors",
+        pa.table(
+            {
+                "i": list(range(len(VECTORS))),
+                "vector": pa.array(VECTORS, pa.list_(pa.float32(), 2)),
+            }
+        ),
+    )
+    results = table.search(QUERY).distance_type(metric).limit(3).to_arrow()
+    scores = distance_to_score(results["_distance"].to_pylist(), metric)
+
+    expected = _expected(metric)
+    assert scores == pytest.approx([expected[i] for i in results["i"].to_pylist()])
+    assert scores == sorted(scores, reverse=True)
+
+
+def _ranked(*row_ids: int) -> pa.Table:
+    return pa.table(
+        {
+            "text": pa.array([f"row {row_id}" for row_id in row_ids], pa.string()),
+            "_rowid": pa.array(row_ids, pa.uint64()),
+            "_distance": pa.array([0.0] * len(row_ids), pa.float32()),
+        }
+    )
+
+
+def test_rrf_weights_each_list():
+    fused = reciprocal_rank_fusion(
+        [(_ranked(1, 2, 3), 1.0), (_ranked(3, 2, 1), 2.0)], limit=3, rrf_k=0
+    )
+
+    # 3: 1/3 + 2/1, 2: 1/2 + 2/2, 1: 1/1 + 2/3
+    assert fused["_rowid"].to_pylist() == [3, 1, 2]
+    assert fused["_score"].to_pylist() == pytest.approx([7 / 3, 5 / 3, 3 / 2])
+    assert fused["text"].to_pylist() == ["row 3", "row 1", "row 2"]
+    assert "_distance" not in fused.column_names
+
+
+def test_rrf_breaks_ties_by_first_appearance():
+    fused = reciprocal_rank_fusion(
+        [(_ranked(1, 2), 1.0), (_ranked(2, 1), 1.0)], limit=2
+    )
+
+    assert fused["_rowid"].to_pylist() == [1, 2]
+    assert fused["_score"][0].as_py() == fused["_score"][1].as_py()
+
+
+def test_rrf_with_one_empty_list_keeps_the_other_order():
+    fused = reciprocal_rank_fusion(
+        [(_ranked(), 1.0), (_ranked(5, 4, 6), 0.5)], limit=2, rrf_k=60
+    )
+
+    assert fused["_rowid"].to_pylist() == [5, 4]
+    assert fused["_score"].to_pylist() == pytest.approx([0.5 / 61, 0.5 / 62])
+
+
+def test_scope_filter_escapes_quotes(tmp_path):
+    rows = [
+        {"doi": "10.1/o'brien", "journal": "Nature", "year": 2020},
+        {"doi": "10.1/other", "journal": "Mater' Today", "year": 2021},
+        {"doi": "10.1/x' OR '1'='1", "journal": "Nature", "year": 2022},
+    ]
+    table = lancedb.connect(tmp_path).create_table("articles", rows)
+
+    def matching(where: str) -> list[str]:
+        return sorted(table.search().where(where).to_arrow()["doi"].to_pylist())
+
+    assert scope_filter(doi="10.1/o'brien") == "doi = '10.1/o''brien'"
+    assert matching(scope_filter(doi="10.1/o'brien")) == ["10.1/o'brien"]
+    assert matching(scope_filter(journal="Mater' Today")) == ["10.1/other"]
+    assert matching(scope_filter(doi="10.1/x' OR '1'='1")) == ["10.1/x' OR '1'='1"]
+    assert matching(scope_filter(journal="Nature", year_from=2021)) == [
+        "10.1/x' OR '1'='1"
+    ]
+    assert scope_filter() is None
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from rag import prompting, service
+from rag.bench.fakes import AsyncFakeChatClient
+from rag.client import iter_sse
+from rag.retrieval import RetrievedChunk, Scope, SearchOptions
+from rag.service import BadRequest, RagApp, RagService, parse_options
+
+
+def test_parse_options_fills_defaults():
+    assert parse_options(None) == SearchOptions()
+    options = parse_options({"mode": "vector", "vector_weight": 2, "where": None})
+    assert (options.mode, options.vector_weight, options.where) == ("vector", 2, None)
+
+
+def test_parse_options_reads_the_scope():
+    options = parse_options({"scope": {"journal": "Acta", "year_from": 2020}})
+
+    assert options.scope == Scope(journal="Acta", year_from=2020)
+    assert parse_options({"scope": None}).scope is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        ["mode", "vector"],
+        {"colour": "blue"},
+        {"mode": "semantic"},
+        {"rrf_k": "60"},
+        {"rrf_k": 1.5},
+        {"candidates": True},
+        {"diversify": 1},
+        {"where": 3},
+        {"scope": "10.1/a"},
+        {"scope": {"doi": "10.1/a", "where": "1=1"}},
+        {"scope": {"year_from": "2020"}},
+    ],
+)
+def test_parse_options_rejects_bad_input(data):
+    with pytest.raises(BadRequest):
+        parse_options(data)
+
+
+def test_iter_sse_parses_events():
+    lines = [
+        "event: chunks",
+        'data: [{"id": "a"}]',
+        "",
+        ": comment lines are ignored",
+        'data: {"multi":',
+        "data: true}",
+        "",
+        "event: done",
+        'data: {"cached": false}',
+    ]
+
+    assert list(iter_sse(lines)) == [
+        ("chunks", [{"id": "a"}]),
+        ("message", {"multi": True}),
+        ("done", {"cached": False}),
+    ]
+
+
+class _Encoding:
+    def encode_ordinary(self, text: str) -> list[str]:
+        return text.split()
+
+
+class _Table:
+    """Stand-in table recording the threads its version is read on."""
+
+    def __init__(self):
+        self.threads = []
+
+    @property
+    def version(self) -> int:
+        self.threads.append(threading.current_thread().name)
+        return 1
+
+
+CHUNKS = [
+    RetrievedChunk("a", "Grain boundaries pin dislocations.", "a.pdf", [2], None, 0.9)
+]
+
+
+@pytest.fixture
+def rag_service(monkeypatch) -> RagService:
+    monkeypatch.setattr(prompting, "_encoding", lambda model=None: _Encoding())
+    monkeypatch.setattr(service, "retrieve", lambda *args: CHUNKS)
+    rag_service = RagService(_Table(), AsyncFakeChatClient(ttft=0, token_delay=0))
+    monkeypatch.setattr(
+        rag_service.query_cache, "embed", lambda table, query: np.ones(4)
+    )
+    return rag_service
+
+
+async def _events(rag_service: RagService, messages: list[dict]) -> list:
+    return [event async for event in rag_service.chat(messages)]
+
+
+QUESTION = [{"role": "user", "content": "What pins dislocations?"}]
+
+
+def test_chat_streams_then_reuses_the_answer(rag_service):
+    events = asyncio.run(_events(rag_service, QUESTION))
+    again = asyncio.run(_events(rag_service, QUESTION))
+
+    names = [name for name, _ in events]
+    assert names[:2] == ["chunks", "usage"]
+    assert set(names[2:-1]) == {"token"}
+    assert events[-1] == ("done", {"cached": False})
+    assert events[0][1][0]["source"] == "a.pdf - p. 2"
+    answer = "".join(payload for name, payload in events if name == "token")
+    assert again[1:] == [("token", answer), ("done", {"cached": True})]
+    # The table is only touched off the event loop
+    assert all(name.startswith("rag-service") for name in rag_service.table.threads)
+
+
+@pytest.mark.parametrize(
+    "messages",
+    [
+        [],
+        ["hello"],
+        [{"role": "user"}],
+        [{"role": "user", "content": 1}],
+        [{"role": "assistant", "content": "hi"}],
+    ],
+)
+def test_chat_rejects_malformed_messages(rag_service, messages):
+    with pytest.raises(BadRequest):
+        asyncio.run(_events(rag_service, messages))
+
+
+async def _call(app: RagApp, method: str, path: str, body: dict | None = None):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body or {}).encode()}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path}
+    await app(scope, receive, send)
+    status = sent[0]["status"]
+    return status, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def test_app_streams_chat_events(rag_service):
+    app = RagApp(rag_service)
+
+    status, body = asyncio.run(
+        _call(app, "POST", "/chat", {"messages": QUESTION, "num_results": 1})
+    )
+
+    assert status == 200
+    events = list(iter_sse(body.decode().splitlines()))
+    assert [name for name, _ in events][:2] == ["chunks", "usage"]
+    assert events[-1] == ("done", {"cached": False})
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"messages": ["hello"]},
+        {"messages": QUESTION, "num_results": "5"},
+        {"messages": QUESTION, "num_results": 0},
+        {"messages": QUESTION, "options": {"rrf_k": "x"}},
+        {"messages": QUESTION, "options": "hybrid"},
+    ],
+)
+def test_app_answers_bad_requests_with_400(rag_service, body):
+    status, response = asyncio.run(_call(RagApp(rag_service), "POST", "/chat", body))
+
+    assert status == 400
+    assert "error" in json.loads(response)
+
+
+def test_app_retrieves_chunks(rag_service):
+    status, body = asyncio.run(
+        _call(RagApp(rag_service), "POST", "/retrieve", {"query": "dislocations"})
+    )
+
+    assert status == 200
+    assert [chunk["id"] for chunk in json.loads(body)["chunks"]] == ["a"]
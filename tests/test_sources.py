@@ -0,0 +1,93 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+
+from rag.sources import get_container_client, iter_blob_documents
+
+# Azurite's well-known development account
+AZURITE_CONNECTION_STRING = os.getenv(
+    "AZURITE_CONNECTION_STRING",
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZ"
+    "FPTOtr/KBHBeksoGMGw==;BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;",
+)
+
+
+class FakeContainer:
+    def __init__(self, blobs: dict[str, bytes], fail: str | None = None):
+        self.blobs = blobs
+        self.fail = fail
+        self.downloaded = []
+        self._lock = threading.Lock()
+
+    def list_blobs(self):
+        return [SimpleNamespace(name=name) for name in self.blobs]
+
+    def download_blob(self, name, max_concurrency=1):
+        if name == self.fail:
+            raise ConnectionError(name)
+        with self._lock:
+            self.downloaded.append(name)
+        return SimpleNamespace(readall=lambda: self.blobs[name])
+
+
+def test_every_pdf_is_yielded_once():
+    blobs = {f"{i}.pdf": f"%PDF {i}".encode() for i in range(20)}
+    blobs["notes.txt"] = b"not a pdf"
+    documents = list(iter_blob_documents(FakeContainer(blobs), workers=4))
+
+    assert sorted(doc.name for doc in documents) == sorted(
+        name for name in blobs if name.endswith(".pdf")
+    )
+    assert all(doc.data == blobs[doc.name] for doc in documents)
+
+
+def test_downloads_wait_for_a_slow_consumer():
+    container = FakeContainer({f"{i}.pdf": b"%PDF" for i in range(50)})
+    documents = iter_blob_documents(container, workers=2, max_buffered=3)
+    next(documents)
+    time.sleep(0.2)
+    # One yielded, three buffered and one blocked on the full queue per worker
+    assert len(container.downloaded) <= 1 + 3 + 2
+    documents.close()
+
+
+def test_download_error_is_raised():
+    container = FakeContainer({"a.pdf": b"%PDF", "b.pdf": b"%PDF"}, fail="b.pdf")
+    with pytest.raises(ConnectionError):
+        list(iter_blob_documents(container, names=["a.pdf", "b.pdf"], workers=1))
+
+
+def _azurite_running() -> bool:
+    endpoint = dict(
+        part.split("=", 1) for part in AZURITE_CONNECTION_STRING.split(";") if part
+    )["BlobEndpoint"]
+    url = urlparse(endpoint)
+    try:
+        socket.create_connection((url.hostname, url.port or 80), timeout=0.5).close()
+    except OSError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _azurite_running(), reason="Azurite is not running")
+def test_blob_source_against_azurite():
+    container = f"test-{uuid.uuid4().hex[:12]}"
+    client = get_container_client(AZURITE_CONNECTION_STRING, container)
+    client.create_container()
+    try:
+        blobs = {f"paper-{i}.pdf": os.urandom(3 * 2**20) for i in range(3)}
+        for name, data in blobs.items():
+            client.upload_blob(name, data)
+        client.upload_blob("readme.txt", b"skipped")
+
+        documents = list(iter_blob_documents(client, workers=2, max_concurrency=2))
+        assert {doc.name: doc.data for doc in documents} == blobs
+    finally:
+        client.delete_container()
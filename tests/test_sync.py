@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import lancedb
+import pyarrow as pa
+import pytest
+
+from rag import ingestion
+from rag.articles import ArticleCatalog
+from rag.bench.fakes import fake_embedding_function
+from rag.ingestion import DocumentResult, backfill_chunk_ids, sync
+from rag.manifest import Manifest
+from rag.schema import assign_chunk_ids, build_chunks_schema
+
+SETTINGS = {"tokenizer": "bert-base-uncased", "max_tokens": 4000, "profile": "auto"}
+
+
+def _legacy_rows() -> list[dict]:
+    rows = []
+    for filename in ("a.pdf", "b.pdf"):
+        for text in ("intro", "methods", "intro"):
+            rows.append(
+                {
+                    "text": text,
+                    "metadata": {
+                        "filename": filename,
+                        "page_numbers": [1],
+                        "title": None,
+                    },
+                }
+            )
+    return rows
+
+
+def test_backfill_gives_legacy_rows_the_ids_ingestion_assigns(tmp_path):
+    func = fake_embedding_function(dim=8)
+    rows = _legacy_rows()
+    vectors = func.compute_source_embeddings([row["text"] for row in rows])
+    table = lancedb.connect(tmp_path).create_table(
+        "docling",
+        pa.Table.from_pylist(
+            [{**row, "vector": list(map(float, v))} for row, v in zip(rows, vectors)]
+        ),
+    )
+    assert "id" not in table.schema.names
+
+    assert backfill_chunk_ids(table) == len(rows)
+    assert backfill_chunk_ids(table) == 0
+
+    stored = table.search().select(["id", "text", "metadata"]).limit(None).to_arrow()
+    expected = set()
+    for filename in ("a.pdf", "b.pdf"):
+        same_file = [
+            row for row in _legacy_rows() if row["metadata"]["filename"] == filename
+        ]
+        expected |= {row["id"] for row in assign_chunk_ids(same_file)}
+    assert set(stored["id"].to_pylist()) == expected
+    assert len(expected) == len(rows)
+
+
+def _chunks(filename: str, pages: dict[str, int]) -> list[dict]:
+    return assign_chunk_ids(
+        [
+            {
+                "text": text,
+                "metadata": {
+                    "filename": filename,
+                    "page_numbers": [page],
+                    "title": None,
+                },
+            }
+            for text, page in pages.items()
+        ]
+    )
+
+
+@pytest.mark.parametrize("short_dim", [0, 4])
+def test_sync_upserts_changed_documents(tmp_path, monkeypatch, short_dim):
+    chunks = {}
+    monkeypatch.setattr(
+        ingestion,
+        "iter_documents",
+        lambda paths, **kwargs: [
+            DocumentResult(path, chunks[path.name], num_chunks=len(chunks[path.name]))
+            for path in paths
+        ],
+    )
+    func = fake_embedding_function(dim=8)
+    table = lancedb.connect(tmp_path).create_table(
+        "docling", schema=build_chunks_schema(func, short_dim=short_dim)
+    )
+    manifest = Manifest(tmp_path / "manifest.json", SETTINGS)
+    pdf = tmp_path / "10.1002_abc.123.pdf"
+
+    pdf.write_bytes(b"first version")
+    chunks[pdf.name] = _chunks(pdf.name, {"intro": 1, "methods": 1})
+    sync([pdf], table, manifest, articles=ArticleCatalog())
+    first = table.to_arrow()
+    vectors = dict(zip(first["text"].to_pylist(), first["vector"].to_pylist()))
+
+    pdf.write_bytes(b"second version")
+    chunks[pdf.name] = _chunks(pdf.name, {"intro": 2, "results": 2})
+    catalog = ArticleCatalog([{"doi": "10.1002/abc.123", "year": 2025, "journal": "J"}])
+    report = sync([pdf], table, manifest, articles=catalog)
+
+    assert (report.num_inserted, report.num_updated, report.num_deleted) == (1, 1, 1)
+    rows = {row["text"]: row for row in table.to_arrow().to_pylist()}
+    assert sorted(rows) == ["intro", "results"]
+    assert rows["intro"]["metadata"]["page_numbers"] == [2]
+    assert (rows["intro"]["year"], rows["intro"]["journal"]) == (2025, "J")
+    assert rows["intro"]["vector"] == vectors["intro"]
+    if short_dim:
+        assert all(row["vector_short"] is not None for row in rows.values())
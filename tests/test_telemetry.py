@@ -0,0 +1,37 @@
+import time
+import urllib.request
+
+from rag import telemetry
+from rag.bench.fakes import _Choice, _Chunk, _Delta
+
+
+def _stream(delay: float):
+    # Like the OpenAI API: the role arrives at once, the first token later
+    yield _Chunk([_Choice(_Delta(role="assistant", content=""))])
+    time.sleep(delay)
+    yield _Chunk([_Choice(_Delta(content="Hello"))])
+    yield _Chunk([_Choice(_Delta(), finish_reason="stop")])
+
+
+def test_time_to_first_token_waits_for_answer_text(monkeypatch):
+    histogram = telemetry.Histogram("test_seconds", "test")
+    monkeypatch.setattr(telemetry, "STAGE_SECONDS", histogram)
+    monkeypatch.setattr(telemetry, "_enabled", True)
+
+    chunks = list(telemetry.traced_stream(_stream(0.05)))
+    assert [telemetry.delta_text(chunk) for chunk in chunks] == ["", "Hello", ""]
+    _, ttft, count = histogram._values[(("stage", "time_to_first_token"),)]
+    assert count == 1
+    assert ttft >= 0.05
+
+
+def test_prometheus_exporter_listens_on_loopback_by_default():
+    exporter = telemetry.PrometheusExporter(port=0)
+    try:
+        host, port = exporter.server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert b"rag_stage_seconds" in response.read()
+    finally:
+        exporter.server.shutdown()
+        exporter.server.server_close()
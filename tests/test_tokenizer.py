@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("transformers")
+
+from rag.utils import tokenizer as tokenizer_module  # noqa: E402
+from rag.utils.tokenizer import OpenAITokenizerWrapper  # noqa: E402
+
+
+class _Encoding:
+    """Stand-in tiktoken encoding: one token per word, id = word length."""
+
+    max_token_value = 100
+
+    def __init__(self):
+        self.calls = []
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        self.calls.append(text)
+        return [len(word) for word in text.split()]
+
+    def encode_ordinary_batch(self, texts: list[str], num_threads: int = 8):
+        return [self.encode_ordinary(text) for text in texts]
+
+
+@pytest.fixture
+def encoding(monkeypatch) -> _Encoding:
+    encoding = _Encoding()
+    monkeypatch.setattr(tokenizer_module, "get_encoding", lambda name: encoding)
+    return encoding
+
+
+def test_count_tokens_caches_counts_only(encoding):
+    tok = OpenAITokenizerWrapper()
+
+    assert [tok.count_tokens("a bb ccc"), tok.count_tokens("a bb ccc")] == [3, 3]
+    assert encoding.calls == ["a bb ccc"]
+    assert tok._count.cache_info().currsize == 1
+    assert tok._encode.cache_info().currsize == 0
+
+
+def test_count_cache_is_bounded(encoding):
+    tok = OpenAITokenizerWrapper(cache_size=2)
+
+    for text in ["one", "two", "three", "one"]:
+        tok.count_tokens(text)
+
+    assert encoding.calls == ["one", "two", "three", "one"]
+    assert tok._count.cache_info().currsize == 2
+
+
+def test_token_ids_are_cached_for_few_texts(encoding):
+    tok = OpenAITokenizerWrapper(id_cache_size=2)
+
+    assert tok.encode_ids("a bb") == (1, 2)
+    assert tok.tokenize("a bb") == ["1", "2"]
+    tok.encode_ids("ccc")
+    tok.encode_ids("dddd")
+    tok.encode_ids("a bb")
+
+    assert encoding.calls == ["a bb", "ccc", "dddd", "a bb"]
+    assert tok._encode.cache_info().currsize == 2
+
+
+def test_batch_counts_match_single_counts(encoding):
+    tok = OpenAITokenizerWrapper()
+    texts = ["a", "a bb", ""]
+
+    assert tok.count_tokens_batch(texts) == [tok.count_tokens(t) for t in texts]
+    assert tok.for_chunker(max_tokens=8).count_tokens("a bb ccc") == 3